@@ -48,6 +48,14 @@ from config import Config
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# Seed the upstream caches from the on-disk catalog snapshot before the first request
+from utils.catalog_snapshot import init_catalog_snapshot, get_catalog_staleness
+init_catalog_snapshot(app)
+
+# Recompute investment rankings in the background whenever the catalog changes
+from utils.rankings import init_rankings_job
+init_rankings_job(app)
+
 # Legacy compatibility route: some OAuth clients redirect to /login/callback (root).
 from flask import request, redirect
 
@@ -163,6 +171,11 @@ if has_api_blueprint:
     except Exception:
         pass
 
+# Run background jobs (blueprints register their handlers on import) and resume any
+# left unfinished by a previous process
+from utils.jobs import init_jobs
+init_jobs(app)
+
 @app.context_processor
 def inject_globals():
     """Inject global variables and functions into all templates"""
@@ -183,10 +196,16 @@ def inject_globals():
         logged_in = False
         current_user_obj = None
 
+    try:
+        catalog_staleness = get_catalog_staleness()
+    except Exception:
+        catalog_staleness = None
+
     return dict(
         current_year=lambda: datetime.now().year,
         user_logged_in=logged_in,
         current_user=current_user_obj,
+        catalog_staleness=catalog_staleness,
     )
 
 @app.context_processor
@@ -4,6 +4,7 @@ Configuration settings for Gems Hub Flask application
 
 import os
 import json
+import tempfile
 
 class Config:
     """Base configuration class"""
@@ -37,6 +38,61 @@ class Config:
     GEMDB_API_URL = os.environ.get('GEMDB_API_URL', 'https://api.preciousstone.info')
     # GEMDB API key: prefer environment variable. If not set, look for a local config.json
     GEMDB_API_KEY = os.environ.get('GEMDB_API_KEY', '')
+    # Seconds a cached copy of the gem catalog is served before it is refreshed in the background
+    GEMDB_CATALOG_TTL = int(os.environ.get('GEMDB_CATALOG_TTL', '300'))
+    # Size of the shared keep-alive connection pool used for all GEMDB API calls
+    GEMDB_POOL_SIZE = int(os.environ.get('GEMDB_POOL_SIZE', '16'))
+    # Per-endpoint timeout overrides in seconds, e.g. 'catalog:10,pricing:5,listings:8'
+    GEMDB_TIMEOUTS = os.environ.get('GEMDB_TIMEOUTS', '')
+    # Per-endpoint circuit breaker: consecutive failures (errors, 5xx or calls slower than
+    # GEMDB_BREAKER_SLOW_SECONDS) that open it, and seconds before a half-open probe
+    GEMDB_BREAKER_FAILURES = int(os.environ.get('GEMDB_BREAKER_FAILURES', '5'))
+    GEMDB_BREAKER_RESET = float(os.environ.get('GEMDB_BREAKER_RESET', '30'))
+    GEMDB_BREAKER_SLOW_SECONDS = float(os.environ.get('GEMDB_BREAKER_SLOW_SECONDS', '4'))
+    # Worker threads shared by pages that fan out independent upstream calls
+    GEMDB_FANOUT_WORKERS = int(os.environ.get('GEMDB_FANOUT_WORKERS', '16'))
+    # Overall time budget (seconds) for the upstream calls behind a gem profile page
+    GEM_PROFILE_DEADLINE = float(os.environ.get('GEM_PROFILE_DEADLINE', '8'))
+    # Overall time budget (seconds) for the holdings and report calls behind /portfolio/stats
+    PORTFOLIO_STATS_DEADLINE = float(os.environ.get('PORTFOLIO_STATS_DEADLINE', '10'))
+    # Concurrent holding-create calls when importing a GRA invoice
+    GRA_IMPORT_WORKERS = int(os.environ.get('GRA_IMPORT_WORKERS', '4'))
+    # Concurrent listing-detail lookups when reading the items of a GRA invoice PDF
+    GRA_ENRICH_WORKERS = int(os.environ.get('GRA_ENRICH_WORKERS', '8'))
+    # Background job workers (GRA PDF parsing) and how long finished jobs are kept
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+    JOB_RETENTION_SECONDS = float(os.environ.get('JOB_RETENTION_SECONDS', '86400'))
+    # Where uploaded PDFs are spooled until parsed (empty: <tmp>/gems-uploads), and the
+    # number of processes extracting pages of long PDFs (0: up to 4, one per CPU)
+    UPLOAD_SPOOL_DIR = os.environ.get('UPLOAD_SPOOL_DIR', '')
+    PDF_EXTRACT_WORKERS = int(os.environ.get('PDF_EXTRACT_WORKERS', '0'))
+    # Parse traces for uploaded PDFs: 'off', 'request' (uploads sent with trace=1) or 'all',
+    # written as one JSON-lines file per job or request to PDF_TRACE_DIR (empty: logs/pdf_traces)
+    PDF_TRACE = os.environ.get('PDF_TRACE', 'off')
+    PDF_TRACE_DIR = os.environ.get('PDF_TRACE_DIR', '')
+    # Rendered-page cache for anonymous visitors: total body size bound (0 disables),
+    # seconds an entry is reused, and the max-age sent to browsers/CDNs
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', '300'))
+    RESPONSE_CACHE_MAX_AGE = int(os.environ.get('RESPONSE_CACHE_MAX_AGE', '60'))
+    # Seconds a signed-in user's holdings and portfolio reports are reused; writes made
+    # through this app invalidate them immediately
+    HOLDINGS_CACHE_TTL = float(os.environ.get('HOLDINGS_CACHE_TTL', '60'))
+    # Local SQLite (gems_portfolio.db): milliseconds a connection waits for a lock, and
+    # prepared statements cached per pooled connection
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    SQLITE_CACHED_STATEMENTS = int(os.environ.get('SQLITE_CACHED_STATEMENTS', '128'))
+    # Seconds between checks for gem_attributes changes made by other workers/processes
+    GEM_ATTRIBUTES_RECHECK_SECONDS = float(os.environ.get('GEM_ATTRIBUTES_RECHECK_SECONDS', '5'))
+    # Investment rankings are recomputed in the background when the catalog changes and
+    # also every this many seconds (0 disables the timer)
+    RANKINGS_REFRESH_SECONDS = float(os.environ.get('RANKINGS_REFRESH_SECONDS', '3600'))
+    # Compressed on-disk copy of the catalog and related metadata, loaded at boot and served
+    # (with a staleness notice) while the API is unreachable. Empty disables it.
+    # The <tmp> default only survives worker restarts on a running instance: a new
+    # scale-from-zero instance starts with an empty /tmp, so to speed up cold starts set
+    # this to a persistent or mounted path, or to a snapshot shipped in the image.
+    CATALOG_SNAPSHOT_PATH = os.environ.get('CATALOG_SNAPSHOT_PATH', os.path.join(tempfile.gettempdir(), 'gems-catalog-snapshot.json.gz'))
 
     # If no API key in env var, attempt to load from a `config.json` file in the gems package
     # (matching how gemhunter stores keys in gemhunter/config.json as `gemdb_api_token`).
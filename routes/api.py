@@ -2,8 +2,9 @@ from flask import Blueprint, request, jsonify, current_app
 import os
 import json
 import re
-import requests
-from utils.api_client import load_api_key, get_gems_from_api
+from utils.api_client import load_api_key, get_gems_from_api, get_session, get_catalog_version
+from utils.catalog_index import get_catalog_index
+from utils.scoring import COMPONENTS, get_score_matrix, normalize_weights
 
 bp = Blueprint('api', __name__, url_prefix='/api/v1')
 
@@ -52,7 +53,7 @@ def listings_view():
         headers = {}
         if token:
             headers['X-API-Key'] = token
-        r = requests.get(url, params=params, headers=headers, timeout=8)
+        r = get_session().get(url, params=params, headers=headers)
         if r.status_code == 200:
             try:
                 payload = r.json()
@@ -215,3 +216,51 @@ def gems_list():
     except Exception as e:
         current_app.logger.error(f"Error fetching gems list: {e}")
         return jsonify([]), 500
+
+
+@bp.route('/rankings/what-if', methods=['GET', 'POST'])
+def rankings_what_if():
+    """Rank all gems for a custom weight vector (analyst what-if tool).
+
+    Weights come from a JSON body ``{"weights": [...] | {...}, "limit": n}`` or from
+    query params: ``weights=0.4,0.2,0.2,0.1,0.1`` (COMPONENTS order) or one param
+    per component, e.g. ``?geological_rarity=2&price=1``. Weights are normalized to
+    sum to 1; omitted components weigh 0. Without weights the default 25/25/25/12.5/12.5
+    weighting is used.
+
+    Returns JSON: { weights: {...}, catalog_version, count, gems: [{rank, name, composite, tier, components}] }
+    """
+    payload = request.get_json(silent=True) if request.method == 'POST' else None
+    payload = payload if isinstance(payload, dict) else {}
+    weights = payload.get('weights')
+    limit = payload.get('limit', request.args.get('limit'))
+    if weights is None:
+        if request.args.get('weights'):
+            weights = request.args.get('weights').split(',')
+        elif any(c in request.args for c in COMPONENTS):
+            weights = {c: request.args.get(c) for c in COMPONENTS if c in request.args}
+    try:
+        limit = int(limit) if limit not in (None, '') else None
+        if limit is not None and limit < 1:
+            raise ValueError('limit must be positive')
+        normalize_weights(weights)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e), 'components': list(COMPONENTS)}), 400
+
+    try:
+        index = get_catalog_index(get_gems_from_api() or [])
+        if not index:
+            return jsonify({'error': 'Gem catalog is temporarily unavailable'}), 503
+        used, ranked = get_score_matrix(index).ranked(weights)
+    except Exception as e:
+        current_app.logger.error(f"Error computing what-if rankings: {e}")
+        return jsonify({'error': 'Error computing rankings'}), 500
+
+    rows = ranked[:limit] if limit else ranked
+    return jsonify({
+        'weights': dict(zip(COMPONENTS, used)),
+        'catalog_version': get_catalog_version(),
+        'count': len(ranked),
+        'gems': [{'rank': i, 'name': s.name, 'composite': s.composite, 'tier': s.tier, 'components': s.components}
+                 for i, s in enumerate(rows, 1)],
+    })
@@ -1,7 +1,7 @@
 from flask import Blueprint, render_template, redirect, url_for, request, current_app, flash, session
 import os
-import sqlite3
 from datetime import datetime
+from utils import db
 from utils.db_logger import log_db_exception
 import secrets
 
@@ -20,13 +20,9 @@ try:
 except Exception:
     FLASK_LOGIN_AVAILABLE = False
 
-DB_PATH = os.path.join(os.getcwd(), 'gems_portfolio.db')
-
-def get_db():
+def get_db(readonly=False):
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return db.get_read_db() if readonly else db.get_db()
     except Exception as e:
         log_db_exception(e, 'auth.get_db: connecting to DB')
         raise
@@ -80,7 +76,7 @@ def on_register(state):
 
 def load_user_by_id(uid):
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cur = conn.cursor()
         cur.execute('SELECT * FROM table_users WHERE id = ?', (int(uid),))
         row = cur.fetchone()
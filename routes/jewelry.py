@@ -4,9 +4,11 @@ Jewelry routes for Gems Hub
 
 from flask import Blueprint, render_template, abort
 from utils.api_client import get_jewelry_service_types, get_jewelry_service_firms
+from utils.response_cache import init_response_cache
 import logging
 
 bp = Blueprint('jewelry', __name__, url_prefix='/jewelry')
+init_response_cache(bp)
 
 logger = logging.getLogger(__name__)
 
@@ -3,7 +3,13 @@ Main routes for Gems Hub
 """
 
 from flask import Blueprint, render_template
-from utils.api_client import get_api_health, get_api_key_info, load_api_key
+from utils.api_client import get_api_health, get_api_key_info, load_api_key, get_cache_stats, get_breaker_stats
+from utils.response_cache import get_response_cache_stats
+from utils.catalog_snapshot import get_snapshot_status
+from utils.gem_attributes import get_gem_attributes_stats
+from utils.holdings_cache import get_holdings_cache_stats
+from utils.jobs import get_job_stats
+from utils.rankings import get_rankings_job_stats
 from datetime import datetime
 
 bp = Blueprint('main', __name__)
@@ -36,6 +42,46 @@ def health():
         token = None
         key_source = None
 
+    try:
+        cache_stats = get_cache_stats()
+    except Exception:
+        cache_stats = []
+
+    try:
+        breaker_stats = get_breaker_stats()
+    except Exception:
+        breaker_stats = []
+
+    try:
+        page_cache_stats = get_response_cache_stats()
+    except Exception:
+        page_cache_stats = None
+
+    try:
+        holdings_cache_stats = get_holdings_cache_stats()
+    except Exception:
+        holdings_cache_stats = None
+
+    try:
+        job_stats = get_job_stats()
+    except Exception:
+        job_stats = None
+
+    try:
+        snapshot_status = get_snapshot_status()
+    except Exception:
+        snapshot_status = None
+
+    try:
+        gem_attributes_stats = get_gem_attributes_stats()
+    except Exception:
+        gem_attributes_stats = []
+
+    try:
+        rankings_job = get_rankings_job_stats()
+    except Exception:
+        rankings_job = None
+
     key_ok = False
     key_len = 0
     if token and isinstance(token, str):
@@ -50,6 +96,14 @@ def health():
     'api_key_present_long_enough': key_ok,
     'api_key_len': key_len,
     'api_key_source': key_source,
+        'cache_stats': cache_stats,
+        'breaker_stats': breaker_stats,
+        'page_cache_stats': page_cache_stats,
+        'holdings_cache_stats': holdings_cache_stats,
+        'job_stats': job_stats,
+        'snapshot_status': snapshot_status,
+        'gem_attributes_stats': gem_attributes_stats,
+        'rankings_job': rankings_job,
         'checked_at': datetime.utcnow().isoformat() + 'Z'
     }
     return render_template('health.html', **page_data)
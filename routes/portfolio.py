@@ -4,11 +4,24 @@ Uses Azure SQL via gemdb API for data storage.
 """
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
-import requests
+import hashlib
 import logging
 import re
-from utils.api_client import load_api_key
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from utils.api_client import get_gems_from_api, load_api_key, get_session
+from utils.catalog_index import get_catalog_index
+from utils.concurrency import fan_out
 from utils.db_logger import log_db_exception
+from utils.gem_matcher import GemMatcher, get_gem_matcher
+from utils.gra_invoice import InvoiceParser
+from utils.holdings_cache import get_holdings_snapshot, get_user_resource, invalidate_user
+from utils.jobs import JobError, get_job, register_job_handler, submit_job
+from utils.parse_trace import ParseTrace, start_trace, tracing_enabled
+from utils.pdf_text import discard, iter_page_texts, spool_upload
 
 bp = Blueprint('portfolio', __name__, url_prefix='/portfolio')
 
@@ -103,101 +116,74 @@ def get_api_headers():
     return headers
 
 
-def api_get_holdings(google_user_id):
-    """Get gem holdings for a user from API"""
+def _get_user_json(google_user_id, path, what, params=None):
+    """GET a per-user portfolio endpoint; return the parsed JSON, or None on any failure."""
     try:
-        token = load_api_key()
-        if not token:
-            logger.error("api_get_holdings: No API key configured. Cannot call holdings API.")
-            return []
-
-        url = f"{get_api_base()}/api/v2/users/{google_user_id}/gem-holdings"
-        headers = get_api_headers()
-        logger.info(f"api_get_holdings: calling {url}")
-        r = requests.get(url, headers=headers, timeout=10)
-        logger.info(f"api_get_holdings: status={r.status_code}, response={r.text[:500] if r.text else 'empty'}")
+        url = f"{get_api_base()}/api/v2/users/{google_user_id}/{path}"
+        r = get_session().get(url, headers=get_api_headers(), params=params)
         if r.status_code == 200:
             return r.json()
-        logger.warning(f"Holdings API returned {r.status_code}: {r.text}")
-        return []
+        logger.warning(f"{what} API returned {r.status_code}: {r.text}")
     except Exception as e:
-        logger.error(f"Error calling holdings API: {e}")
+        logger.error(f"Error calling {what} API: {e}")
+    return None
+
+
+def api_get_holdings(google_user_id):
+    """Get gem holdings for a user from API (cached per user, see utils.holdings_cache)"""
+    token = load_api_key()
+    if not token:
+        logger.error("api_get_holdings: No API key configured. Cannot call holdings API.")
         return []
+    snapshot = get_holdings_snapshot(google_user_id)
+    return list(snapshot.holdings) if snapshot else []
 
 
 def api_get_holdings_by_form(google_user_id):
     """Get gem holdings grouped by form from API"""
-    try:
-        token = load_api_key()
-        if not token:
-            logger.error("api_get_holdings_by_form: No API key configured.")
-            return []
-
-        url = f"{get_api_base()}/api/v2/users/{google_user_id}/portfolio/report/by-form"
-        headers = get_api_headers()
-        r = requests.get(url, headers=headers, timeout=10)
-        if r.status_code == 200:
-            return r.json()
-        logger.warning(f"Holdings by form API returned {r.status_code}: {r.text}")
-        return []
-    except Exception as e:
-        logger.error(f"Error calling holdings by form API: {e}")
+    if not load_api_key():
+        logger.error("api_get_holdings_by_form: No API key configured.")
         return []
+    result = get_user_resource(google_user_id, ('report', 'by-form'), lambda: _get_user_json(
+        google_user_id, 'portfolio/report/by-form', 'Holdings by form'))
+    return result if result is not None else []
 
 
 def api_get_holdings_by_gem_type(google_user_id):
     """Get gem holdings grouped by gem type from API"""
-    try:
-        token = load_api_key()
-        if not token:
-            logger.error("api_get_holdings_by_gem_type: No API key configured.")
-            return []
-
-        url = f"{get_api_base()}/api/v2/users/{google_user_id}/portfolio/report/by-gem-type"
-        headers = get_api_headers()
-        r = requests.get(url, headers=headers, timeout=10)
-        if r.status_code == 200:
-            return r.json()
-        logger.warning(f"Holdings by gem type API returned {r.status_code}: {r.text}")
-        return []
-    except Exception as e:
-        logger.error(f"Error calling holdings by gem type API: {e}")
+    if not load_api_key():
+        logger.error("api_get_holdings_by_gem_type: No API key configured.")
         return []
+    result = get_user_resource(google_user_id, ('report', 'by-gem-type'), lambda: _get_user_json(
+        google_user_id, 'portfolio/report/by-gem-type', 'Holdings by gem type'))
+    return result if result is not None else []
 
 
 def api_search_portfolio(google_user_id, gem_type_id=None, gem_form=None, seller_nick_name=None, sort_by_mode='PurchaseDate'):
     """Search and filter user's portfolio holdings from API"""
-    try:
-        token = load_api_key()
-        if not token:
-            logger.error("api_search_portfolio: No API key configured.")
-            return []
-
-        url = f"{get_api_base()}/api/v2/users/{google_user_id}/portfolio/search"
-        headers = get_api_headers()
-        params = {'sort_by_mode': sort_by_mode}
-        if gem_type_id:
-            params['gem_type_id'] = gem_type_id
-        if gem_form:
-            params['gem_form'] = gem_form
-        if seller_nick_name:
-            params['seller_nick_name'] = seller_nick_name
-
-        r = requests.get(url, headers=headers, params=params, timeout=10)
-        if r.status_code == 200:
-            return r.json()
-        logger.warning(f"Search portfolio API returned {r.status_code}: {r.text}")
-        return []
-    except Exception as e:
-        logger.error(f"Error calling search portfolio API: {e}")
+    if not load_api_key():
+        logger.error("api_search_portfolio: No API key configured.")
         return []
 
+    params = {'sort_by_mode': sort_by_mode}
+    if gem_type_id:
+        params['gem_type_id'] = gem_type_id
+    if gem_form:
+        params['gem_form'] = gem_form
+    if seller_nick_name:
+        params['seller_nick_name'] = seller_nick_name
+
+    key = ('search',) + tuple(sorted(params.items()))
+    result = get_user_resource(google_user_id, key, lambda: _get_user_json(
+        google_user_id, 'portfolio/search', 'Search portfolio', params))
+    return result if result is not None else []
+
 
 def api_get_holding(asset_id):
     """Get a specific gem holding from API"""
     try:
         url = f"{get_api_base()}/api/v2/gem-holdings/{asset_id}"
-        r = requests.get(url, headers=get_api_headers(), timeout=10)
+        r = get_session().get(url, headers=get_api_headers())
         if r.status_code == 200:
             return r.json()
         return None
@@ -206,15 +192,19 @@ def api_get_holding(asset_id):
         return None
 
 
-def api_create_holding(google_user_id, data):
+def api_create_holding(google_user_id, data, idempotency_key=None):
     """Create a new gem holding via API"""
     try:
         url = f"{get_api_base()}/api/v2/gem-holdings"
         params = {'google_user_id': google_user_id, **data}
+        headers = get_api_headers()
+        if idempotency_key:
+            headers['Idempotency-Key'] = idempotency_key
         logger.info(f"Creating holding with params: {params}")
-        r = requests.post(url, headers=get_api_headers(), params=params, timeout=10)
+        r = get_session().post(url, headers=headers, params=params)
         logger.info(f"Create holding API response: {r.status_code} - {r.text[:500]}")
         if r.status_code == 200:
+            invalidate_user(google_user_id)
             return r.json()
         error_msg = f"API returned {r.status_code}: {r.text}"
         logger.warning(f"Create holding API error: {error_msg}")
@@ -224,12 +214,121 @@ def api_create_holding(google_user_id, data):
         raise
 
 
-def api_update_holding(asset_id, data):
+# Idempotency keys of bulk-import rows that are being created or were created in the
+# last IMPORT_KEY_TTL seconds, so a double-submitted invoice form does not create the
+# same holding twice
+_import_keys = OrderedDict()
+_import_keys_lock = threading.Lock()
+IMPORT_KEYS_MAX = 4096
+IMPORT_KEY_TTL = 600
+
+
+def holding_idempotency_key(google_user_id, data, row_number=None):
+    """Stable key for one imported invoice row.
+
+    Rows with a product number are identified by (user, invoice, product number);
+    other rows by their position, gem type, weight and price.
+    """
+    if data.get('product_number'):
+        parts = (google_user_id, data.get('invoice_number'), data['product_number'])
+    else:
+        parts = (google_user_id, data.get('invoice_number'), row_number,
+                 data.get('gem_type_id'), data.get('weight_carats'), data.get('purchase_cost'))
+    basis = '|'.join('' if p is None else str(p) for p in parts)
+    return hashlib.sha256(basis.encode('utf-8')).hexdigest()[:32]
+
+
+def _existing_product_keys(google_user_id):
+    """(invoice number, product number) pairs already in the user's portfolio."""
+    snapshot = get_holdings_snapshot(google_user_id)
+    if snapshot is None:
+        return set()
+    return {
+        (str(h.get('InvoiceNumber') or ''), str(h['ProductNumber']))
+        for h in snapshot.holdings
+        if isinstance(h, dict) and h.get('ProductNumber')
+    }
+
+
+def _claim_import_key(key):
+    now = time.monotonic()
+    with _import_keys_lock:
+        claimed_at = _import_keys.get(key)
+        if claimed_at is not None and now - claimed_at < IMPORT_KEY_TTL:
+            return False
+        _import_keys[key] = now
+        _import_keys.move_to_end(key)
+        while len(_import_keys) > IMPORT_KEYS_MAX:
+            _import_keys.popitem(last=False)
+        return True
+
+
+def _release_import_key(key):
+    with _import_keys_lock:
+        _import_keys.pop(key, None)
+
+
+def api_create_holdings_bulk(google_user_id, rows, max_workers=None):
+    """Create several holdings with a bounded number of concurrent API calls.
+
+    Args:
+        google_user_id: owner of the new holdings
+        rows: list of (row_number, data) pairs, data as for api_create_holding
+        max_workers: concurrent create calls (default GRA_IMPORT_WORKERS)
+
+    Returns:
+        one result dict per row, in row order: {'row', 'status', 'asset_id', 'error'}
+        with status 'created', 'skipped' (already in the portfolio, or submitted twice)
+        or 'failed'. Failed rows can be retried by submitting the invoice again.
+    """
+    results = {}
+    existing = _existing_product_keys(google_user_id)
+    pending = []
+    for row_number, data in rows:
+        product = data.get('product_number')
+        if product and (str(data.get('invoice_number') or ''), str(product)) in existing:
+            results[row_number] = {'row': row_number, 'status': 'skipped', 'asset_id': None,
+                                   'error': f"Product {product} is already in your portfolio"}
+            continue
+        key = holding_idempotency_key(google_user_id, data, row_number)
+        if not _claim_import_key(key):
+            results[row_number] = {'row': row_number, 'status': 'skipped', 'asset_id': None,
+                                   'error': 'Already submitted'}
+            continue
+        pending.append((row_number, data, key))
+
+    if pending:
+        app = current_app._get_current_object()
+        workers = max_workers or int(current_app.config.get('GRA_IMPORT_WORKERS', 4) or 4)
+
+        def create(row_number, data, key):
+            with app.app_context():
+                try:
+                    created = api_create_holding(google_user_id, data, idempotency_key=key)
+                except Exception as e:
+                    _release_import_key(key)
+                    return {'row': row_number, 'status': 'failed', 'asset_id': None, 'error': str(e)}
+                asset_id = created.get('AssetId') if isinstance(created, dict) else None
+                return {'row': row_number, 'status': 'created', 'asset_id': asset_id, 'error': None}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending))),
+                                thread_name_prefix='holdings-import') as executor:
+            futures = [executor.submit(create, *item) for item in pending]
+            for future in futures:
+                result = future.result()
+                results[result['row']] = result
+        invalidate_user(google_user_id)
+
+    return [results[row_number] for row_number in sorted(results)]
+
+
+def api_update_holding(asset_id, data, google_user_id=None):
     """Update an existing gem holding via API"""
     try:
         url = f"{get_api_base()}/api/v2/gem-holdings/{asset_id}"
-        r = requests.put(url, headers=get_api_headers(), params=data, timeout=10)
+        r = get_session().put(url, headers=get_api_headers(), params=data)
         if r.status_code == 200:
+            invalidate_user(google_user_id)
             return r.json()
         logger.warning(f"Update holding API returned {r.status_code}: {r.text}")
         return None
@@ -245,8 +344,11 @@ def api_delete_holding(asset_id, google_user_id=None):
         params = {}
         if google_user_id:
             params['google_user_id'] = google_user_id
-        r = requests.delete(url, headers=get_api_headers(), params=params, timeout=10)
-        return r.status_code == 200
+        r = get_session().delete(url, headers=get_api_headers(), params=params)
+        if r.status_code == 200:
+            invalidate_user(google_user_id)
+            return True
+        return False
     except Exception as e:
         logger.error(f"Error deleting holding {asset_id}: {e}")
         return False
@@ -256,7 +358,7 @@ def api_get_gem_types():
     """Get all gem types for dropdown selection, sorted alphabetically"""
     try:
         url = f"{get_api_base()}/api/v2/gems"
-        r = requests.get(url, headers=get_api_headers(), params={'limit': 500}, timeout=10)
+        r = get_session().get(url, headers=get_api_headers(), params={'limit': 500})
         if r.status_code == 200:
             gem_types = r.json()
             # Sort alphabetically by GemTypeName
@@ -401,7 +503,7 @@ def edit_gem(asset_id):
             # Remove None values
             data = {k: v for k, v in data.items() if v is not None}
 
-            result = api_update_holding(asset_id, data)
+            result = api_update_holding(asset_id, data, user.google_id)
             if result:
                 flash('Portfolio item updated!', 'success')
                 return redirect(url_for('portfolio.index'))
@@ -495,7 +597,7 @@ def add_gra_invoice():
             shipping_per_holding = round(header_shipping / valid_gem_count, 2) if valid_gem_count > 0 and header_shipping > 0 else None
             tariffs_per_holding = round(header_tariffs / valid_gem_count, 2) if valid_gem_count > 0 and header_tariffs > 0 else None
 
-            created_count = 0
+            rows = []
             errors = []
 
             for i, gem_type_id in enumerate(gem_type_ids):
@@ -527,15 +629,19 @@ def add_gra_invoice():
                     }
                     # Remove None values
                     data = {k: v for k, v in data.items() if v is not None}
-
-                    result = api_create_holding(user.google_id, data)
-                    if result:
-                        created_count += 1
+                    rows.append((i + 1, data))
                 except Exception as e:
                     errors.append(f"Row {i+1}: {str(e)}")
 
+            results = api_create_holdings_bulk(user.google_id, rows)
+            created_count = sum(1 for r in results if r['status'] == 'created')
+            skipped_count = sum(1 for r in results if r['status'] == 'skipped')
+            errors.extend(f"Row {r['row']}: {r['error']}" for r in results if r['status'] == 'failed')
+
             if created_count > 0:
                 flash(f'Successfully added {created_count} gem(s) to your portfolio!', 'success')
+            if skipped_count > 0:
+                flash(f'Skipped {skipped_count} gem(s) that were already added from this invoice', 'warning')
             if errors:
                 for err in errors:
                     flash(err, 'error')
@@ -567,7 +673,7 @@ def api_get_listing_details(listing_id):
         headers = {'X-API-Key': token} if token else {}
 
         url = f"{base_url.rstrip('/')}/api/v2/listings/{listing_id}"
-        response = requests.get(url, headers=headers, timeout=10)
+        response = get_session().get(url, headers=headers)
 
         if response.status_code == 200:
             return response.json()
@@ -579,38 +685,176 @@ def api_get_listing_details(listing_id):
         return None
 
 
-def api_derive_gem_type_from_title(title):
+def api_derive_gem_type_from_title(title, matcher=None):
     """
-    Derive gem type ID from title by calling the PUT listings endpoint.
-    The API has DeriveGemTypeIdFromTitle built-in and returns gem_type_id.
-    Since there's no dedicated endpoint, we use the local gem_type_map as fallback.
+    Derive gem type ID and name from a listing title.
+    The longest gem type name (or alias) found as whole words in the title wins, see
+    utils.gem_matcher. Pass `matcher` (e.g. from _gem_type_lookup) to reuse one;
+    otherwise the matcher for the cached gem catalog is used.
     """
     if not title:
         return None, None
 
-    # Get gem types from API for local matching (as fallback)
+    if matcher is None:
+        matcher = _gem_type_lookup()[1]
+    match = matcher.match(title)
+    if match:
+        return match.gem_type_id, match.name
+
+    return None, None
+
+
+def _gem_type_lookup():
+    """Return (GemTypeId -> name, GemMatcher) for classifying listings.
+
+    Uses the cached gem catalog, whose matcher is built once per catalog version, so
+    this costs no upstream call when the catalog is warm; falls back to a single
+    api_get_gem_types() call when it is unavailable.
+    """
+    catalog = get_gems_from_api()
+    if catalog:
+        names = {gid: rec.get('GemTypeName', '') for gid, rec in get_catalog_index(catalog).by_id.items()}
+        return names, get_gem_matcher(catalog)
     gem_types = api_get_gem_types()
-    title_lower = title.lower()
+    return {gt.get('GemTypeId'): gt.get('GemTypeName', '') for gt in gem_types}, GemMatcher(gem_types)
 
-    # Sort by name length descending to match more specific types first
-    sorted_gems = sorted(gem_types, key=lambda x: len(x.get('GemTypeName', '')), reverse=True)
 
-    for gt in sorted_gems:
-        name = gt.get('GemTypeName', '')
-        if name.lower() in title_lower:
-            return gt.get('GemTypeId'), name
+def api_get_listing_details_bulk(product_ids, max_workers=None):
+    """Fetch listing details for several product IDs with a bounded number of concurrent calls.
 
-    return None, None
+    Returns a dict of product ID -> details (None where the lookup failed); each ID is
+    fetched once however often it appears.
+    """
+    product_ids = list(dict.fromkeys(product_ids))
+    if not product_ids:
+        return {}
+    app = current_app._get_current_object()
+    workers = max_workers or int(current_app.config.get('GRA_ENRICH_WORKERS', 8) or 8)
 
+    def fetch(product_id):
+        with app.app_context():
+            return api_get_listing_details(product_id)
 
-@bp.route('/parse-gra-pdf', methods=['POST'])
-def parse_gra_pdf():
-    """Parse a GRA invoice PDF and return extracted data as JSON"""
-    from flask import jsonify
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(product_ids))),
+                            thread_name_prefix='listing-lookup') as executor:
+        return dict(zip(product_ids, executor.map(fetch, product_ids)))
 
-    user = load_current_user()
-    if not user:
-        return jsonify({'error': 'Not authenticated'}), 401
+
+def _enrich_gra_item(item, listing_details, gem_types, trace):
+    """Complete an item parsed from a GRA invoice with listing details and a gem type.
+
+    `gem_types` is the (id -> name, GemMatcher) pair from _gem_type_lookup().
+    """
+    gem_type_names, gem_matcher = gem_types
+    product_id = item['product_id']
+    item_data = {
+        'product_id': product_id,
+        'sku': item['sku'],
+        'gem_type_id': None,
+        'gem_type_name': '',
+        'carat': item['carat'],
+        'price': item['price'],
+        'discount': item['discount'],
+        'original_price': item['original_price'],
+        'title': item['title'],
+        'holding_name': '',
+        'description': '',
+        'clarity': None,
+        'treatment': None,
+        'gem_form': None,
+        'original_url': f"https://www.gemrockauctions.com/auctions/{product_id}"
+    }
+
+    if trace:
+        trace('listing', product_id=product_id, details=listing_details)
+
+    if listing_details:
+        # Use API data for fields not available in PDF
+        # Only use API title if PDF parsing didn't find one
+        if not item_data['title']:
+            item_data['title'] = listing_details.get('ListingTitle') or listing_details.get('listing_title') or ''
+            if trace:
+                trace('listing_title', product_id=product_id, title=item_data['title'])
+
+        # Use API weight if PDF parsing didn't find carat
+        if not item_data['carat']:
+            item_data['carat'] = listing_details.get('Weight') or listing_details.get('weight')
+
+        # These fields are only available from API
+        item_data['clarity'] = listing_details.get('Clarity') or listing_details.get('clarity')
+        item_data['treatment'] = listing_details.get('Treatment') or listing_details.get('treatment')
+        # gem_form is the Type field (Faceted, Cabochon, Rough, etc.) - NOT Shape (Oval, Pear, etc.)
+        api_gem_form = listing_details.get('Type') or listing_details.get('type')
+        if api_gem_form:
+            item_data['gem_form'] = api_gem_form
+        # Don't set gem_form if API doesn't have it - let frontend keep default "Faceted"
+        item_data['gem_type_id'] = listing_details.get('GemTypeId') or listing_details.get('gem_type_id')
+
+        # Get SKU from API if not in PDF
+        if not item_data['sku']:
+            item_data['sku'] = listing_details.get('Sku') or listing_details.get('sku')
+
+        # Derive gem type name if we have gem_type_id
+        if item_data['gem_type_id']:
+            item_data['gem_type_name'] = gem_type_names.get(item_data['gem_type_id'], '')
+
+    # If we still don't have gem_type_id, derive it from title
+    if not item_data['gem_type_id'] and item_data['title']:
+        gem_type_id, gem_type_name = api_derive_gem_type_from_title(item_data['title'], gem_matcher)
+        item_data['gem_type_id'] = gem_type_id
+        item_data['gem_type_name'] = gem_type_name or ''
+
+    item_data['description'] = item_data['title']
+    # Create short holding name from title (removes weight and filler words)
+    item_data['holding_name'] = create_holding_name(item_data['title']) or item_data['title']
+
+    if trace:
+        trace('item', product_id=product_id, title=item_data['title'], holding_name=item_data['holding_name'],
+              gem_type_id=item_data['gem_type_id'], carat=item_data['carat'], price=item_data['price'])
+    return item_data
+
+
+def _noop_progress(fraction, message=None):
+    pass
+
+
+def parse_gra_invoice_pdf(pdf_path, progress=_noop_progress, trace=None):
+    """Parse a GRA invoice PDF file into the header/items dict used by the invoice form.
+
+    Pages are extracted as a stream (in parallel worker processes for long invoices)
+    and fed to the invoice grammar (utils.gra_invoice). Once every item has been read,
+    their listing details are fetched together (GRA_ENRICH_WORKERS calls at a time)
+    and gem type names come from the cached catalog, so an invoice costs one upstream
+    call per distinct product rather than two or three per item.
+    `progress(fraction, message)` is called per page and while items are completed,
+    and `trace` (a utils.parse_trace.ParseTrace, or None) records parse events.
+    Raises ImportError when pdfplumber is not installed.
+    """
+    parsed = []
+    parser = InvoiceParser(trace=trace)
+    for page_no, page_count, page_text in iter_page_texts(pdf_path):
+        if trace:
+            trace('page', page=page_no, pages=page_count, text=page_text)
+        progress(0.5 * page_no / page_count, f"Reading page {page_no} of {page_count}")
+        parsed += parser.feed(page_text + "\n")
+    parsed += parser.close()
+
+    items = []
+    if parsed:
+        progress(0.5, f"Looking up {len(parsed)} product(s)")
+        details = api_get_listing_details_bulk([item['product_id'] for item in parsed])
+        gem_types = _gem_type_lookup()
+        for item in parsed:
+            items.append(_enrich_gra_item(item, details.get(item['product_id']), gem_types, trace))
+            progress(min(0.99, 0.5 + 0.5 * len(items) / len(parsed)),
+                     f"Completed product {len(items)} of {len(parsed)}")
+
+    return dict(parser.header, items=items)
+
+
+def _pdf_upload_error():
+    """Validate the uploaded `pdf_file`; returns an error response tuple or None."""
+    from flask import jsonify
 
     if 'pdf_file' not in request.files:
         return jsonify({'error': 'No PDF file provided'}), 400
@@ -621,351 +865,161 @@ def parse_gra_pdf():
 
     if not pdf_file.filename.lower().endswith('.pdf'):
         return jsonify({'error': 'File must be a PDF'}), 400
+    return None
 
-    try:
-        import pdfplumber
-        import io
-
-        # Read PDF from uploaded file
-        pdf_bytes = pdf_file.read()
-        pdf_stream = io.BytesIO(pdf_bytes)
-
-        invoice_data = {
-            'invoice_number': None,
-            'order_date': None,
-            'seller_invoice_name': None,
-            'totals': {},
-            'shipping_info': {},
-            'items': []
-        }
-
-        # Debug logging to file
-        import os
-        log_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
-        os.makedirs(log_dir, exist_ok=True)
-        debug_log_path = os.path.join(log_dir, 'pdf_parse_debug.txt')
-
-        with pdfplumber.open(pdf_stream) as pdf:
-            full_text = ""
-            for page in pdf.pages:
-                page_text = page.extract_text() or ""
-                full_text += page_text + "\n"
-
-            # Clean null bytes and other problematic characters from PDF text
-            full_text = full_text.replace('\x00', '')  # Remove null bytes
-            full_text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', full_text)  # Remove other control chars
-
-            # Write debug info to file
-            with open(debug_log_path, 'w', encoding='utf-8') as debug_file:
-                debug_file.write("=== FULL TEXT ===\n")
-                debug_file.write(full_text)
-                debug_file.write("\n\n")
-
-            # Parse header information
-            invoice_match = re.search(r'Invoice #(\d+)', full_text)
-            # Date format: "Order date 11th Dec 2025" - need to handle ordinal suffixes
-            date_match = re.search(r'Order date\s+(\d{1,2})(?:st|nd|rd|th)?\s+(\w+)\s+(\d{4})', full_text)
-
-            if invoice_match:
-                invoice_data['invoice_number'] = invoice_match.group(1)
-            if date_match:
-                # Convert date to YYYY-MM-DD format
-                try:
-                    from datetime import datetime
-                    day = date_match.group(1)
-                    month = date_match.group(2)
-                    year = date_match.group(3)
-                    date_str = f"{day} {month} {year}"
-                    # Try parsing with full month name first, then abbreviated
-                    for fmt in ['%d %B %Y', '%d %b %Y']:
-                        try:
-                            parsed_date = datetime.strptime(date_str, fmt)
-                            invoice_data['order_date'] = parsed_date.strftime('%Y-%m-%d')
-                            break
-                        except ValueError:
-                            continue
-                except Exception as e:
-                    logger.warning(f"Could not parse date: {e}")
-
-            # Parse seller info from "SOLD BY" section
-            # Simple rule: extract text between "SOLD BY SOLD TO" and "Stanislav" (hardcoded for now)
-            seller_name_match = re.search(r'SOLD BY\s+SOLD TO\s*\n(.+?)\s*Stanislav', full_text, re.DOTALL)
-            if seller_name_match:
-                invoice_data['seller_invoice_name'] = seller_name_match.group(1).strip()
-
-            # Parse totals
-            totals_patterns = {
-                'subtotal': r'Subtotal\s+\$(\d+\.?\d*)\s+USD',
-                'shipping': r'Shipping\s+\$(\d+\.?\d*)\s+USD',
-                'insurance': r'Insurance\s+\$(\d+\.?\d*)\s+USD',
-                'taxes': r'Taxes\s+\$(\d+\.?\d*)\s+USD',
-                'total': r'\bTotal\s+\$(\d+\.?\d*)\s+USD'
-            }
 
-            for key, pattern in totals_patterns.items():
-                match = re.search(pattern, full_text, re.IGNORECASE)
-                if match:
-                    invoice_data['totals'][key] = float(match.group(1))
+def _trace_requested():
+    """Whether the upload asked for a parse trace (honoured when PDF_TRACE is 'request')."""
+    return (request.values.get('trace') or '').lower() in ('1', 'true', 'yes', 'on')
 
-            # Parse shipping and delivery information
-            shipping_patterns = {
-                'shipping_provider': r'Shipping Provider\s+(.+?)(?:\n|$)',
-                'tracking_number': r'Tracking Number\s+(.+?)(?:\n|$)'
-            }
 
-            for key, pattern in shipping_patterns.items():
-                match = re.search(pattern, full_text, re.IGNORECASE)
-                if match:
-                    invoice_data['shipping_info'][key] = match.group(1).strip()
-
-            # Parse items - GRA PDF format:
-            # Line 1: "0.07 Ct World Rarest Vayrynenite Top Quality Luster VR16"
-            # Line 2: "1 SKU: $13.00 USD" or "1 $13.00 USD" (SKU may be on next line)
-            # Line 3: "Product ID: 3029657"
-            # Sometimes SKU is on a separate line: "SKU:"
-            # We need to find Product ID and look BACKWARDS for the title
-
-            # Find all Product IDs first
-            product_id_matches = list(re.finditer(r'Product ID:\s*(\d+)', full_text))
-
-            for i, pid_match in enumerate(product_id_matches):
-                product_id = pid_match.group(1)
-
-                # Find the text between previous Product ID (or start) and this Product ID
-                start_pos = product_id_matches[i-1].end() if i > 0 else 0
-                end_pos = pid_match.start()
-                block = full_text[start_pos:end_pos]
-
-                # Debug: log each block
-                with open(debug_log_path, 'a', encoding='utf-8') as debug_file:
-                    debug_file.write(f"=== PRODUCT {product_id} BLOCK ===\n")
-                    debug_file.write(f"start_pos={start_pos}, end_pos={end_pos}\n")
-                    debug_file.write(block)
-                    debug_file.write("\n---\n")
-
-                # Extract price - look for "$X.XX USD" pattern (but not discount)
-                # First, find the main price (not in parentheses)
-                price_match = re.search(r'(?<!\()\$(\d+\.?\d*)\s+USD', block)
-                if not price_match:
-                    with open(debug_log_path, 'a', encoding='utf-8') as debug_file:
-                        debug_file.write(f"NO PRICE FOUND for {product_id}, skipping\n\n")
-                    continue
+@bp.route('/parse-gra-pdf', methods=['POST'])
+def parse_gra_pdf():
+    """Parse a GRA invoice PDF and return extracted data as JSON (in this request)"""
+    from flask import jsonify
+
+    user = load_current_user()
+    if not user:
+        return jsonify({'error': 'Not authenticated'}), 401
 
-                price = float(price_match.group(1))
-
-                # Extract discount if present - pattern: "(Discount : $X.XX USD)"
-                discount = 0.0
-                discount_match = re.search(r'\(Discount\s*:\s*\$(\d+\.?\d*)\s+USD\)', block, re.IGNORECASE)
-                if discount_match:
-                    discount = float(discount_match.group(1))
-                    with open(debug_log_path, 'a', encoding='utf-8') as debug_file:
-                        debug_file.write(f"DISCOUNT FOUND: ${discount}\n")
-
-                # Calculate final price after discount
-                final_price = price - discount
-
-                # Initialize item data
-                original_url = f"https://www.gemrockauctions.com/auctions/{product_id}"
-                item_data = {
-                    'product_id': product_id,
-                    'sku': None,
-                    'gem_type_id': None,
-                    'gem_type_name': '',
-                    'carat': None,
-                    'price': round(final_price, 2),
-                    'discount': discount if discount > 0 else None,
-                    'original_price': price if discount > 0 else None,
-                    'title': '',
-                    'holding_name': '',
-                    'description': '',
-                    'clarity': None,
-                    'treatment': None,
-                    'gem_form': None,
-                    'original_url': original_url
-                }
-
-                # Extract SKU - can be "SKU: ABC123" or just on its own line
-                sku_match = re.search(r'SKU:\s*([A-Z0-9-]+)', block, re.IGNORECASE)
-                if sku_match:
-                    item_data['sku'] = sku_match.group(1).strip()
-
-                # Extract title - simple approach: everything before SKU is the title
-                # The block is text between "Product ID: XXXXX" markers
-                # Title is everything from start of relevant content until SKU marker
-
-                raw_title = None
-
-                # Find everything before "SKU:" or "1 SKU:" and clean it up
-                # First, try to find content before SKU marker
-                sku_match = re.search(r'^(.*?)(?:\n1\s+SKU:|\nSKU:|\n1\nSKU:)', block, re.DOTALL)
-                if sku_match:
-                    raw_title = sku_match.group(1).strip()
-
-                    # Clean up: remove header noise (everything up to and including "Qty Products Price")
-                    header_end = re.search(r'Qty\s+Products\s+Price\s*\n', raw_title, re.IGNORECASE)
-                    if header_end:
-                        raw_title = raw_title[header_end.end():].strip()
-
-                    # Clean up: remove price lines like "$50.00 USD" or "1 $50.00 USD" at the end
-                    raw_title = re.sub(r'\n?\d*\s*\$[\d.]+\s+USD\s*$', '', raw_title).strip()
-
-                    # Clean up: remove trailing "1" (quantity line)
-                    raw_title = re.sub(r'\n1\s*$', '', raw_title).strip()
-
-                    # Clean up: remove SKU codes like "D0624/B11" at end of title
-                    raw_title = re.sub(r'\n[A-Z0-9/-]+\s*$', '', raw_title).strip()
-
-                    # Normalize whitespace (replace newlines with spaces)
-                    raw_title = re.sub(r'\s+', ' ', raw_title)
-
-                with open(debug_log_path, 'a', encoding='utf-8') as debug_file:
-                    debug_file.write(f"title extraction result: {raw_title}\n")
-
-                if raw_title:
-                    item_data['title'] = raw_title
-
-                    # Now extract weight from title - can be at start or end
-                    # Patterns: "3.80Ct.", "3.80 Ct", "8.80CT", "0.76 Cts", "14.63 CRT", "3.56 Crt"
-                    weight_match = re.search(r'(\d+\.?\d*)\s*(?:CRT|Crt|Cts?|CT)\.?', item_data['title'], re.IGNORECASE)
-                    if weight_match:
-                        item_data['carat'] = float(weight_match.group(1))
-
-                    with open(debug_log_path, 'a', encoding='utf-8') as debug_file:
-                        debug_file.write(f"TITLE FOUND: {item_data['title']}, carat={item_data['carat']}\n\n")
-                else:
-                    with open(debug_log_path, 'a', encoding='utf-8') as debug_file:
-                        debug_file.write(f"NO TITLE FOUND\n\n")
-
-                # Debug: Log title before API call
-                with open(debug_log_path, 'a', encoding='utf-8') as debug_file:
-                    debug_file.write(f"BEFORE API: title='{item_data['title']}'\n")
-
-                # Try to fetch listing details from the API to enrich with additional data
-                listing_details = api_get_listing_details(product_id)
-
-                with open(debug_log_path, 'a', encoding='utf-8') as debug_file:
-                    debug_file.write(f"API response: {listing_details}\n")
-
-                if listing_details:
-                    # Use API data for fields not available in PDF
-                    # Only use API title if PDF parsing didn't find one
-                    if not item_data['title']:
-                        item_data['title'] = listing_details.get('ListingTitle') or listing_details.get('listing_title') or ''
-                        with open(debug_log_path, 'a', encoding='utf-8') as debug_file:
-                            debug_file.write(f"Used API title: '{item_data['title']}'\n")
-
-                    # Use API weight if PDF parsing didn't find carat
-                    if not item_data['carat']:
-                        item_data['carat'] = listing_details.get('Weight') or listing_details.get('weight')
-
-                    # These fields are only available from API
-                    item_data['clarity'] = listing_details.get('Clarity') or listing_details.get('clarity')
-                    item_data['treatment'] = listing_details.get('Treatment') or listing_details.get('treatment')
-                    # gem_form is the Type field (Faceted, Cabochon, Rough, etc.) - NOT Shape (Oval, Pear, etc.)
-                    api_gem_form = listing_details.get('Type') or listing_details.get('type')
-                    if api_gem_form:
-                        item_data['gem_form'] = api_gem_form
-                    # Don't set gem_form if API doesn't have it - let frontend keep default "Faceted"
-                    item_data['gem_type_id'] = listing_details.get('GemTypeId') or listing_details.get('gem_type_id')
-
-                    # Get SKU from API if not in PDF
-                    if not item_data['sku']:
-                        item_data['sku'] = listing_details.get('Sku') or listing_details.get('sku')
-
-                    # Derive gem type name if we have gem_type_id
-                    if item_data['gem_type_id']:
-                        gem_types = api_get_gem_types()
-                        for gt in gem_types:
-                            if gt.get('GemTypeId') == item_data['gem_type_id']:
-                                item_data['gem_type_name'] = gt.get('GemTypeName', '')
-                                break
-
-                # If we still don't have gem_type_id, derive it from title
-                if not item_data['gem_type_id'] and item_data['title']:
-                    gem_type_id, gem_type_name = api_derive_gem_type_from_title(item_data['title'])
-                    item_data['gem_type_id'] = gem_type_id
-                    item_data['gem_type_name'] = gem_type_name or ''
-
-                item_data['description'] = item_data['title']
-                # Create short holding name from title (removes weight and filler words)
-                item_data['holding_name'] = create_holding_name(item_data['title']) or item_data['title']
-
-                # Debug: Log final item data
-                with open(debug_log_path, 'a', encoding='utf-8') as debug_file:
-                    debug_file.write(f"FINAL item_data: title='{item_data['title']}', holding_name='{item_data['holding_name']}'\n\n")
-
-                invoice_data['items'].append(item_data)
-
-        return jsonify(invoice_data)
+    error = _pdf_upload_error()
+    if error:
+        return error
 
+    pdf_path = None
+    trace = start_trace(f"request-{uuid.uuid4().hex}", requested=_trace_requested())
+    try:
+        pdf_path = spool_upload(request.files['pdf_file'])
+        return jsonify(parse_gra_invoice_pdf(pdf_path, trace=trace))
     except ImportError:
         return jsonify({'error': 'PDF parsing library (pdfplumber) not installed'}), 500
     except Exception as e:
         logger.error(f"Error parsing GRA PDF: {e}")
+        if trace:
+            trace('error', message=str(e))
         return jsonify({'error': f'Error parsing PDF: {str(e)}'}), 500
+    finally:
+        if pdf_path:
+            discard(pdf_path)
+        if trace:
+            trace.flush()
 
 
-@bp.route('/stats')
-def portfolio_stats():
-    """Portfolio statistics and analytics"""
+def _run_gra_pdf_job(job):
+    # The upload stays spooled until the job has run, so an interrupted job can be resumed
+    pdf_path = job.params['path']
+    trace = ParseTrace(f"job-{job.job_id}") if job.params.get('trace') else None
+    try:
+        return parse_gra_invoice_pdf(pdf_path, progress=job.progress, trace=trace)
+    except ImportError:
+        raise JobError('PDF parsing library (pdfplumber) not installed')
+    except Exception as e:
+        logger.error(f"Error parsing GRA PDF in job {job.job_id}: {e}")
+        if trace:
+            trace('error', message=str(e))
+        raise JobError(f'Error parsing PDF: {str(e)}')
+    finally:
+        discard(pdf_path)
+        if trace:
+            trace.flush()
+
+
+register_job_handler('gra_pdf', _run_gra_pdf_job)
+
+
+@bp.route('/gra-pdf-jobs', methods=['POST'])
+def submit_gra_pdf_job():
+    """Queue a GRA invoice PDF for background parsing; poll the returned status URL"""
+    from flask import jsonify
+
     user = load_current_user()
     if not user:
-        return redirect(url_for('auth.login'))
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    error = _pdf_upload_error()
+    if error:
+        return error
 
-    holdings = api_get_holdings(user.google_id)
+    pdf_file = request.files['pdf_file']
+    pdf_path = None
+    try:
+        pdf_path = spool_upload(pdf_file)
+        job_id = submit_job('gra_pdf', user.google_id, None, {
+            'filename': pdf_file.filename,
+            'path': pdf_path,
+            'trace': tracing_enabled(_trace_requested()),
+        })
+    except Exception as e:
+        if pdf_path:
+            discard(pdf_path)
+        log_db_exception(e, 'portfolio: queueing GRA PDF job')
+        logger.error(f"Error queueing GRA PDF job: {e}")
+        return jsonify({'error': f'Could not queue PDF: {str(e)}'}), 500
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': url_for('portfolio.gra_pdf_job_status', job_id=job_id),
+    }), 202
+
+
+@bp.route('/gra-pdf-jobs/<job_id>')
+def gra_pdf_job_status(job_id):
+    """Progress of a GRA PDF parsing job; `result` holds the parsed invoice when done"""
+    from flask import jsonify
+
+    user = load_current_user()
+    if not user:
+        return jsonify({'error': 'Not authenticated'}), 401
 
-    # Get form-based breakdown from API
-    form_report = api_get_holdings_by_form(user.google_id)
+    job = get_job(job_id, owner=user.google_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
 
-    # Get gem type breakdown from API
-    gem_type_report = api_get_holdings_by_gem_type(user.google_id)
 
-    # Calculate stats from form report
+FACETED_FORMS = ('Faceted', 'Cabochon')
+ROUGH_POTENTIAL_FORMS = ('rough', 'undefined', 'specimen')
+
+
+def summarize_portfolio(holdings, form_report):
+    """Compute the portfolio stats totals in one pass over each report.
+
+    Costs, carats, item counts and shipping come from the by-form report: Faceted and
+    Cabochon costs are faceted, everything else (Rough, Undefined, Specimen) is rough.
+    Potential values come from the individual holdings.
+    """
     total_items = 0
     total_cost = 0
     faceted_cost = 0
     rough_cost = 0
     faceted_carats = 0
     rough_carats = 0
+    total_shipping = 0
+    for form_data in form_report or []:
+        cost = form_data.get('TotalCost') or 0
+        total_items += form_data.get('Items') or 0
+        total_cost += cost
+        faceted_carats += form_data.get('TotalFacetedCarats') or 0
+        rough_carats += form_data.get('TotalRoughCarats') or 0
+        total_shipping += form_data.get('TotalShippingCost') or 0
+        if form_data.get('GemForm') in FACETED_FORMS:
+            faceted_cost += cost
+        else:
+            rough_cost += cost
+
     total_potential = 0
     faceted_potential = 0
     rough_potential = 0
-
-    if form_report:
-        for form_data in form_report:
-            total_items += form_data.get('Items', 0)
-            total_cost += form_data.get('TotalCost', 0)
-            faceted_carats += form_data.get('TotalFacetedCarats', 0)
-            rough_carats += form_data.get('TotalRoughCarats', 0)
-
-        # Faceted cost is from "Faceted" and "Cabochon" forms
-        faceted_form = next((f for f in form_report if f.get('GemForm') == 'Faceted'), None)
-        if faceted_form:
-            faceted_cost += faceted_form.get('TotalCost', 0)
-
-        cabochon_form = next((f for f in form_report if f.get('GemForm') == 'Cabochon'), None)
-        if cabochon_form:
-            faceted_cost += cabochon_form.get('TotalCost', 0)
-
-        # Rough cost is from "Rough" form
-        rough_form = next((f for f in form_report if f.get('GemForm') == 'Rough'), None)
-        if rough_form:
-            rough_cost = rough_form.get('TotalCost', 0)
-
-        # Other forms (Undefined, Specimen) go into rough cost
-        for form_data in form_report:
-            if form_data.get('GemForm') not in ['Faceted', 'Cabochon', 'Rough']:
-                rough_cost += form_data.get('TotalCost', 0)
-
-        # Get shipping costs if available
-        total_shipping = sum(f.get('TotalShippingCost', 0) for f in form_report)
-
-    # Get potential value from holdings
-    total_potential = sum(h.get('PotentialValue', 0) or 0 for h in holdings)
-    faceted_potential = sum(h.get('PotentialValue', 0) or 0 for h in holdings if (h.get('GemForm') or '').lower() in ['faceted', 'cabochon'])
-    rough_potential = sum(h.get('PotentialValue', 0) or 0 for h in holdings if (h.get('GemForm') or '').lower() in ['rough', 'undefined', 'specimen'])
-
-    stats = {
+    for h in holdings or []:
+        value = h.get('PotentialValue') or 0
+        total_potential += value
+        form = (h.get('GemForm') or '').lower()
+        if form in ('faceted', 'cabochon'):
+            faceted_potential += value
+        elif form in ROUGH_POTENTIAL_FORMS:
+            rough_potential += value
+
+    return {
         'total_items': total_items,
         'total_invested': total_cost,  # Using total_cost as invested
         'faceted_invested': faceted_cost,
@@ -983,6 +1037,31 @@ def portfolio_stats():
         'rough_potential': rough_potential
     }
 
+
+@bp.route('/stats')
+def portfolio_stats():
+    """Portfolio statistics and analytics"""
+    user = load_current_user()
+    if not user:
+        return redirect(url_for('auth.login'))
+
+    # The holdings list and the two reports are independent: fetch them concurrently
+    # under one shared deadline; a section that fails or is late renders as empty.
+    google_id = user.google_id
+    reports = fan_out(
+        {
+            'holdings': lambda: api_get_holdings(google_id),
+            'form_report': lambda: api_get_holdings_by_form(google_id),
+            'gem_type_report': lambda: api_get_holdings_by_gem_type(google_id),
+        },
+        deadline=current_app.config.get('PORTFOLIO_STATS_DEADLINE', 10),
+        defaults={'holdings': [], 'form_report': [], 'gem_type_report': []},
+    )
+    holdings = reports['holdings'] or []
+    gem_type_report = reports['gem_type_report'] or []
+
+    stats = summarize_portfolio(holdings, reports['form_report'])
+
     # Build top gems list from gem type report
     top_gems = []
     if gem_type_report:
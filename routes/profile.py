@@ -1,8 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 import os
-import requests
 from utils.db_logger import log_db_exception
-from utils.api_client import load_api_key
+from utils.api_client import load_api_key, get_session
 
 bp = Blueprint('profile', __name__, url_prefix='/profile')
 
@@ -77,7 +76,7 @@ def edit_profile():
             'minimal_investment_tier': minimal_investment_tier,
         }
 
-        resp = requests.post(url, headers=headers, json=payload, timeout=10)
+        resp = get_session().post(url, headers=headers, json=payload)
         if resp.status_code in (200, 201):
             flash('Preferences saved successfully.', 'success')
         else:
@@ -97,7 +96,7 @@ def api_list_user_gem_preferences(google_id):
         headers = get_gemdb_headers()
         url = f"{base_url}/api/v2/users/{google_id}/gem-preferences"
 
-        resp = requests.get(url, headers=headers, timeout=10)
+        resp = get_session().get(url, headers=headers)
         if resp.status_code == 200:
             prefs = resp.json()
             # Return in expected format for frontend
@@ -123,7 +122,7 @@ def api_user_gem_preference(google_id, gem_type_id):
         url = f"{base_url}/api/v2/users/{google_id}/gem-preferences/{gem_type_id}"
 
         if request.method == 'GET':
-            resp = requests.get(url, headers=headers, timeout=10)
+            resp = get_session().get(url, headers=headers)
             if resp.status_code == 200:
                 return jsonify(resp.json())
             elif resp.status_code == 404:
@@ -145,7 +144,7 @@ def api_user_gem_preference(google_id, gem_type_id):
             'min_premium_weight': float(data.get('min_premium_weight') or 0) if data.get('min_premium_weight') else None,
         }
 
-        resp = requests.post(url, headers=headers, json=payload, timeout=10)
+        resp = get_session().post(url, headers=headers, json=payload)
         if resp.status_code in (200, 201):
             return jsonify(resp.json())
         else:
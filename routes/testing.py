@@ -6,10 +6,11 @@ specific gravity, spectroscopy, microscopy, UV fluorescence, and more.
 """
 
 from flask import Blueprint, render_template, url_for, current_app
-import requests
-from utils.api_client import load_api_key
+from utils.api_client import get_gems_from_api, get_gem_test_properties
+from utils.response_cache import init_response_cache
 
 bp = Blueprint('testing', __name__, url_prefix='/testing')
+init_response_cache(bp)
 
 
 @bp.route('/')
@@ -85,31 +86,14 @@ def refractive_index():
     typical_values = {}
 
     try:
-        base_url = current_app.config.get('GEMDB_API_URL', 'https://api.preciousstone.info')
-        token = load_api_key() or ''
-        headers = {'X-API-Key': token} if token else {}
-
-        # Fetch all gem test properties
-        response = requests.get(
-            f"{base_url.rstrip('/')}/api/v2/gem-test-properties",
-            params={'limit': 1000},
-            headers=headers,
-            timeout=10
-        )
-
-        if response.status_code == 200:
-            test_props = response.json()
-
-            # Also fetch gem names to match with test properties
-            gems_response = requests.get(
-                f"{base_url.rstrip('/')}/api/v2/gems",
-                params={'limit': 1000},
-                headers=headers,
-                timeout=10
-            )
-
-            if gems_response.status_code == 200:
-                gems = gems_response.json()
+        # Gem test properties and the catalog both come from the per-worker caches
+        test_props = get_gem_test_properties()
+
+        if test_props:
+            # Also use gem names to match with test properties
+            gems = get_gems_from_api()
+
+            if gems:
                 gem_names = {g.get('GemTypeId'): g.get('GemTypeName') for g in gems}
 
                 # Build typical values and categorize untestable gems
@@ -374,31 +358,14 @@ def polariscope():
     typical_values = {}
 
     try:
-        base_url = current_app.config.get('GEMDB_API_URL', 'https://api.preciousstone.info')
-        token = load_api_key() or ''
-        headers = {'X-API-Key': token} if token else {}
-
-        # Fetch all gem test properties
-        response = requests.get(
-            f"{base_url.rstrip('/')}/api/v2/gem-test-properties",
-            params={'limit': 1000},
-            headers=headers,
-            timeout=10
-        )
-
-        if response.status_code == 200:
-            test_props = response.json()
-
-            # Also fetch gem names to match with test properties
-            gems_response = requests.get(
-                f"{base_url.rstrip('/')}/api/v2/gems",
-                params={'limit': 1000},
-                headers=headers,
-                timeout=10
-            )
-
-            if gems_response.status_code == 200:
-                gems = gems_response.json()
+        # Gem test properties and the catalog both come from the per-worker caches
+        test_props = get_gem_test_properties()
+
+        if test_props:
+            # Also use gem names to match with test properties
+            gems = get_gems_from_api()
+
+            if gems:
                 gem_names = {g.get('GemTypeId'): g.get('GemTypeName') for g in gems}
 
                 # Build typical values from optical character data
@@ -0,0 +1,118 @@
+"""Accuracy and throughput of the GRA invoice grammar over the sample invoice corpus.
+
+Extracts the text of every sample invoice in UnneededContent/ once, compares the
+grammar's output with the golden files in tests/golden/gra_invoices/, and then
+times the grammar alone over the extracted text.
+
+Usage:
+    python scripts/benchmark_gra_parser.py [--iterations N] [--extract] [--write-golden]
+
+--extract also times pdfplumber text extraction; --write-golden (re)writes the
+golden files from the current parser output, after reviewing the differences.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from utils.gra_invoice import parse_invoice_text
+from utils.pdf_text import iter_page_texts
+
+CORPUS_DIR = os.path.join(ROOT, 'UnneededContent')
+GOLDEN_DIR = os.path.join(ROOT, 'tests', 'golden', 'gra_invoices')
+
+
+def corpus():
+    return sorted(glob.glob(os.path.join(CORPUS_DIR, 'invoice-*.pdf')))
+
+
+def golden_path(pdf_path):
+    return os.path.join(GOLDEN_DIR, os.path.splitext(os.path.basename(pdf_path))[0] + '.json')
+
+
+def extract_text(pdf_path):
+    return ''.join(text + '\n' for _, _, text in iter_page_texts(pdf_path, workers=1))
+
+
+def field_diffs(expected, actual):
+    """Return (fields compared, list of 'path: expected != actual')."""
+    diffs = []
+    compared = 0
+    for key in ('invoice_number', 'order_date', 'seller_invoice_name', 'totals', 'shipping_info'):
+        compared += 1
+        if expected.get(key) != actual.get(key):
+            diffs.append(f"{key}: {expected.get(key)!r} != {actual.get(key)!r}")
+    exp_items, act_items = expected.get('items', []), actual.get('items', [])
+    if len(exp_items) != len(act_items):
+        diffs.append(f"items: {len(exp_items)} expected, {len(act_items)} parsed")
+    for i, (exp, act) in enumerate(zip(exp_items, act_items)):
+        for key in exp:
+            compared += 1
+            if exp[key] != act.get(key):
+                diffs.append(f"items[{i}].{key}: {exp[key]!r} != {act.get(key)!r}")
+    return compared, diffs
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--iterations', type=int, default=200)
+    ap.add_argument('--extract', action='store_true', help='also time PDF text extraction')
+    ap.add_argument('--write-golden', action='store_true', help='write golden files from the current output')
+    args = ap.parse_args()
+
+    pdfs = corpus()
+    if not pdfs:
+        print(f"No sample invoices in {CORPUS_DIR}")
+        return 1
+
+    started = time.perf_counter()
+    texts = {pdf: extract_text(pdf) for pdf in pdfs}
+    extract_seconds = time.perf_counter() - started
+
+    compared = failed = 0
+    for pdf, text in texts.items():
+        parsed = parse_invoice_text(text)
+        path = golden_path(pdf)
+        if args.write_golden:
+            os.makedirs(GOLDEN_DIR, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(parsed, f, indent=2, sort_keys=True)
+                f.write('\n')
+            continue
+        if not os.path.exists(path):
+            print(f"{os.path.basename(pdf)}: no golden file")
+            continue
+        with open(path, encoding='utf-8') as f:
+            n, diffs = field_diffs(json.load(f), parsed)
+        compared += n
+        failed += len(diffs)
+        for diff in diffs:
+            print(f"{os.path.basename(pdf)}: {diff}")
+
+    if args.write_golden:
+        print(f"Wrote {len(pdfs)} golden files to {GOLDEN_DIR}")
+        return 0
+
+    lines = sum(text.count('\n') for text in texts.values())
+    started = time.perf_counter()
+    for _ in range(args.iterations):
+        for text in texts.values():
+            parse_invoice_text(text)
+    parse_seconds = time.perf_counter() - started
+    runs = args.iterations * len(texts)
+
+    print(f"invoices: {len(pdfs)}  lines: {lines}")
+    print(f"accuracy: {compared - failed}/{compared} fields match the golden files")
+    print(f"parse: {runs / parse_seconds:,.0f} invoices/s, {lines * args.iterations / parse_seconds:,.0f} lines/s")
+    if args.extract:
+        print(f"extract: {extract_seconds / len(pdfs) * 1000:.1f} ms per invoice (pdfplumber)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
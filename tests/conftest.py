@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep tests independent of any catalog snapshot left on this machine
+os.environ['CATALOG_SNAPSHOT_PATH'] = ''
+# DB errors provoked by tests must not land in the repo's logs/ directory
+os.environ['DB_ERROR_LOG_DIR'] = tempfile.mkdtemp(prefix='gems-test-logs-')
+
+# Importing the app creates the users table (and tests create jobs) in the local
+# SQLite database; keep that database out of the repo root
+from utils import db  # noqa: E402
+
+db.DB_PATH = os.path.join(tempfile.mkdtemp(prefix='gems-test-db-'), 'gems_portfolio.db')
+
+
+@pytest.fixture(autouse=True)
+def _reset_page_cache():
+    """Tests patch upstream data per test, so rendered pages must not leak between them."""
+    from utils.response_cache import clear_response_cache
+    clear_response_cache()
+    yield
+    clear_response_cache()
+
+
+@pytest.fixture(autouse=True)
+def _reset_api_key():
+    """Key tests patch env vars and key sources per test; drop memoized credentials around each."""
+    from utils.api_client import refresh_api_key
+    refresh_api_key()
+    yield
+    refresh_api_key()
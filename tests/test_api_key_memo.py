@@ -0,0 +1,66 @@
+import json
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import api_client
+
+
+def test_key_is_resolved_once_until_refreshed(tmp_path, monkeypatch):
+    cfg_path = tmp_path / 'config.json'
+    cfg_path.write_text(json.dumps({'gemdb_api_token': 'gems_hub:FIRST'}))
+    monkeypatch.setenv('GEMS_CONFIG_PATH', str(cfg_path))
+    monkeypatch.delenv('GEMDB_API_KEY', raising=False)
+    monkeypatch.delenv('GEMHUNTER_API_KEY', raising=False)
+
+    with patch('utils.api_client._get_secret_from_gcp', return_value=None) as secret:
+        assert api_client.load_api_key() == 'FIRST'
+        cfg_path.write_text(json.dumps({'gemdb_api_token': 'gems_hub:ROTATED'}))
+        assert api_client.load_api_key() == 'FIRST'
+        assert api_client.get_api_key_info() == ('FIRST', 'config_json')
+        assert secret.call_count == 1
+
+        listener = MagicMock()
+        api_client.add_api_key_listener(listener)
+        try:
+            api_client.refresh_api_key()
+        finally:
+            api_client._api_key_listeners.remove(listener)
+        listener.assert_called_once_with()
+        assert api_client.load_api_key() == 'ROTATED'
+
+
+def test_changed_env_value_is_picked_up_without_refresh(monkeypatch):
+    with patch('utils.api_client._get_secret_from_gcp', return_value=None):
+        monkeypatch.setenv('GEMDB_API_KEY', 'gems_hub:ONE')
+        assert api_client.load_api_key() == 'ONE'
+        monkeypatch.setenv('GEMDB_API_KEY', 'gems_hub:TWO')
+        assert api_client.get_api_key_info() == ('TWO', 'env')
+
+
+def test_rejected_key_triggers_refresh(monkeypatch):
+    session = api_client.GemdbSession(pool_size=2)
+    monkeypatch.setenv('GEMDB_API_KEY', 'STALE')
+    api_client.load_api_key()
+    with patch('utils.api_client._refresh_api_key_after_rejection') as refresh, \
+            patch('requests.Session.send', return_value=MagicMock(status_code=401)):
+        session.get('https://api.preciousstone.info/api/v2/gems', headers={'X-API-Key': 'STALE'})
+    refresh.assert_called_once_with()
+
+
+def test_missing_key_is_retried_after_a_short_delay(monkeypatch):
+    monkeypatch.delenv('GEMDB_API_KEY', raising=False)
+    monkeypatch.delenv('GEMHUNTER_API_KEY', raising=False)
+    monkeypatch.setenv('GEMS_CONFIG_PATH', '/nonexistent/config.json')
+
+    with patch('utils.api_client._get_secret_from_gcp', side_effect=[None, 'gems_hub:LATE']) as secret:
+        assert api_client.load_api_key() is None
+        # The failure is remembered briefly...
+        assert api_client.load_api_key() is None
+        assert secret.call_count == 1
+        # ...then the key sources are tried again
+        monkeypatch.setattr(api_client, 'MISSING_KEY_RETRY_SECONDS', 0)
+        assert api_client.load_api_key() == 'LATE'
+        assert secret.call_count == 2
@@ -0,0 +1,71 @@
+import os
+import sys
+import threading
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from utils import api_client
+
+
+def _stats(name):
+    return next(c for c in api_client.get_cache_stats() if c['name'] == name)
+
+
+def test_catalog_is_fetched_once_while_fresh():
+    api_client.clear_caches()
+    calls = []
+
+    def fake_fetch(_app, limit):
+        calls.append(limit)
+        return [{'GemTypeName': 'Ruby'}]
+
+    with app.app_context(), patch('utils.api_client._fetch_gems_from_api', side_effect=fake_fetch), \
+            patch.dict(app.config, {'GEMDB_CATALOG_TTL': 300}):
+        first = api_client.get_gems_from_api()
+        second = api_client.get_gems_from_api()
+
+    assert first == [{'GemTypeName': 'Ruby'}]
+    assert second is first
+    assert calls == [1000]
+    stats = _stats('gems:1000')
+    assert stats['misses'] == 1
+    assert stats['hits'] == 1
+
+
+def test_stale_catalog_is_served_while_refreshing():
+    api_client.clear_caches()
+    refreshed = threading.Event()
+    responses = [[{'GemTypeName': 'Ruby'}], [{'GemTypeName': 'Ruby'}, {'GemTypeName': 'Spinel'}]]
+
+    def fake_fetch(_app, limit):
+        value = responses.pop(0)
+        if not responses:
+            refreshed.set()
+        return value
+
+    with app.app_context(), patch('utils.api_client._fetch_gems_from_api', side_effect=fake_fetch), \
+            patch.dict(app.config, {'GEMDB_CATALOG_TTL': 0}):
+        first = api_client.get_gems_from_api()
+        version = api_client.get_catalog_version()
+        stale = api_client.get_gems_from_api()
+        assert stale is first
+        assert refreshed.wait(2)
+        for t in threading.enumerate():
+            if t.name == 'refresh-gems:1000':
+                t.join(2)
+        app.config['GEMDB_CATALOG_TTL'] = 300
+        fresh = api_client.get_gems_from_api()
+
+    assert len(fresh) == 2
+    assert api_client.get_catalog_version() == version + 1
+    assert _stats('gems:1000')['stale_hits'] == 1
+
+
+def test_failed_fetch_is_not_cached():
+    api_client.clear_caches()
+    with app.app_context(), patch('utils.api_client._fetch_gems_from_api', return_value=None) as fetch:
+        assert api_client.get_gems_from_api() is None
+        assert api_client.get_gems_from_api() is None
+    assert fetch.call_count == 2
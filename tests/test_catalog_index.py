@@ -0,0 +1,76 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from utils.catalog_index import CatalogIndex, get_catalog_index
+
+
+CATALOG = [
+    {'GemTypeId': 1, 'GemTypeName': 'Ruby', 'MineralGroup': 'Corundum Group',
+     'HardnessRange': '9', 'TypicalSize': '1-5 carats', 'PriceRange': '$1,000 - $15,000 per carat'},
+    {'GemTypeId': 2, 'GemTypeName': 'Emerald', 'MineralGroup': 'Beryl Group',
+     'HardnessRange': '7.5–8', 'TypicalSize': '0.5-20 carats'},
+    {'GemTypeId': 3, 'GemTypeName': 'Blue Sapphire', 'MineralGroup': 'Corundum Group', 'HardnessLevel': 9},
+    {'GemTypeId': 4, 'GemTypeName': 'Amber'},
+]
+
+
+class TestCatalogIndex(unittest.TestCase):
+    def test_groups_and_lookups(self):
+        index = CatalogIndex(CATALOG)
+        self.assertEqual(len(index), 4)
+        self.assertEqual(list(index.groups), ['Beryl Group', 'Corundum Group', 'Miscellaneous'])
+        self.assertEqual(index.groups['Corundum Group'], ('Ruby', 'Blue Sapphire'))
+        self.assertEqual(index.gem_to_group['Amber'], 'Miscellaneous')
+        self.assertEqual(index.by_id[2]['GemTypeName'], 'Emerald')
+        self.assertEqual(index.hardness['Emerald'], 7.75)
+        self.assertEqual(index.hardness_str['Blue Sapphire'], '9')
+        self.assertEqual(index.size['Ruby'], 3.0)
+        self.assertEqual(index.price_numbers['Ruby'], (1000.0, 15000.0))
+        self.assertIs(index.record('ruby'), CATALOG[0])
+
+    def test_slug_resolution(self):
+        index = CatalogIndex(CATALOG)
+        self.assertEqual(index.name_for_slug('blue_sapphire'), 'Blue Sapphire')
+        self.assertEqual(index.name_for_slug('blue-sapphire'), 'Blue Sapphire')
+        self.assertEqual(index.name_for_slug('blue'), 'Blue Sapphire')
+        self.assertIsNone(index.name_for_slug('diamond'))
+
+    def test_index_is_rebuilt_only_for_a_new_catalog(self):
+        first = get_catalog_index(CATALOG)
+        self.assertIs(get_catalog_index(CATALOG), first)
+        refreshed = list(CATALOG)
+        self.assertIsNot(get_catalog_index(refreshed), first)
+        self.assertEqual(len(get_catalog_index([])), 0)
+
+
+class TestCatalogIndexRoutes(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    @patch('routes.gems.get_gems_from_api')
+    def test_by_hardness_shows_mineral_group(self, mock_api):
+        mock_api.return_value = CATALOG
+        rv = self.client.get('/gems/by-hardness')
+        self.assertEqual(rv.status_code, 200)
+        self.assertIn(b'Corundum Group', rv.data)
+
+    @patch('routes.gems.get_gems_from_api')
+    def test_gem_profile_unknown_slug_is_404(self, mock_api):
+        mock_api.return_value = CATALOG
+        rv = self.client.get('/gems/gem/diamond')
+        self.assertEqual(rv.status_code, 404)
+
+    @patch('routes.gems.get_gems_from_api')
+    def test_gem_profile_without_catalog_is_503(self, mock_api):
+        mock_api.return_value = []
+        rv = self.client.get('/gems/gem/ruby')
+        self.assertEqual(rv.status_code, 503)
+
+
+if __name__ == '__main__':
+    unittest.main()
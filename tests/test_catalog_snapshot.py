@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from utils import api_client, catalog_snapshot
+
+
+SNAPSHOT_CATALOG = [{'GemTypeId': 1, 'GemTypeName': 'Ruby', 'MineralGroup': 'Corundum Group'}]
+LIVE_CATALOG = [{'GemTypeId': 1, 'GemTypeName': 'Ruby', 'MineralGroup': 'Corundum Group'},
+                {'GemTypeId': 2, 'GemTypeName': 'Emerald', 'MineralGroup': 'Beryl Group'}]
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    path = str(tmp_path / 'snap.json.gz')
+    saved_at = catalog_snapshot.save_snapshot(path, {'gems:1000': SNAPSHOT_CATALOG})
+    data = catalog_snapshot.load_snapshot(path)
+    assert data['saved_at'] == saved_at
+    assert data['resources']['gems:1000'] == SNAPSHOT_CATALOG
+    assert catalog_snapshot.load_snapshot(str(tmp_path / 'missing.json.gz')) is None
+
+
+def test_snapshot_is_served_during_outage_then_replaced(tmp_path, monkeypatch):
+    path = str(tmp_path / 'snap.json.gz')
+    catalog_snapshot.save_snapshot(path, {'gems:1000': SNAPSHOT_CATALOG})
+    monkeypatch.setattr(catalog_snapshot, '_confirmed', set())
+    api_client.clear_caches()
+    try:
+        catalog_snapshot.init_catalog_snapshot(SimpleNamespace(config={'CATALOG_SNAPSHOT_PATH': path}))
+
+        with app.app_context():
+            # Upstream is down: the snapshot is served with a staleness notice
+            with patch('utils.api_client._fetch_gems_from_api', return_value=None):
+                assert api_client.get_gems_from_api() == SNAPSHOT_CATALOG
+                assert catalog_snapshot.get_catalog_staleness()['saved_at']
+                assert _wait_for(lambda: not api_client._get_resource_cache('gems:1000')._refreshing)
+                assert catalog_snapshot.get_snapshot_status()['serving_from_snapshot'] == ['gems:1000']
+                rv = app.test_client().get('/')
+                assert b'served from a saved copy' in rv.data
+
+            # Upstream recovers: live data replaces the snapshot, which is rewritten
+            with patch('utils.api_client._fetch_gems_from_api', return_value=LIVE_CATALOG):
+                api_client.get_gems_from_api()
+                assert _wait_for(lambda: api_client.get_gems_from_api() == LIVE_CATALOG)
+                assert catalog_snapshot.get_catalog_staleness() is None
+                assert _wait_for(lambda: catalog_snapshot.load_snapshot(path)['resources']['gems:1000'] == LIVE_CATALOG)
+    finally:
+        monkeypatch.setattr(catalog_snapshot, '_path', None)
+        api_client.clear_caches()
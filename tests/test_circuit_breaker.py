@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from utils import api_client
+
+PRICING_URL = 'https://api.preciousstone.info/api/v2/gem-pricing-page/1'
+CATALOG_URL = 'https://api.preciousstone.info/api/v2/gems'
+
+
+def _session(**settings):
+    settings.setdefault('failure_threshold', 2)
+    settings.setdefault('reset_timeout', 60)
+    return api_client.GemdbSession(pool_size=2, breaker_settings=settings)
+
+
+def test_breaker_opens_after_consecutive_failures_and_fails_fast():
+    session = _session()
+    with patch('requests.Session.send', side_effect=requests.ConnectionError('down')) as send:
+        for _ in range(2):
+            with pytest.raises(requests.ConnectionError):
+                session.get(PRICING_URL)
+        with pytest.raises(api_client.CircuitOpenError):
+            session.get(PRICING_URL)
+    assert send.call_count == 2
+    stats = session.breaker('pricing').stats()
+    assert stats['state'] == 'open'
+    assert stats['rejected'] == 1
+    # Other endpoint families are unaffected
+    with patch('requests.Session.send', return_value=MagicMock(status_code=200)):
+        assert session.get(CATALOG_URL).status_code == 200
+
+
+def test_5xx_and_slow_calls_count_as_failures():
+    session = _session(slow_call_seconds=0.05)
+    with patch('requests.Session.send', return_value=MagicMock(status_code=503)):
+        session.get(PRICING_URL)
+    assert session.breaker('pricing').consecutive_failures == 1
+
+    def slow_send(*args, **kwargs):
+        time.sleep(0.06)
+        return MagicMock(status_code=200)
+
+    with patch('requests.Session.send', side_effect=slow_send):
+        session.get(PRICING_URL)
+    stats = session.breaker('pricing').stats()
+    assert stats['state'] == 'open'
+    assert stats['slow_calls'] == 1
+
+
+def test_half_open_probe_closes_or_reopens():
+    session = _session(failure_threshold=1, reset_timeout=0.05)
+    with patch('requests.Session.send', side_effect=requests.Timeout('slow')):
+        with pytest.raises(requests.Timeout):
+            session.get(PRICING_URL)
+        time.sleep(0.06)
+        with pytest.raises(requests.Timeout):
+            session.get(PRICING_URL)  # failed probe
+    assert session.breaker('pricing').state == 'open'
+
+    time.sleep(0.06)
+    with patch('requests.Session.send', return_value=MagicMock(status_code=200)):
+        session.get(PRICING_URL)
+    assert session.breaker('pricing').state == 'closed'
+
+
+def test_health_page_shows_breaker_state():
+    session = _session(failure_threshold=1)
+    with patch('utils.api_client._session', session), \
+            patch('requests.Session.send', side_effect=requests.ConnectionError('down')):
+        with pytest.raises(requests.ConnectionError):
+            session.get(PRICING_URL)
+        rv = app.test_client().get('/health')
+    assert rv.status_code == 200
+    assert b'Upstream Circuit Breakers' in rv.data
+    assert b'<strong>open</strong>' in rv.data
+
+
+def test_probe_that_raises_a_non_request_error_releases_the_breaker():
+    session = _session(failure_threshold=1, reset_timeout=0)
+    with patch('requests.Session.send', side_effect=requests.ConnectionError('down')):
+        with pytest.raises(requests.ConnectionError):
+            session.get(PRICING_URL)
+    assert session.breaker('pricing').stats()['state'] == 'open'
+
+    # The half-open probe fails with an error requests does not raise itself
+    with patch('requests.Session.send', side_effect=RuntimeError('adapter bug')):
+        with pytest.raises(RuntimeError):
+            session.get(PRICING_URL)
+    with patch('requests.Session.send', return_value=MagicMock(status_code=200)):
+        assert session.get(PRICING_URL).status_code == 200
+    assert session.breaker('pricing').stats()['state'] == 'closed'
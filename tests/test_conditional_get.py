@@ -0,0 +1,64 @@
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from utils import api_client
+from utils.catalog_index import get_catalog_index
+
+
+class FakeResp:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self._body = body
+        self.headers = headers or {}
+        self.text = ''
+
+    def json(self):
+        if self._body is None:
+            raise AssertionError('a 304 body must not be parsed')
+        return self._body
+
+
+def test_304_reuses_the_parsed_catalog_and_its_index():
+    seen_headers = []
+
+    def fake_get(self, url, params=None, headers=None, timeout=None):
+        seen_headers.append(dict(headers or {}))
+        if headers and headers.get('If-None-Match') == '"v1"':
+            return FakeResp(304)
+        return FakeResp(200, [{'GemTypeId': 1, 'GemTypeName': 'Ruby'}],
+                        {'ETag': '"v1"', 'Last-Modified': 'Wed, 01 Oct 2025 00:00:00 GMT'})
+
+    api_client.clear_caches()
+    try:
+        with app.app_context(), patch('requests.Session.get', fake_get):
+            first = api_client._fetch_gems_from_api(app, 1000)
+            cache = api_client._get_resource_cache('gems:1000')
+            cache._store(first)
+            index = get_catalog_index(first)
+
+            second = api_client._fetch_gems_from_api(app, 1000)
+            cache._store(second)
+
+        assert 'If-None-Match' not in seen_headers[0]
+        assert seen_headers[1]['If-None-Match'] == '"v1"'
+        assert seen_headers[1]['If-Modified-Since'] == 'Wed, 01 Oct 2025 00:00:00 GMT'
+        assert second is first
+        assert get_catalog_index(second) is index
+        assert cache.version == 1
+        assert cache.stats()['not_modified'] == 1
+    finally:
+        api_client.clear_caches()
+
+
+def test_unconditional_fetches_send_no_validators():
+    def fake_get(self, url, params=None, headers=None, timeout=None):
+        assert 'If-None-Match' not in (headers or {})
+        return FakeResp(200, [], {'ETag': '"v1"'})
+
+    with patch('requests.Session.get', fake_get):
+        api_client._fetch_json('http://upstream/api/v2/listings')
+        api_client._fetch_json('http://upstream/api/v2/listings')
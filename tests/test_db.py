@@ -0,0 +1,64 @@
+import os
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import db
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'portfolio.db')
+    yield path
+    db.close_thread_connections()
+
+
+def test_connections_are_reused_per_thread(db_path):
+    conn = db.get_db(db_path)
+    conn.execute('CREATE TABLE t (name TEXT)')
+    conn.commit()
+    conn.close()
+    assert db.get_db(db_path) is conn
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+
+    other = []
+    t = threading.Thread(target=lambda: (other.append(db.get_db(db_path)), db.close_thread_connections()))
+    t.start()
+    t.join()
+    assert other[0] is not conn
+
+
+def test_close_rolls_back_unfinished_writes(db_path):
+    conn = db.get_db(db_path)
+    conn.execute('CREATE TABLE t (name TEXT)')
+    conn.commit()
+    conn.execute("INSERT INTO t VALUES ('Ruby')")
+    conn.close()
+    assert db.get_db(db_path).execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+
+
+def test_readers_do_not_block_on_an_open_writer(db_path):
+    writer = db.get_db(db_path)
+    writer.execute('CREATE TABLE t (name TEXT)')
+    writer.execute("INSERT INTO t VALUES ('Ruby')")
+    writer.commit()
+
+    writer.execute("INSERT INTO t VALUES ('Emerald')")  # uncommitted, holds the write lock
+    reader = db.get_read_db(db_path)
+    assert reader.readonly
+    rows = reader.execute('SELECT name FROM t').fetchall()
+    assert [r['name'] for r in rows] == ['Ruby']
+    with pytest.raises(sqlite3.OperationalError):
+        reader.execute("INSERT INTO t VALUES ('Spinel')")
+    writer.rollback()
+
+
+def test_reader_falls_back_until_the_file_exists(db_path):
+    conn = db.get_read_db(db_path)
+    assert not conn.readonly
+    assert os.path.exists(db_path)
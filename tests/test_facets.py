@@ -0,0 +1,77 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from utils.catalog_index import CatalogIndex
+from utils.facets import get_facet, infer_price_group, materialize
+
+
+CATALOG = [
+    {'GemTypeName': 'Ruby', 'MineralGroup': 'Corundum Group', 'HardnessRange': '9',
+     'RarityLevel': 'Limited Occurrence', 'TypicalSize': '1-5 carats', 'PriceRange': '$1,000 - $15,000 per carat',
+     'InvestmentAppropriatenessLevel': 'Blue Chip Investment Gems', 'Colours': ['Red', 'Pink']},
+    {'GemTypeName': 'Topaz', 'MineralGroup': 'Topaz Group', 'HardnessRange': '8',
+     'RarityLevel': 'Abundant Minerals', 'TypicalSize': '10-100 carats',
+     'AvailabilityLevel': 'consistent deposits'},
+    {'GemTypeName': 'Amber', 'HardnessRange': '2-2.5', 'RarityLevel': 'Fossil Resin'},
+]
+
+
+class TestFacets(unittest.TestCase):
+    def setUp(self):
+        self.index = CatalogIndex(CATALOG)
+
+    def test_hardness_buckets_in_order(self):
+        view = get_facet(self.index, 'hardness')
+        self.assertEqual([c['name'] for c in view],
+                         ['Very Hard (8.5-9.99)', 'Hard-2 (8.0-8.49)', 'Very Soft (1-2.99)'])
+        self.assertEqual(view[0]['gems'][0]['mineral_group'], 'Corundum Group')
+
+    def test_rarity_keeps_unknown_categories_last(self):
+        names = [c['name'] for c in get_facet(self.index, 'rarity')]
+        self.assertEqual(names, ['Limited Occurrence', 'Abundant Minerals', 'Fossil Resin'])
+
+    def test_price_and_size(self):
+        price = {c['name']: [g['name'] for g in c['gems']] for c in get_facet(self.index, 'price')}
+        self.assertEqual(price['SUPER-PREMIUM'], ['Ruby'])
+        self.assertEqual(price['AFFORDABLE'], ['Topaz'])
+        size = {c['name']: [g['name'] for g in c['gems']] for c in get_facet(self.index, 'size')}
+        self.assertEqual(size['VERY LARGE STONES (50+ carats)'], ['Topaz'])
+        self.assertNotIn('Amber', [g for gems in size.values() for g in gems])
+        self.assertEqual(infer_price_group('>$50,000 per carat', (50000.0,)), ('ULTRA-LUXURY', 7))
+
+    def test_colors_and_availability(self):
+        colors = get_facet(self.index, 'colors')
+        self.assertEqual([p['color'] for p in colors['palette']], ['Red'])
+        self.assertEqual(len(colors['gems']), 3)
+        availability = get_facet(self.index, 'availability')
+        self.assertEqual(availability[0]['name'], 'Consistently Available')
+
+    def test_views_are_built_once_per_index(self):
+        first = get_facet(self.index, 'rarity')
+        self.assertIs(get_facet(self.index, 'rarity'), first)
+        self.assertIsNot(get_facet(CatalogIndex(CATALOG), 'rarity'), first)
+        self.assertEqual(set(materialize(self.index)),
+                         {'hardness', 'rarity', 'availability', 'size', 'price', 'colors', 'investment'})
+
+
+class TestFacetRoutes(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    @patch('routes.gems.get_gems_from_api')
+    def test_pages_render_from_facets(self, mock_api):
+        mock_api.return_value = CATALOG
+        for path in ('/gems/by-hardness', '/gems/by-rarity', '/gems/by-availability', '/gems/by-size',
+                     '/gems/by-price', '/gems/by-colors', '/gems/by-investment'):
+            rv = self.client.get(path)
+            self.assertEqual(rv.status_code, 200, path)
+            self.assertIn(b'Ruby' if path != '/gems/by-availability' else b'Topaz', rv.data, path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from utils.concurrency import fan_out
+
+
+def _slow(value, delay):
+    def call():
+        time.sleep(delay)
+        return value
+    return call
+
+
+def _boom():
+    raise RuntimeError('upstream down')
+
+
+def test_fan_out_runs_calls_concurrently():
+    with app.app_context():
+        started = time.monotonic()
+        results = fan_out({'a': _slow(1, 0.2), 'b': _slow(2, 0.2), 'c': _slow(3, 0.2)}, deadline=2)
+        elapsed = time.monotonic() - started
+    assert results == {'a': 1, 'b': 2, 'c': 3}
+    assert elapsed < 0.5
+
+
+def test_fan_out_degrades_each_section_on_its_own():
+    with app.app_context():
+        results = fan_out(
+            {'ok': _slow('fine', 0), 'failed': _boom, 'late': _slow('too late', 1)},
+            deadline=0.3,
+            defaults={'failed': [], 'late': {}},
+        )
+    assert results == {'ok': 'fine', 'failed': [], 'late': {}}
+
+
+@patch('routes.gems._fetch_related_gems', return_value=[])
+@patch('routes.gems._fetch_gem_pricing', return_value={})
+@patch('routes.gems.get_gems_from_api')
+def test_gem_profile_renders_with_fanned_out_sections(mock_api, mock_pricing, mock_related):
+    mock_api.return_value = [{'GemTypeId': 7, 'GemTypeName': 'Ruby', 'MineralGroup': 'Corundum'}]
+    rv = app.test_client().get('/gems/gem/ruby')
+    assert rv.status_code == 200
+    assert b'Ruby' in rv.data
+    mock_pricing.assert_called_once_with(7)
+    mock_related.assert_called_once_with(7)
@@ -0,0 +1,88 @@
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from utils import db, gem_attributes
+
+
+CATALOG = [
+    {'GemTypeName': 'Ruby', 'MineralGroup': 'Corundum Group', 'HardnessRange': '9'},
+    {'GemTypeName': 'Emerald', 'MineralGroup': 'Beryl Group', 'HardnessRange': '7.5-8'},
+]
+
+
+def _create_table(conn):
+    conn.execute('CREATE TABLE gem_attributes (gem_type_id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                 'gem_type_name TEXT UNIQUE, Mineral_Group TEXT, Hardness_Level REAL, Hardness_Range TEXT, '
+                 'Price_Range TEXT, Rarity_Level TEXT, Availability_Level TEXT, '
+                 'Investment_Appropriateness_Level TEXT, Investment_Ranking_Score REAL, Investment_Ranking_Tier TEXT)')
+    conn.execute("INSERT INTO gem_attributes (gem_type_name, Investment_Ranking_Score, Investment_Ranking_Tier) "
+                 "VALUES ('Ruby', 82.5, 'VERY BULLISH'), ('Emerald', 71.0, 'BULLISH')")
+    conn.commit()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'portfolio.db')
+    yield path
+    gem_attributes._mirrors.pop(path, None)
+    db.close_thread_connections()
+
+
+def test_mirror_is_loaded_once_and_keyed_by_name(db_path):
+    _create_table(db.get_db(db_path))
+    attrs = gem_attributes.get_gem_attributes(db_path)
+    assert [r['name'] for r in attrs.rows] == ['Ruby', 'Emerald']
+    assert attrs.get('  ruby ')['tier'] == 'VERY BULLISH'
+    assert attrs.get('Emerald')['name'] == 'Emerald'
+    assert gem_attributes.get_gem_attributes(db_path) is attrs
+
+
+def test_invalidate_reloads_after_a_local_write(db_path):
+    conn = db.get_db(db_path)
+    _create_table(conn)
+    assert gem_attributes.get_gem_attributes(db_path).get('Ruby')['tier'] == 'VERY BULLISH'
+    conn.execute("UPDATE gem_attributes SET Investment_Ranking_Tier = 'NEUTRAL' WHERE gem_type_name = 'Ruby'")
+    conn.commit()
+    gem_attributes.invalidate(db_path)
+    assert gem_attributes.get_gem_attributes(db_path).get('Ruby')['tier'] == 'NEUTRAL'
+
+
+def test_data_version_picks_up_writes_from_other_connections(db_path, monkeypatch):
+    _create_table(db.get_db(db_path))
+    monkeypatch.setenv('GEM_ATTRIBUTES_RECHECK_SECONDS', '0')
+    first = gem_attributes.get_gem_attributes(db_path)
+    assert gem_attributes.get_gem_attributes(db_path) is first  # nothing changed
+
+    other = db.connect(db_path)
+    other.execute("DELETE FROM gem_attributes WHERE gem_type_name = 'Emerald'")
+    other.commit()
+    other.close()
+    assert [r['name'] for r in gem_attributes.get_gem_attributes(db_path).rows] == ['Ruby']
+
+
+def test_missing_table_gives_an_empty_mirror(db_path):
+    db.get_db(db_path)
+    assert len(gem_attributes.get_gem_attributes(db_path)) == 0
+
+
+@patch('routes.gems.get_gems_from_api', return_value=CATALOG)
+def test_by_hardness_reads_tiers_without_querying_sqlite(mock_api, db_path, monkeypatch):
+    _create_table(db.get_db(db_path))
+    monkeypatch.setattr(db, 'DB_PATH', db_path)
+    gem_attributes.get_gem_attributes(db_path)
+    with patch.object(db, 'connect', side_effect=AssertionError('SQLite touched')), \
+            patch.object(db, 'get_read_db', side_effect=AssertionError('SQLite touched')):
+        with app.app_context():
+            app.config['GEM_ATTRIBUTES_RECHECK_SECONDS'] = 60
+            try:
+                rv = app.test_client().get('/gems/by-hardness')
+            finally:
+                app.config['GEM_ATTRIBUTES_RECHECK_SECONDS'] = 5
+    assert rv.status_code == 200
+    assert b'VERY BULLISH' in rv.data
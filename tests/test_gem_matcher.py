@@ -0,0 +1,68 @@
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from routes import portfolio
+from utils.gem_matcher import GemMatcher, get_gem_matcher
+
+CATALOG = [
+    {'GemTypeId': 1, 'GemTypeName': 'Sapphire'},
+    {'GemTypeId': 2, 'GemTypeName': 'Star Sapphire'},
+    {'GemTypeId': 3, 'GemTypeName': 'Garnet'},
+    {'GemTypeId': 4, 'GemTypeName': 'Rhodolite Garnet'},
+    {'GemTypeId': 5, 'GemTypeName': 'Opal'},
+    {'GemTypeId': 6, 'GemTypeName': 'Taaffeite'},
+    {'GemTypeId': 7, 'GemTypeName': 'Väyrynenite'},
+    {'GemTypeId': 8, 'GemTypeName': 'Topaz'},
+]
+
+
+def _best(title, catalog=CATALOG):
+    m = GemMatcher(catalog).match(title)
+    return m and m.name
+
+
+def test_longest_name_wins_wherever_it_appears():
+    assert _best('Blue Star Sapphire 2.1ct') == 'Star Sapphire'
+    assert _best('1.70 Ct Ntaural Rhodolite Garnet Top Luster Gemstone GR40') == 'Rhodolite Garnet'
+    assert _best('Sapphire and Rhodolite Garnet pair') == 'Rhodolite Garnet'
+    assert _best('Garnet and Sapphire pair') == 'Sapphire'
+
+
+def test_matches_whole_words_only():
+    assert _best('Opalescent moonstone') is None
+    assert _best('Fire OPAL, Mexico') == 'Opal'
+    assert _best('Sapphire-blue spinel') == 'Sapphire'
+
+
+def test_plurals_aliases_and_accents():
+    assert _best('142 CT Natural Gemmy SAPPHIRES Crystals Lot') == 'Sapphire'
+    assert _best('Imperial Topazes parcel') == 'Topaz'
+    assert _best('*NR fEsTiVaL* Rare Certied Natural White Taaeite 0.22Ct.') == 'Taaffeite'
+    assert _best('0.07 Ct World Rarest Vayrynenite Top Quality Luster VR16') == 'Väyrynenite'
+    # Aliases only apply to gem types in the catalog
+    assert _best('Pink Kunzite 12ct') is None
+    assert _best('Pink Kunzite 12ct', CATALOG + [{'GemTypeId': 9, 'GemTypeName': 'Spodumene'}]) == 'Spodumene'
+
+
+def test_find_all_reports_every_match_with_spans():
+    matches = GemMatcher(CATALOG).find_all('star sapphire and garnet')
+    assert [(m.name, m.start, m.end) for m in matches] == [
+        ('Star Sapphire', 0, 13), ('Sapphire', 5, 13), ('Garnet', 18, 24)]
+
+
+def test_matcher_is_built_once_per_catalog_version():
+    first = get_gem_matcher(CATALOG)
+    assert get_gem_matcher(CATALOG) is first
+    assert get_gem_matcher(list(CATALOG)) is not first
+
+
+def test_title_derivation_uses_the_cached_catalog():
+    with app.app_context(), \
+            patch('routes.portfolio.get_gems_from_api', return_value=CATALOG), \
+            patch('routes.portfolio.api_get_gem_types', side_effect=AssertionError('catalog refetched')):
+        assert portfolio.api_derive_gem_type_from_title('Natural Star Sapphire 2ct') == (2, 'Star Sapphire')
+        assert portfolio.api_derive_gem_type_from_title('Quartz cluster') == (None, None)
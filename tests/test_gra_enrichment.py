@@ -0,0 +1,79 @@
+import glob
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from routes import portfolio
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SAMPLES = sorted(glob.glob(os.path.join(ROOT, 'UnneededContent', 'invoice-*.pdf')))
+
+CATALOG = [
+    {'GemTypeId': 1, 'GemTypeName': 'Sapphire'},
+    {'GemTypeId': 2, 'GemTypeName': 'Spinel'},
+    {'GemTypeId': 3, 'GemTypeName': 'Grandidierite'},
+    {'GemTypeId': 4, 'GemTypeName': 'Star Sapphire'},
+]
+
+
+def test_listing_details_are_fetched_once_per_product_with_a_bound():
+    calls = []
+    active = [0, 0]
+    lock = threading.Lock()
+
+    def details(product_id):
+        with lock:
+            calls.append(product_id)
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return {'ListingId': product_id}
+
+    with app.app_context(), patch('routes.portfolio.api_get_listing_details', side_effect=details):
+        result = portfolio.api_get_listing_details_bulk(['1', '2', '1', '3', '4', '5'], max_workers=2)
+
+    assert sorted(calls) == ['1', '2', '3', '4', '5']
+    assert active[1] == 2
+    assert list(result) == ['1', '2', '3', '4', '5']
+    assert result['3'] == {'ListingId': '3'}
+
+
+def test_gem_type_names_come_from_the_cached_catalog():
+    with app.app_context(), \
+            patch('routes.portfolio.get_gems_from_api', return_value=CATALOG), \
+            patch('routes.portfolio.api_get_gem_types', side_effect=AssertionError('catalog refetched')):
+        names, matcher = portfolio._gem_type_lookup()
+
+    assert names[3] == 'Grandidierite'
+    assert portfolio.api_derive_gem_type_from_title('Natural Star Sapphire 2ct', matcher) == (4, 'Star Sapphire')
+
+
+@pytest.mark.skipif(not SAMPLES, reason='sample invoices not available')
+def test_parse_makes_one_listing_call_per_product_and_no_catalog_calls():
+    listing_calls = []
+
+    def details(product_id):
+        listing_calls.append(product_id)
+        return {'GemTypeId': 3, 'Type': 'Faceted'}
+
+    with app.app_context(), \
+            patch('routes.portfolio.api_get_listing_details', side_effect=details), \
+            patch('routes.portfolio.get_gems_from_api', return_value=CATALOG) as catalog, \
+            patch('routes.portfolio.api_get_gem_types', side_effect=AssertionError('catalog refetched')):
+        result = portfolio.parse_gra_invoice_pdf(SAMPLES[0])
+
+    product_ids = [item['product_id'] for item in result['items']]
+    assert product_ids
+    assert sorted(listing_calls) == sorted(set(product_ids))
+    assert catalog.call_count == 1
+    assert all(item['gem_type_name'] == 'Grandidierite' for item in result['items'])
+    assert all(item['gem_form'] == 'Faceted' for item in result['items'])
@@ -0,0 +1,82 @@
+import glob
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.gra_invoice import InvoiceParser, parse_invoice_text, tokenize
+from utils.pdf_text import iter_page_texts
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+GOLDEN_DIR = os.path.join(ROOT, 'tests', 'golden', 'gra_invoices')
+GOLDEN = sorted(glob.glob(os.path.join(GOLDEN_DIR, '*.json')))
+
+INVOICE = """Gem Rock Auctions
+Tax Invoice 996687
+Order date 19th Nov 2025
+SOLD BY SOLD TO
+Ploy Ploy Stanislav Prikhodko
+Qty Products Price
+Grandidierite 5.27Ct Natural World Rare Gemstone
+D0624/B11 $50.00 USD
+1
+SKU:
+(Discount : $25.00 USD)
+Product ID: 1698413
+Natural Spinel 1.10 Cts
+1 SKU: SP-7 $30.00 USD
+Product ID: 1965890
+Subtotal $55.00 USD
+Invoice #996687 Page1of2
+Shipping $18.00 USD
+Total $73.00 USD
+Shipping Provider Standard Shipping - Tracked (21 days)
+Tracking Number SF6047067039197
+"""
+
+
+def _pdf_for(golden):
+    return os.path.join(ROOT, 'UnneededContent', os.path.basename(golden)[:-len('.json')] + '.pdf')
+
+
+def test_lines_are_classified_by_keyword():
+    kinds = [t.kind for t in tokenize('Product ID: 12\n1 SKU: X\n1\nSubtotal $1.00 USD\nRuby')]
+    assert kinds == ['product_id', 'sku', 'qty', 'total', 'text']
+
+
+def test_parse_invoice_text():
+    parsed = parse_invoice_text(INVOICE)
+    assert parsed['invoice_number'] == '996687'
+    assert parsed['order_date'] == '2025-11-19'
+    assert parsed['seller_invoice_name'] == 'Ploy Ploy'
+    assert parsed['totals'] == {'subtotal': 55.0, 'shipping': 18.0, 'total': 73.0}
+    assert parsed['shipping_info']['tracking_number'] == 'SF6047067039197'
+    first, second = parsed['items']
+    assert first == {
+        'product_id': '1698413', 'sku': None, 'price': 25.0, 'discount': 25.0, 'original_price': 50.0,
+        'title': 'Grandidierite 5.27Ct Natural World Rare Gemstone', 'carat': 5.27,
+    }
+    assert (second['sku'], second['price'], second['title'], second['carat']) == \
+        ('SP-7', 30.0, 'Natural Spinel 1.10 Cts', 1.1)
+
+
+def test_items_are_emitted_as_their_product_line_arrives():
+    parser = InvoiceParser()
+    head, tail = INVOICE.split('Product ID: 1965890')
+    assert [i['product_id'] for i in parser.feed(head + 'Product ID: 19')] == ['1698413']
+    assert [i['product_id'] for i in parser.feed('65890' + tail)] == ['1965890']
+    assert parser.close() == []
+    assert dict(parser.header, items=[]) == dict(parse_invoice_text(INVOICE), items=[])
+
+
+@pytest.mark.parametrize('golden', GOLDEN, ids=[os.path.basename(g)[:40] for g in GOLDEN])
+def test_sample_invoices_match_golden_files(golden):
+    pdf = _pdf_for(golden)
+    if not os.path.exists(pdf):
+        pytest.skip('sample invoice not available')
+    text = ''.join(t + '\n' for _, _, t in iter_page_texts(pdf, workers=1))
+    with open(golden, encoding='utf-8') as f:
+        assert parse_invoice_text(text) == json.load(f)
@@ -0,0 +1,141 @@
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from routes import portfolio
+from utils import holdings_cache
+from utils.holdings_cache import HoldingsSnapshot
+
+
+@pytest.fixture(autouse=True)
+def _fresh_state():
+    portfolio._import_keys.clear()
+    holdings_cache.invalidate_user()
+    yield
+    portfolio._import_keys.clear()
+
+
+def _rows(n, invoice='INV-1'):
+    return [(i + 1, {'gem_type_id': 7, 'invoice_number': invoice, 'product_number': f'P{i}'}) for i in range(n)]
+
+
+def test_rows_are_created_concurrently_with_idempotency_keys():
+    seen = []
+    lock = threading.Lock()
+
+    def create(google_user_id, data, idempotency_key=None):
+        time.sleep(0.1)
+        with lock:
+            seen.append(idempotency_key)
+        return {'AssetId': int(data['product_number'][1:]) + 100}
+
+    with app.app_context(), \
+            patch('routes.portfolio.get_holdings_snapshot', return_value=HoldingsSnapshot([])), \
+            patch('routes.portfolio.api_create_holding', side_effect=create):
+        started = time.monotonic()
+        results = portfolio.api_create_holdings_bulk('g-1', _rows(8), max_workers=4)
+        elapsed = time.monotonic() - started
+
+    assert elapsed < 0.6
+    assert [r['row'] for r in results] == list(range(1, 9))
+    assert [r['asset_id'] for r in results] == list(range(100, 108))
+    assert len(set(seen)) == 8 and None not in seen
+
+
+def test_partial_failure_is_reported_and_retry_does_not_duplicate():
+    existing = []
+    calls = []
+
+    def create(google_user_id, data, idempotency_key=None):
+        calls.append(data['product_number'])
+        if data['product_number'] == 'P1' and calls.count('P1') == 1:
+            raise Exception('API returned 500: boom')
+        existing.append({'AssetId': len(existing) + 1, 'InvoiceNumber': 'INV-1',
+                         'ProductNumber': data['product_number']})
+        return existing[-1]
+
+    with app.app_context(), \
+            patch('routes.portfolio.get_holdings_snapshot', side_effect=lambda uid: HoldingsSnapshot(existing)), \
+            patch('routes.portfolio.api_create_holding', side_effect=create):
+        first = portfolio.api_create_holdings_bulk('g-1', _rows(3))
+        assert [r['status'] for r in first] == ['created', 'failed', 'created']
+        assert 'boom' in first[1]['error']
+
+        # Submitting the same invoice again only creates the row that failed
+        second = portfolio.api_create_holdings_bulk('g-1', _rows(3))
+        assert [r['status'] for r in second] == ['skipped', 'created', 'skipped']
+
+    assert sorted(calls) == ['P0', 'P1', 'P1', 'P2']
+    assert len(existing) == 3
+
+
+def test_double_submit_while_in_flight_is_skipped():
+    started = threading.Event()
+    release = threading.Event()
+
+    def create(google_user_id, data, idempotency_key=None):
+        started.set()
+        assert release.wait(5)
+        return {'AssetId': 1}
+
+    first = []
+    with app.app_context(), \
+            patch('routes.portfolio.get_holdings_snapshot', return_value=None), \
+            patch('routes.portfolio.api_create_holding', side_effect=create) as create_mock:
+        def submit_first():
+            with app.app_context():
+                first.extend(portfolio.api_create_holdings_bulk('g-1', _rows(1, invoice=None)))
+
+        t = threading.Thread(target=submit_first)
+        t.start()
+        assert started.wait(5)
+        again = portfolio.api_create_holdings_bulk('g-1', _rows(1, invoice=None))
+        release.set()
+        t.join(5)
+    assert again[0]['status'] == 'skipped'
+    assert first[0]['status'] == 'created'
+    assert create_mock.call_count == 1
+
+
+def test_resubmit_after_success_is_skipped_within_the_claim_window():
+    with app.app_context(), \
+            patch('routes.portfolio.get_holdings_snapshot', return_value=None), \
+            patch('routes.portfolio.api_create_holding', return_value={'AssetId': 1}) as create:
+        portfolio.api_create_holdings_bulk('g-1', _rows(1, invoice=None))
+        again = portfolio.api_create_holdings_bulk('g-1', _rows(1, invoice=None))
+    assert again[0]['status'] == 'skipped'
+    assert create.call_count == 1
+
+
+def test_invoice_form_flashes_per_row_results():
+    user = MagicMock(google_id='g-1')
+    results = [
+        {'row': 1, 'status': 'created', 'asset_id': 5, 'error': None},
+        {'row': 2, 'status': 'failed', 'asset_id': None, 'error': 'API returned 500: boom'},
+    ]
+    with patch('routes.portfolio.load_current_user', return_value=user), \
+            patch('routes.portfolio.api_create_holdings_bulk', return_value=results) as bulk:
+        client = app.test_client()
+        rv = client.post('/portfolio/add-gra-invoice', data={
+            'invoice_number': 'INV-1',
+            'shipping_cost': '10',
+            'gem_type_id[]': ['7', '9'],
+            'product_number[]': ['P0', 'P1'],
+            'weight_carats[]': ['1.5', '2'],
+        })
+        assert rv.status_code == 302
+        with client.session_transaction() as session:
+            flashes = session['_flashes']
+
+    rows = bulk.call_args[0][1]
+    assert [n for n, _ in rows] == [1, 2]
+    assert rows[0][1]['shipping_cost'] == 5.0
+    assert ('success', 'Successfully added 1 gem(s) to your portfolio!') in flashes
+    assert ('error', 'Row 2: API returned 500: boom') in flashes
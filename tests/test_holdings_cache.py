@@ -0,0 +1,143 @@
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from routes import gems as gems_routes
+from routes import portfolio
+from utils import holdings_cache
+
+
+HOLDINGS = [
+    {'AssetId': 1, 'GemTypeId': 7, 'GemForm': 'Faceted'},
+    {'AssetId': 2, 'GemTypeId': 7, 'GemForm': 'Rough'},
+    {'AssetId': 3, 'GemTypeId': 9, 'GemForm': 'Faceted'},
+]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    holdings_cache.invalidate_user()
+    yield
+    holdings_cache.invalidate_user()
+
+
+@pytest.fixture
+def upstream():
+    session = MagicMock()
+    session.get.return_value = MagicMock(status_code=200, json=lambda: list(HOLDINGS))
+    session.post.return_value = MagicMock(status_code=200, json=lambda: {'AssetId': 4}, text='')
+    session.delete.return_value = MagicMock(status_code=200)
+    with patch('utils.holdings_cache.get_session', return_value=session), \
+            patch('routes.portfolio.get_session', return_value=session), \
+            patch('routes.portfolio.load_api_key', return_value='k'):
+        yield session
+
+
+def test_profiles_reuse_one_download_via_the_gem_type_index(upstream):
+    with app.app_context():
+        assert [h['AssetId'] for h in gems_routes.get_user_holdings('g-1', 7)] == [1, 2]
+        assert [h['AssetId'] for h in gems_routes.get_user_holdings('g-1', 9)] == [3]
+        assert gems_routes.get_user_holdings('g-1', 42) == []
+        assert len(portfolio.api_get_holdings('g-1')) == 3
+    assert upstream.get.call_count == 1
+
+
+def test_writes_invalidate_the_users_cache(upstream):
+    with app.app_context():
+        portfolio.api_get_holdings('g-1')
+        portfolio.api_get_holdings('g-2')
+        portfolio.api_create_holding('g-1', {'gem_type_id': 7})
+        portfolio.api_get_holdings('g-1')
+        portfolio.api_get_holdings('g-2')
+        assert upstream.get.call_count == 3
+
+        portfolio.api_delete_holding(1, 'g-2')
+        portfolio.api_get_holdings('g-2')
+        assert upstream.get.call_count == 4
+
+
+def test_reports_are_cached_per_params_and_failures_are_not(upstream):
+    with app.app_context():
+        portfolio.api_search_portfolio('g-1', sort_by_mode='PurchaseDate')
+        portfolio.api_search_portfolio('g-1', sort_by_mode='PurchaseDate')
+        portfolio.api_search_portfolio('g-1', gem_form='Rough')
+        assert upstream.get.call_count == 2
+
+        upstream.get.return_value = MagicMock(status_code=500, text='boom')
+        assert portfolio.api_get_holdings_by_form('g-1') == []
+        assert portfolio.api_get_holdings_by_form('g-1') == []
+        assert upstream.get.call_count == 4
+
+
+def test_ttl_expiry_refetches(upstream):
+    app.config['HOLDINGS_CACHE_TTL'] = 0
+    try:
+        with app.app_context():
+            portfolio.api_get_holdings('g-1')
+            portfolio.api_get_holdings('g-1')
+    finally:
+        app.config['HOLDINGS_CACHE_TTL'] = 60
+    assert upstream.get.call_count == 2
+
+
+def _run_concurrently(*calls):
+    threads = [threading.Thread(target=call) for call in calls]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return time.monotonic() - started
+
+
+def test_misses_for_different_keys_fetch_in_parallel():
+    cache = holdings_cache.HoldingsCache()
+
+    def slow(value):
+        time.sleep(0.3)
+        return value
+
+    elapsed = _run_concurrently(*[
+        (lambda key=key: cache.get('g-1', key, lambda: slow(key), 60)) for key in ('a', 'b', 'c')])
+    assert elapsed < 0.6
+    assert cache.misses == 3
+
+
+def test_concurrent_misses_for_one_key_share_a_fetch():
+    cache = holdings_cache.HoldingsCache()
+    calls = []
+    results = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'v'
+
+    _run_concurrently(*[(lambda: results.append(cache.get('g-1', 'a', fetch, 60))) for _ in range(5)])
+    assert len(calls) == 1
+    assert results == ['v'] * 5
+
+
+def test_fetch_finishing_after_an_invalidation_is_not_cached():
+    cache = holdings_cache.HoldingsCache()
+    started = threading.Event()
+
+    def fetch():
+        started.set()
+        time.sleep(0.2)
+        return 'stale'
+
+    t = threading.Thread(target=lambda: cache.get('g-1', 'a', fetch, 60))
+    t.start()
+    started.wait(1)
+    cache.invalidate('g-1')
+    assert cache.get('g-1', 'a', lambda: 'fresh', 60) == 'fresh'
+    t.join(5)
+    assert cache.get('g-1', 'a', lambda: 'refetched', 60) == 'fresh'
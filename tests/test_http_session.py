@@ -0,0 +1,31 @@
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import api_client
+
+
+def test_endpoint_classification():
+    base = 'https://api.preciousstone.info'
+    assert api_client.endpoint_name(f'{base}/api/v2/gems') == 'catalog'
+    assert api_client.endpoint_name(f'{base}/api/v2/gem-pricing-page/12') == 'pricing'
+    assert api_client.endpoint_name(f'{base}/api/v2/listings-view/filtered') == 'listings'
+    assert api_client.endpoint_name(f'{base}/api/v2/users/abc/gem-holdings') == 'holdings'
+    assert api_client.endpoint_name(f'{base}/api/v2/gem-holdings/5') == 'holdings'
+    assert api_client.endpoint_name(f'{base}/api/v2/users/abc/gem-preferences/3') == 'preferences'
+    assert api_client.endpoint_name(f'{base}/api/v2/something-else') == 'default'
+
+
+def test_session_applies_endpoint_timeout_when_not_given():
+    session = api_client.GemdbSession(pool_size=2, timeouts=api_client._parse_timeouts('pricing:2.5'))
+    with patch('requests.Session.send', return_value=MagicMock(status_code=200)) as send:
+        session.get('https://api.preciousstone.info/api/v2/gem-pricing-page/1')
+        assert send.call_args.kwargs['timeout'] == 2.5
+        session.get('https://api.preciousstone.info/api/v2/gem-pricing-page/1', timeout=1)
+        assert send.call_args.kwargs['timeout'] == 1
+
+
+def test_get_session_is_shared():
+    assert api_client.get_session() is api_client.get_session()
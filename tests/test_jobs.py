@@ -0,0 +1,109 @@
+import glob
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from utils import jobs
+from utils.jobs import JobError, JobQueue
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _wait(queue, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in (jobs.DONE, jobs.FAILED):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def test_job_reports_progress_and_result(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'))
+    release = threading.Event()
+
+    def handler(job):
+        job.progress(0.5, 'halfway')
+        release.wait(5)
+        return {'size': len(job.input), 'name': job.params['name']}
+
+    queue.register('echo', handler)
+    queue.start(app, workers=1)
+    job_id = queue.submit('echo', 'g-1', b'abc', {'name': 'x.pdf'})
+
+    deadline = time.monotonic() + 5
+    while queue.get(job_id)['progress'] < 0.5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    running = queue.get(job_id)
+    assert running['status'] == jobs.RUNNING
+    assert running['message'] == 'halfway'
+
+    release.set()
+    done = _wait(queue, job_id)
+    assert done['progress'] == 1
+    assert done['result'] == {'size': 3, 'name': 'x.pdf'}
+    assert queue.get(job_id, owner='g-2') is None
+
+
+def test_failures_are_recorded(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'))
+
+    def handler(job):
+        raise JobError('bad invoice')
+
+    queue.register('fail', handler)
+    queue.start(app, workers=1)
+    job = _wait(queue, queue.submit('fail', 'g-1', b''))
+    assert job['status'] == jobs.FAILED
+    assert job['error'] == 'bad invoice'
+
+
+def test_results_and_unfinished_jobs_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    first = JobQueue(path)
+    first.register('echo', lambda job: job.input.decode())
+    first.start(app, workers=1)
+    done_id = first.submit('echo', 'g-1', b'done')
+    _wait(first, done_id)
+
+    # A job queued by a process that stopped before running it
+    first._executor.shutdown(wait=True)
+    first._executor = MagicMock()
+    pending_id = first.submit('echo', 'g-1', b'pending')
+
+    second = JobQueue(path)
+    second.register('echo', lambda job: job.input.decode())
+    second.start(app, workers=1)
+    assert second.get(done_id)['result'] == 'done'
+    assert _wait(second, pending_id)['result'] == 'pending'
+
+
+def test_gra_pdf_job_endpoints():
+    pdf_path = sorted(glob.glob(os.path.join(ROOT, 'UnneededContent', 'invoice-*.pdf')))[0]
+    user = MagicMock(google_id='g-1')
+    client = app.test_client()
+    with patch('routes.portfolio.load_current_user', return_value=user), \
+            patch('routes.portfolio.api_get_listing_details', return_value=None), \
+            patch('routes.portfolio.get_gems_from_api', return_value=None), \
+            patch('routes.portfolio.api_get_gem_types', return_value=[]):
+        with open(pdf_path, 'rb') as f:
+            rv = client.post('/portfolio/gra-pdf-jobs', data={'pdf_file': (f, 'invoice.pdf')},
+                             content_type='multipart/form-data')
+        assert rv.status_code == 202
+        status_url = rv.get_json()['status_url']
+        job_id = rv.get_json()['job_id']
+
+        _wait(jobs._queue, job_id)
+        job = client.get(status_url).get_json()
+        assert job['status'] == 'done'
+        assert job['result']['invoice_number']
+        assert job['result']['items']
+
+    with patch('routes.portfolio.load_current_user', return_value=MagicMock(google_id='g-2')):
+        assert client.get(status_url).status_code == 404
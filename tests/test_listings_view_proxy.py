@@ -6,7 +6,7 @@ from flask import url_for
 def test_google_user_id_forwarded(monkeypatch):
     captured = {}
 
-    def fake_get(url, params=None, headers=None, timeout=None):
+    def fake_get(self, url, params=None, headers=None, timeout=None):
         captured['url'] = url
         captured['params'] = params or {}
         class FakeResp:
@@ -15,8 +15,8 @@ def test_google_user_id_forwarded(monkeypatch):
                 return {'items': [{'id': 1, 'weight': 2.0, 'price': 100, 'listing_title': 'Test', 'seller_nickname': 'Seller', 'listing_url': 'http://example.com/1', 'gem_type_name': 'Ruby'}]}
         return FakeResp()
 
-    # patch requests.get used by the proxy
-    monkeypatch.setattr(requests, 'get', fake_get)
+    # patch the pooled session's get used by the proxy
+    monkeypatch.setattr(requests.Session, 'get', fake_get)
     from app import app
     client = app.test_client()
     resp = client.get('/api/v1/listings-view/?gem=Ruby&google_user_id=abc123')
@@ -37,7 +37,7 @@ def test_title_and_seller_url_synthesis_and_price(monkeypatch):
     """The proxy should synthesize product and seller URLs and format price if necessary"""
     captured = {}
 
-    def fake_get(url, params=None, headers=None, timeout=None):
+    def fake_get(self, url, params=None, headers=None, timeout=None):
         captured['url'] = url
         captured['params'] = params or {}
         class FakeResp:
@@ -46,7 +46,7 @@ def test_title_and_seller_url_synthesis_and_price(monkeypatch):
                 return {'items': [{'id': 123, 'weight': '0.85', 'price': 100, 'listing_title': 'Test Gem! & Other', 'seller_nickname': 'John Smith', 'listing_url': None, 'seller_profile': None, 'gem_type_name': 'Ruby'}]}
         return FakeResp()
 
-    monkeypatch.setattr(requests, 'get', fake_get)
+    monkeypatch.setattr(requests.Session, 'get', fake_get)
     from app import app
     client = app.test_client()
     resp = client.get('/api/v1/listings-view/?gem=Ruby')
@@ -0,0 +1,80 @@
+import glob
+import json
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from utils import jobs
+from utils.parse_trace import ParseTrace, start_trace
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SAMPLE = os.path.join(ROOT, 'UnneededContent', 'invoice-996687.pdf')
+
+
+@pytest.fixture
+def trace_dir(tmp_path):
+    app.config['PDF_TRACE_DIR'] = str(tmp_path)
+    yield tmp_path
+    app.config['PDF_TRACE_DIR'] = ''
+    app.config['PDF_TRACE'] = 'off'
+
+
+def test_events_are_buffered_until_flush(tmp_path):
+    trace = ParseTrace('job-1/../x', directory=str(tmp_path))
+    trace('page', page=1, text='Ruby')
+    trace('item', product_id='7')
+    assert list(tmp_path.iterdir()) == []
+    path = trace.flush()
+    assert os.path.dirname(path) == str(tmp_path)
+    with open(path) as f:
+        events = [json.loads(line) for line in f]
+    assert [e['event'] for e in events] == ['page', 'item']
+    assert events[0]['text'] == 'Ruby'
+
+
+def test_modes(trace_dir):
+    with app.app_context():
+        assert start_trace('a', requested=True) is None
+        app.config['PDF_TRACE'] = 'request'
+        assert start_trace('a') is None
+        assert start_trace('a', requested=True) is not None
+        app.config['PDF_TRACE'] = 'all'
+        assert start_trace('a') is not None
+
+
+def _run_job(client, data):
+    with open(SAMPLE, 'rb') as f:
+        rv = client.post('/portfolio/gra-pdf-jobs', data={'pdf_file': (f, 'invoice.pdf'), **data},
+                         content_type='multipart/form-data')
+    job_id = rv.get_json()['job_id']
+    deadline = time.monotonic() + 10
+    while jobs.get_job(job_id)['status'] not in ('done', 'failed'):
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    return job_id
+
+
+@pytest.mark.skipif(not glob.glob(SAMPLE), reason='sample invoice not available')
+def test_jobs_write_a_trace_file_only_when_asked(trace_dir):
+    app.config['PDF_TRACE'] = 'request'
+    client = app.test_client()
+    with patch('routes.portfolio.load_current_user', return_value=MagicMock(google_id='g-1')), \
+            patch('routes.portfolio.api_get_listing_details', return_value=None), \
+            patch('routes.portfolio.get_gems_from_api', return_value=None), \
+            patch('routes.portfolio.api_get_gem_types', return_value=[]):
+        _run_job(client, {})
+        assert list(trace_dir.iterdir()) == []
+        job_id = _run_job(client, {'trace': '1'})
+
+    with open(trace_dir / f'job-{job_id}.jsonl') as f:
+        events = [json.loads(line) for line in f]
+    kinds = [e['event'] for e in events]
+    assert kinds.count('page') == 2
+    assert kinds.count('item') == 5
+    assert {'block', 'title', 'listing'} <= set(kinds)
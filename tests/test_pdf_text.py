@@ -0,0 +1,65 @@
+import glob
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import pdf_text
+from utils.pdf_text import iter_page_texts, spool_upload
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+TWO_PAGE_PDF = os.path.join(ROOT, 'UnneededContent', 'invoice-996687.pdf')
+
+
+def test_spooled_upload_is_written_to_disk(tmp_path):
+    from werkzeug.datastructures import FileStorage
+
+    # Imported here: pool workers import this module to run _die, and must not import the app
+    from app import app
+
+    app.config['UPLOAD_SPOOL_DIR'] = str(tmp_path)
+    try:
+        with app.app_context():
+            path = spool_upload(FileStorage(io.BytesIO(b'%PDF-1.4 test'), 'x.pdf'))
+    finally:
+        app.config.pop('UPLOAD_SPOOL_DIR')
+    assert os.path.dirname(path) == str(tmp_path)
+    with open(path, 'rb') as f:
+        assert f.read() == b'%PDF-1.4 test'
+    pdf_text.discard(path)
+    pdf_text.discard(path)
+    assert not os.path.exists(path)
+
+
+@pytest.mark.skipif(not glob.glob(TWO_PAGE_PDF), reason='sample invoice not available')
+def test_parallel_extraction_matches_in_process(monkeypatch):
+    sequential = list(iter_page_texts(TWO_PAGE_PDF, workers=1))
+    monkeypatch.setattr(pdf_text, 'PDF_PARALLEL_MIN_PAGES', 1)
+    monkeypatch.setattr(pdf_text, 'PAGES_PER_TASK', 1)
+    parallel = list(iter_page_texts(TWO_PAGE_PDF, workers=2))
+    assert parallel == sequential
+    assert [(n, count) for n, count, _ in parallel] == [(1, 2), (2, 2)]
+    assert 'Product ID: 1698413' in parallel[0][2]
+    assert '\x00' not in parallel[1][2]
+
+
+def _die(path, start, stop):
+    os._exit(1)
+
+
+@pytest.mark.skipif(not glob.glob(TWO_PAGE_PDF), reason='sample invoice not available')
+def test_broken_pool_finishes_in_process_and_is_replaced(monkeypatch):
+    sequential = list(iter_page_texts(TWO_PAGE_PDF, workers=1))
+    monkeypatch.setattr(pdf_text, 'PDF_PARALLEL_MIN_PAGES', 1)
+    monkeypatch.setattr(pdf_text, 'PAGES_PER_TASK', 1)
+    monkeypatch.setattr(pdf_text, '_extract_pages', _die)
+    assert list(iter_page_texts(TWO_PAGE_PDF, workers=2)) == sequential
+    assert pdf_text._pool is None
+
+    monkeypatch.undo()
+    monkeypatch.setattr(pdf_text, 'PDF_PARALLEL_MIN_PAGES', 1)
+    monkeypatch.setattr(pdf_text, 'PAGES_PER_TASK', 1)
+    assert list(iter_page_texts(TWO_PAGE_PDF, workers=2)) == sequential
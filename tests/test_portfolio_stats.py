@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from routes.portfolio import summarize_portfolio
+from utils import holdings_cache
+
+
+HOLDINGS = [
+    {'AssetId': 1, 'GemForm': 'Faceted', 'PotentialValue': 500},
+    {'AssetId': 2, 'GemForm': 'Cabochon', 'PotentialValue': 100},
+    {'AssetId': 3, 'GemForm': 'Rough', 'PotentialValue': 40},
+    {'AssetId': 4, 'GemForm': 'Specimen', 'PotentialValue': None},
+]
+
+FORM_REPORT = [
+    {'GemForm': 'Faceted', 'Items': 1, 'TotalCost': 300, 'TotalFacetedCarats': 2.5, 'TotalShippingCost': 10},
+    {'GemForm': 'Cabochon', 'Items': 1, 'TotalCost': 50, 'TotalFacetedCarats': 4, 'TotalShippingCost': 5},
+    {'GemForm': 'Rough', 'Items': 1, 'TotalCost': 20, 'TotalRoughCarats': 30, 'TotalShippingCost': None},
+    {'GemForm': 'Specimen', 'Items': 1, 'TotalCost': 15, 'TotalRoughCarats': 12},
+]
+
+
+def test_summary_totals():
+    stats = summarize_portfolio(HOLDINGS, FORM_REPORT)
+    assert stats['total_items'] == 4
+    assert stats['total_cost'] == stats['total_invested'] == 385
+    assert stats['faceted_invested'] == 350
+    assert stats['rough_invested'] == 35
+    assert stats['faceted_carats'] == 6.5
+    assert stats['rough_carats'] == 42
+    assert stats['total_shipping'] == 15
+    assert stats['total_potential'] == 640
+    assert stats['faceted_potential'] == 600
+    assert stats['rough_potential'] == 40
+
+
+def test_summary_of_an_empty_portfolio():
+    stats = summarize_portfolio([], [])
+    assert stats['total_shipping'] == 0
+    assert stats['total_cost'] == 0
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    holdings_cache.invalidate_user()
+    yield
+    holdings_cache.invalidate_user()
+
+
+def _slow_session(delay=0.3):
+    """A fake upstream session whose every GET takes `delay` seconds."""
+    def get(url, headers=None, params=None, **kwargs):
+        time.sleep(delay)
+        if url.endswith('/gem-holdings'):
+            body = HOLDINGS
+        elif url.endswith('/by-form'):
+            body = FORM_REPORT
+        else:
+            body = []
+        return MagicMock(status_code=200, json=lambda: list(body), text='')
+
+    session = MagicMock()
+    session.get.side_effect = get
+    return session
+
+
+def test_stats_page_fetches_reports_concurrently():
+    # Goes through the real api_get_* functions and the per-user holdings cache
+    user = MagicMock(google_id='g-1')
+    session = _slow_session()
+    with patch('routes.portfolio.load_current_user', return_value=user), \
+            patch('routes.portfolio.load_api_key', return_value='k'), \
+            patch('routes.portfolio.get_session', return_value=session), \
+            patch('utils.holdings_cache.get_session', return_value=session):
+        started = time.monotonic()
+        rv = app.test_client().get('/portfolio/stats')
+        elapsed = time.monotonic() - started
+    assert rv.status_code == 200
+    assert session.get.call_count == 3
+    assert elapsed < 0.8
+
+
+def test_stats_page_renders_when_a_report_fails():
+    user = MagicMock(google_id='g-1')
+    with patch('routes.portfolio.load_current_user', return_value=user), \
+            patch('routes.portfolio.api_get_holdings', return_value=HOLDINGS), \
+            patch('routes.portfolio.api_get_holdings_by_form', side_effect=RuntimeError('down')), \
+            patch('routes.portfolio.api_get_holdings_by_gem_type', return_value=None):
+        rv = app.test_client().get('/portfolio/stats')
+    assert rv.status_code == 200
@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from utils import db, gem_attributes, rankings
+from utils.catalog_index import get_catalog_index
+
+
+CATALOG = [
+    {'GemTypeId': 1, 'GemTypeName': 'Ruby', 'MineralGroup': 'Corundum Group', 'HardnessRange': '9',
+     'RarityLevel': 'Unique Geological', 'AvailabilityLevel': 'Collectors Market',
+     'InvestmentAppropriatenessLevel': 'Blue Chip Investment Gems', 'PriceRange': '$1,000 - $15,000 per carat'},
+    {'GemTypeId': 2, 'GemTypeName': 'Quartz', 'MineralGroup': 'Quartz Group', 'HardnessRange': '7',
+     'RarityLevel': 'Abundant Minerals', 'AvailabilityLevel': 'Consistently Available',
+     'InvestmentAppropriatenessLevel': 'Non-Investment Gems', 'PriceRange': '$5 - $20 per carat'},
+]
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / 'portfolio.db')
+    monkeypatch.setattr(db, 'DB_PATH', path)
+    yield path
+    gem_attributes._mirrors.pop(path, None)
+    db.close_thread_connections()
+
+
+def test_compute_rankings_scores_and_tiers():
+    gems = rankings.compute_rankings(get_catalog_index(CATALOG))
+    assert [g['name'] for g in gems] == ['Ruby', 'Quartz']
+    ruby, quartz = gems
+    # 85*.25 + 85*.25 + 100*.25 + 85*.125 (Very Hard) + 85*.125 (max $15,000 -> SUPER-PREMIUM)
+    assert ruby['composite'] == 88.75
+    assert ruby['tier'] == 'VERY BULLISH'
+    assert quartz['tier'] == 'VERY BEARISH'
+    assert ruby['mineral_group'] == 'Corundum Group'
+
+
+def test_persist_is_one_upsert_and_refreshes_the_mirror(db_path):
+    gems = rankings.compute_rankings(get_catalog_index(CATALOG))
+    rankings.persist_rankings(gems)
+    assert gem_attributes.get_gem_attributes().get('Ruby')['tier'] == 'VERY BULLISH'
+
+    gems[0]['tier'] = 'NEUTRAL'
+    rankings.persist_rankings(gems)
+    attrs = gem_attributes.get_gem_attributes()
+    assert attrs.get('Ruby')['tier'] == 'NEUTRAL'
+    assert len(attrs) == 2
+
+
+def test_rankings_page_only_reads_precomputed_results(db_path):
+    rankings.persist_rankings(rankings.compute_rankings(get_catalog_index(CATALOG)))
+    with patch('utils.rankings.get_gems_from_api', side_effect=AssertionError('computed in request')), \
+            patch('utils.rankings.persist_rankings', side_effect=AssertionError('written in request')):
+        rv = app.test_client().get('/investments/investment-rankings')
+    assert rv.status_code == 200
+    assert rv.data.index(b'Ruby') < rv.data.index(b'Quartz')
+
+
+def test_catalog_change_wakes_the_job(db_path):
+    job = rankings._job
+    runs = job.runs
+    assert job.wait(job.request(CATALOG), 5)
+    assert job.runs == runs + 1
+    assert job.last_rows == 2
+    assert gem_attributes.get_gem_attributes().get('Quartz') is not None
+
+
+def test_skipped_runs_wake_waiters_and_later_views_do_not_block(db_path, monkeypatch):
+    job = rankings.RankingsJob()
+    job.start(app, 0)
+    monkeypatch.setattr(rankings, '_job', job)
+    with patch('utils.rankings.get_gems_from_api', return_value=None):
+        started = time.monotonic()
+        rankings.request_rankings_refresh(wait_seconds=5)
+        assert time.monotonic() - started < 1
+        assert job.skipped == 1
+        assert job.last_run_empty
+
+        with patch.object(job, 'wait', side_effect=AssertionError('waited again')):
+            rankings.request_rankings_refresh(wait_seconds=5)
+
+
+def test_wait_sees_a_run_that_finished_before_it_was_called(db_path):
+    job = rankings.RankingsJob()
+    job.start(app, 0)
+    ticket = job.request(CATALOG)
+    deadline = time.monotonic() + 5
+    while job.runs == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    started = time.monotonic()
+    assert job.wait(ticket, 5)
+    assert time.monotonic() - started < 0.5
+
+
+def test_persisting_new_rankings_drops_cached_pages(db_path):
+    rankings.persist_rankings(rankings.compute_rankings(get_catalog_index(CATALOG)))
+    client = app.test_client()
+    with patch('utils.api_client.get_catalog_version', return_value=7), \
+            patch('utils.response_cache.get_catalog_version', return_value=7):
+        assert b'VERY BULLISH' in client.get('/investments/investment-rankings').data
+        gems = rankings.compute_rankings(get_catalog_index(CATALOG))
+        gems[0]['tier'] = 'NEUTRAL'
+        rankings.persist_rankings(gems)
+        page = client.get('/investments/investment-rankings').data
+    assert b'VERY BULLISH' not in page
+    assert b'NEUTRAL' in page
@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from utils.response_cache import CachedPage, ResponseCache
+
+
+CATALOG = [{'GemTypeName': 'Ruby', 'MineralGroup': 'Corundum Group', 'RarityLevel': 'Limited Occurrence'}]
+
+
+def _page(body):
+    return CachedPage(body=body, headers=[], etag='x', last_modified=datetime.now(timezone.utc),
+                      stored_at=time.monotonic())
+
+
+def test_lru_is_bounded_by_body_bytes():
+    cache = ResponseCache(max_bytes=10)
+    cache.put('a', _page(b'12345'))
+    cache.put('b', _page(b'12345'))
+    assert cache.get('a', ttl=0) is not None  # 'a' becomes most recently used
+    cache.put('c', _page(b'12345'))
+    assert cache.get('b', ttl=0) is None
+    assert cache.get('a', ttl=0) is not None
+    cache.put('huge', _page(b'x' * 11))
+    assert cache.get('huge', ttl=0) is None
+    assert cache.stats()['bytes'] == 10
+    assert cache.stats()['evictions'] == 1
+
+
+@patch('routes.gems.get_gems_from_api', return_value=CATALOG)
+def test_anonymous_pages_are_cached_and_revalidated(mock_api):
+    client = app.test_client()
+    first = client.get('/gems/by-rarity')
+    assert first.status_code == 200
+    assert first.headers['X-Cache'] == 'MISS'
+    assert first.headers.get('ETag')
+    assert first.headers.get('Last-Modified')
+
+    second = client.get('/gems/by-rarity')
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.data == first.data
+    assert mock_api.call_count == 1
+
+    revalidated = client.get('/gems/by-rarity', headers={'If-None-Match': first.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+
+    # A different query string is a different page
+    assert client.get('/gems/by-rarity?sort=name').headers['X-Cache'] == 'MISS'
+
+
+@patch('routes.gems.get_gems_from_api', return_value=CATALOG)
+def test_signed_in_sessions_bypass_the_cache(mock_api):
+    client = app.test_client()
+    client.get('/gems/by-rarity')
+    with client.session_transaction() as sess:
+        sess['google_id'] = 'test-google-123'
+    rv = client.get('/gems/by-rarity')
+    assert rv.status_code == 200
+    assert 'X-Cache' not in rv.headers
+    assert mock_api.call_count == 2
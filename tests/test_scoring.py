@@ -0,0 +1,67 @@
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from utils.catalog_index import get_catalog_index
+from utils.rankings import compute_rankings
+from utils.scoring import DEFAULT_WEIGHTS, ScoreMatrix, get_score_matrix, normalize_weights
+
+
+CATALOG = [
+    {'GemTypeId': 1, 'GemTypeName': 'Ruby', 'MineralGroup': 'Corundum Group', 'HardnessLevel': 9,
+     'RarityLevel': 'Unique Geological', 'AvailabilityLevel': 'Collectors Market',
+     'InvestmentAppropriatenessLevel': 'Blue Chip Investment Gems', 'PriceRange': '$1,000 - $15,000 per carat'},
+    {'GemTypeId': 2, 'GemTypeName': 'Tanzanite', 'MineralGroup': 'Epidote Group', 'HardnessRange': '6-7',
+     'RarityLevel': 'Singular Occurrence', 'AvailabilityLevel': 'Limited Supply',
+     'InvestmentAppropriatenessLevel': 'Speculative Collector Gems', 'PriceRange': '$300 - $1,200 per carat'},
+    {'GemTypeId': 3, 'GemTypeName': 'Quartz', 'MineralGroup': 'Quartz Group', 'HardnessRange': '7',
+     'RarityLevel': 'Abundant Minerals', 'AvailabilityLevel': 'Consistently Available',
+     'InvestmentAppropriatenessLevel': 'Non-Investment Gems', 'PriceRange': '$5 - $20 per carat'},
+]
+
+
+def test_components_are_stored_by_column():
+    matrix = ScoreMatrix(get_catalog_index(CATALOG))
+    assert matrix.names == ('Ruby', 'Tanzanite', 'Quartz')
+    assert matrix.columns['geological_rarity'] == (85, 100, 35)
+    assert matrix.columns['hardness'] == (85, 10, 25)
+    assert matrix.columns['price'] == (85, 65, 5)
+
+
+def test_default_and_alternative_weights():
+    matrix = ScoreMatrix(get_catalog_index(CATALOG))
+    assert [s.name for s in matrix.rank()] == ['Ruby', 'Tanzanite', 'Quartz']
+    assert matrix.composites() is matrix.composites(DEFAULT_WEIGHTS)
+
+    rarity_only = matrix.rank({'geological_rarity': 1})
+    assert [s.name for s in rarity_only] == ['Tanzanite', 'Ruby', 'Quartz']
+    assert rarity_only[0].composite == 100
+    assert rarity_only[0].tier == 'VERY BULLISH'
+    # Weight vectors are normalized, so scaling them does not change the result
+    assert matrix.composites([2, 2, 2, 1, 1]) == matrix.composites()
+
+
+@pytest.mark.parametrize('weights', [[1, 1], [-1, 1, 1, 1, 1], [0, 0, 0, 0, 0], {'luster': 1}, ['a'] * 5])
+def test_invalid_weights_are_rejected(weights):
+    with pytest.raises(ValueError):
+        normalize_weights(weights)
+
+
+@patch('routes.gems._fetch_related_gems', return_value=[])
+@patch('routes.gems._fetch_gem_pricing', return_value={})
+@patch('routes.gems.get_gems_from_api', return_value=CATALOG)
+def test_profile_and_rankings_report_the_same_score(mock_api, mock_pricing, mock_related):
+    index = get_catalog_index(CATALOG)
+    ranked = {g['name']: g for g in compute_rankings(index)}
+    expected = get_score_matrix(index).score('Tanzanite')
+    assert ranked['Tanzanite']['composite'] == expected.composite
+
+    rv = app.test_client().get('/gems/gem/tanzanite')
+    assert rv.status_code == 200
+    assert f'>{expected.composite}<'.encode() in rv.data
+    assert expected.tier.encode() in rv.data
@@ -0,0 +1,26 @@
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from utils import holdings_cache
+from utils.settings import get_setting
+
+
+def test_config_then_environment_then_default(monkeypatch):
+    monkeypatch.setenv('GEMS_TEST_SETTING', 'from-env')
+    assert get_setting('GEMS_TEST_SETTING', 'default') == 'from-env'
+    with app.app_context(), patch.dict(app.config, {'GEMS_TEST_SETTING': 'from-config'}):
+        assert get_setting('GEMS_TEST_SETTING', 'default') == 'from-config'
+    monkeypatch.setenv('GEMS_TEST_SETTING', '')
+    assert get_setting('GEMS_TEST_SETTING', 'default') == 'default'
+
+
+def test_explicit_zero_is_not_replaced_by_the_default(monkeypatch):
+    with app.app_context(), patch.dict(app.config, {'HOLDINGS_CACHE_TTL': None}):
+        monkeypatch.setenv('HOLDINGS_CACHE_TTL', '0')
+        assert holdings_cache._ttl() == 0
+    with app.app_context(), patch.dict(app.config, {'HOLDINGS_CACHE_TTL': 0}):
+        assert holdings_cache._ttl() == 0
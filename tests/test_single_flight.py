@@ -0,0 +1,59 @@
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import api_client
+
+
+class FakeResp:
+    status_code = 200
+    text = ''
+
+    def json(self):
+        return [{'GemTypeName': 'Ruby'}]
+
+
+def test_concurrent_identical_fetches_share_one_request():
+    calls = []
+
+    def slow_get(url, params=None, headers=None, timeout=None):
+        calls.append((url, params))
+        time.sleep(0.2)
+        return FakeResp()
+
+    results = []
+    with patch('requests.Session.get', side_effect=slow_get):
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                api_client._fetch_json('http://upstream/api/v2/gems', params={'limit': 1000})))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+
+    assert len(calls) == 1
+    assert len(results) == 8
+    assert all(r is results[0] for r in results)
+
+
+def test_different_params_are_not_coalesced():
+    with patch('requests.Session.get', return_value=FakeResp()) as get:
+        api_client._fetch_json('http://upstream/api/v2/gems', params={'limit': 10})
+        api_client._fetch_json('http://upstream/api/v2/gems', params={'limit': 20})
+    assert get.call_count == 2
+
+
+def test_errors_are_propagated_to_the_caller():
+    with patch('requests.Session.get', side_effect=ValueError('boom')):
+        try:
+            api_client._fetch_json('http://upstream/api/v2/gems')
+        except ValueError as e:
+            assert str(e) == 'boom'
+        else:
+            raise AssertionError('expected ValueError')
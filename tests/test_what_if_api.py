@@ -0,0 +1,59 @@
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from utils.catalog_index import get_catalog_index
+from utils.scoring import get_score_matrix
+
+
+CATALOG = [
+    {'GemTypeId': 1, 'GemTypeName': 'Ruby', 'MineralGroup': 'Corundum Group', 'HardnessLevel': 9,
+     'RarityLevel': 'Unique Geological', 'AvailabilityLevel': 'Collectors Market',
+     'InvestmentAppropriatenessLevel': 'Blue Chip Investment Gems', 'PriceRange': '$1,000 - $15,000 per carat'},
+    {'GemTypeId': 2, 'GemTypeName': 'Tanzanite', 'MineralGroup': 'Epidote Group', 'HardnessRange': '6-7',
+     'RarityLevel': 'Singular Occurrence', 'AvailabilityLevel': 'Limited Supply',
+     'InvestmentAppropriatenessLevel': 'Speculative Collector Gems', 'PriceRange': '$300 - $1,200 per carat'},
+]
+
+
+@patch('routes.api.get_gems_from_api', return_value=CATALOG)
+def test_default_weights_match_the_rankings(mock_api):
+    rv = app.test_client().get('/api/v1/rankings/what-if')
+    assert rv.status_code == 200
+    data = rv.get_json()
+    assert data['weights']['geological_rarity'] == 0.25
+    assert [g['name'] for g in data['gems']] == ['Ruby', 'Tanzanite']
+    assert data['gems'][0]['rank'] == 1
+    assert data['gems'][0]['composite'] == get_score_matrix(get_catalog_index(CATALOG)).score('Ruby').composite
+
+
+@patch('routes.api.get_gems_from_api', return_value=CATALOG)
+def test_custom_weights_reorder_and_are_memoized(mock_api):
+    client = app.test_client()
+    matrix = get_score_matrix(get_catalog_index(CATALOG))
+    misses = matrix.memo_misses
+
+    rv = client.post('/api/v1/rankings/what-if', json={'weights': {'geological_rarity': 1}, 'limit': 1})
+    data = rv.get_json()
+    assert [g['name'] for g in data['gems']] == ['Tanzanite']
+    assert data['count'] == 2
+    assert data['gems'][0]['tier'] == 'VERY BULLISH'
+
+    # Same vector, different scale and transport: served from the memo
+    rv = client.get('/api/v1/rankings/what-if?weights=3,0,0,0,0')
+    assert rv.get_json()['gems'][0]['name'] == 'Tanzanite'
+    assert matrix.memo_misses == misses + 1
+    assert matrix.memo_hits >= 1
+
+
+@patch('routes.api.get_gems_from_api', return_value=CATALOG)
+def test_invalid_weights_are_a_400(mock_api):
+    client = app.test_client()
+    assert client.get('/api/v1/rankings/what-if?weights=1,2').status_code == 400
+    assert client.post('/api/v1/rankings/what-if', json={'weights': {'luster': 1}}).status_code == 400
+    rv = client.get('/api/v1/rankings/what-if?price=-1')
+    assert rv.status_code == 400
+    assert 'price' in rv.get_json()['components']
@@ -5,7 +5,14 @@ Provides a minimal wrapper to fetch gem metadata from the shared gemdb API.
 import requests
 import logging
 import os
+import re
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
 from flask import current_app
+from utils.settings import get_setting
 
 logger = logging.getLogger(__name__)
 
@@ -16,13 +23,6 @@ def _get_secret_from_gcp(secret_id: str = 'gemdb-api-keys') -> str:
         from google.cloud import secretmanager
     except Exception:
         return None
-
-
-def _get_key_from_gemhunter_config(preferred_app_name: str = 'gems_hub') -> str | None:
-    """Deprecated: gemhunter config fallback removed. This function intentionally returns None.
-    Gems app now reads keys from gems/config.json as a local config fallback instead.
-    """
-    return None
     project_id = os.environ.get('GCP_PROJECT_ID')
     if not project_id:
         return None
@@ -35,96 +35,694 @@ def _get_key_from_gemhunter_config(preferred_app_name: str = 'gems_hub') -> str
         return None
 
 
-def load_api_key(preferred_app_name: str = 'gems_hub') -> str | None:
-    """Load API key by checking: app config -> Secret Manager -> environment variable.
+def _get_key_from_gemhunter_config(preferred_app_name: str = 'gems_hub') -> str | None:
+    """Deprecated: gemhunter config fallback removed. This function intentionally returns None.
+    Gems app now reads keys from gems/config.json as a local config fallback instead.
+    """
+    return None
 
-    If Secret Manager secret contains comma-separated pairs of app:key, the function tries to
-    pick a pair with app == preferred_app_name. Otherwise, if secret contains a single value,
-    it is interpreted as a raw key.
+
+def _pick_app_key(raw, preferred_app_name: str) -> str:
+    """Pick a key from a raw value that is either a single key or an 'app:key,app2:key2' map.
+
+    The entry for preferred_app_name wins; otherwise the first mapped key, otherwise the raw value.
     """
-    # 1) current_app config takes precedence when available
+    raw = str(raw)
     try:
-        cfg_key = current_app.config.get('GEMDB_API_KEY')
-        if cfg_key:
-            # If configuration contains a comma-separated mapping (app:key,app2:key2), pick the preferred app
-            try:
-                entries = [e.strip() for e in str(cfg_key).split(',') if e.strip()]
-                for entry in entries:
-                    if ':' in entry:
-                        appname, key = entry.split(':', 1)
-                        if appname.strip() == preferred_app_name:
-                            return key.strip()
-                # Not found or single value mapping
-                if entries and ':' in entries[0]:
-                    return entries[0].split(':', 1)[1].strip()
-                # Raw single key
-                return str(cfg_key).strip()
-            except Exception:
-                return str(cfg_key).strip()
+        entries = [e.strip() for e in raw.split(',') if e.strip()]
+        for entry in entries:
+            if ':' in entry:
+                appname, key = entry.split(':', 1)
+                if appname.strip() == preferred_app_name:
+                    return key.strip()
+        # Not found or single value mapping
+        if entries and ':' in entries[0]:
+            return entries[0].split(':', 1)[1].strip()
+        # Raw single key
+        return raw.strip()
     except Exception:
-        pass
+        return raw.strip()
+
+
+def _config_json_path() -> str:
+    return os.environ.get('GEMS_CONFIG_PATH') or os.path.join(os.path.dirname(__file__), '..', 'config.json')
+
+
+def _resolve_api_key(preferred_app_name: str, cfg_key):
+    """Resolve the API key the slow way: app config -> Secret Manager -> env -> config.json.
+
+    Returns (key, source) with source 'config', 'secret_manager', 'env' or 'config_json',
+    or (None, None) when no key is configured anywhere.
+    """
+    # 1) current_app config takes precedence when available
+    if cfg_key:
+        return _pick_app_key(cfg_key, preferred_app_name), 'config'
 
     # 2) Try Secret Manager
     secret_raw = _get_secret_from_gcp()
     if secret_raw:
-        # If it's a map like 'app:key,app2:key2', look for our application
-        try:
-            # Try parse as pairs
-            entries = [e.strip() for e in secret_raw.split(',') if e.strip()]
-            for entry in entries:
-                if ':' in entry:
-                    appname, key = entry.split(':', 1)
-                    if appname.strip() == preferred_app_name:
-                        return key.strip()
-            # not found, if the secret looks like 'app:key', return first key
-            if entries and ':' in entries[0]:
-                return entries[0].split(':', 1)[1].strip()
-            # Raw single key
-            return secret_raw.strip()
-        except Exception:
-            # fallback to treat as single key
-            return secret_raw.strip()
+        return _pick_app_key(secret_raw, preferred_app_name), 'secret_manager'
 
     # 3) fallback to ENV var
     # If env var contains mapping 'gems_hub:KEY,desktop_app:KEY2', parse and pick preferred_app_name
     env_val = os.environ.get('GEMDB_API_KEY') or os.environ.get('GEMHUNTER_API_KEY')
     if env_val:
-        try:
-            entries = [e.strip() for e in env_val.split(',') if e.strip()]
-            for entry in entries:
-                if ':' in entry:
-                    appname, key = entry.split(':', 1)
-                    if appname.strip() == preferred_app_name:
-                        return key.strip()
-            # not found, if the env looks like 'app:key', return first key
-            if entries and ':' in entries[0]:
-                return entries[0].split(':', 1)[1].strip()
-            # raw single key
-            return env_val.strip()
-        except Exception:
-            return env_val.strip()
+        return _pick_app_key(env_val, preferred_app_name), 'env'
+
     # 4) Developer convenience: if running locally, attempt to read a gems/config.json file if present.
     # This lets load_api_key work even outside a Flask app context (for tests or small scripts).
     try:
-        gems_cfg_path = os.environ.get('GEMS_CONFIG_PATH') or os.path.join(os.path.dirname(__file__), '..', 'config.json')
+        gems_cfg_path = _config_json_path()
         if os.path.exists(gems_cfg_path):
             import json
             with open(gems_cfg_path, 'r', encoding='utf-8') as f:
                 cfg = json.load(f)
             token = cfg.get('gemdb_api_token') or cfg.get('GEMDB_API_KEY') or cfg.get('gemdb_api_key')
             if token:
-                entries = [e.strip() for e in str(token).split(',') if e.strip()]
-                for entry in entries:
-                    if ':' in entry:
-                        appname, key = entry.split(':', 1)
-                        if appname.strip() == preferred_app_name:
-                            return key.strip()
-                if entries and ':' in entries[0]:
-                    return entries[0].split(':', 1)[1].strip()
-                return str(token).strip()
+                return _pick_app_key(token, preferred_app_name), 'config_json'
     except Exception:
         pass
-    return None
+    return None, None
+
+
+# Resolved credentials, keyed on the cheap inputs of the resolution (app name, config
+# value, env values, config.json path) -> (key, source, resolved_at). Secret Manager
+# and config.json are only consulted when an entry is missing or has been refreshed.
+_api_keys = {}
+_api_keys_lock = threading.Lock()
+# A failed resolution (no key found) is only remembered this long, so a key source
+# that was briefly unavailable at boot does not leave the worker keyless for good
+MISSING_KEY_RETRY_SECONDS = 30
+_api_key_listeners = []
+
+
+def _api_key_inputs(preferred_app_name: str):
+    try:
+        cfg_key = current_app.config.get('GEMDB_API_KEY') or None
+    except Exception:
+        cfg_key = None
+    return (preferred_app_name, cfg_key, os.environ.get('GEMDB_API_KEY'),
+            os.environ.get('GEMHUNTER_API_KEY'), os.environ.get('GEMS_CONFIG_PATH'))
+
+
+def resolve_api_key(preferred_app_name: str = 'gems_hub'):
+    """Return (key, source) for the GEMDB API, resolved once per process and then memoized.
+
+    Call refresh_api_key() after rotating the key in Secret Manager or config.json.
+    When no key was found, the sources are tried again after MISSING_KEY_RETRY_SECONDS.
+    """
+    inputs = _api_key_inputs(preferred_app_name)
+    resolved = _api_keys.get(inputs)
+    if resolved is not None and (resolved[0] is not None
+                                 or time.monotonic() - resolved[2] < MISSING_KEY_RETRY_SECONDS):
+        return resolved[0], resolved[1]
+    key, source = _resolve_api_key(preferred_app_name, inputs[1])
+    with _api_keys_lock:
+        if len(_api_keys) > 16:
+            _api_keys.clear()
+        _api_keys[inputs] = (key, source, time.monotonic())
+    return key, source
+
+
+def refresh_api_key():
+    """Forget resolved credentials so the next call re-reads every key source.
+
+    Registered rotation hooks (see add_api_key_listener) are called afterwards.
+    """
+    with _api_keys_lock:
+        _api_keys.clear()
+    for listener in list(_api_key_listeners):
+        try:
+            listener()
+        except Exception as e:
+            logger.warning(f"API key refresh listener failed: {e}")
+
+
+def add_api_key_listener(listener):
+    """Register a zero-argument callable run after every refresh_api_key()."""
+    if listener not in _api_key_listeners:
+        _api_key_listeners.append(listener)
+
+
+def _refresh_api_key_after_rejection(min_age: float = 60):
+    """Re-resolve credentials after the API rejected the key, at most once per min_age seconds."""
+    with _api_keys_lock:
+        resolved_at = [entry[2] for entry in _api_keys.values()]
+    if resolved_at and time.monotonic() - max(resolved_at) >= min_age:
+        logger.warning("GEMDB API rejected the API key; re-resolving credentials")
+        refresh_api_key()
+
+
+def load_api_key(preferred_app_name: str = 'gems_hub') -> str | None:
+    """Load API key by checking: app config -> Secret Manager -> environment variable -> config.json.
+
+    If Secret Manager secret contains comma-separated pairs of app:key, the function tries to
+    pick a pair with app == preferred_app_name. Otherwise, if secret contains a single value,
+    it is interpreted as a raw key. The result is memoized (see resolve_api_key).
+    """
+    return resolve_api_key(preferred_app_name)[0]
+
+
+# Default request timeouts (seconds) per GEMDB endpoint family. Override with
+# GEMDB_TIMEOUTS="name:seconds,name2:seconds" in config or the environment.
+_DEFAULT_TIMEOUTS = {
+    'catalog': 10,
+    'metadata': 10,
+    'pricing': 5,
+    'listings': 8,
+    'holdings': 10,
+    'preferences': 10,
+    'jewelry': 10,
+    'health': 5,
+    'default': 10,
+}
+
+# Ordered (endpoint name, path pattern) pairs used to classify GEMDB URLs
+_ENDPOINT_PATTERNS = [
+    ('catalog', re.compile(r'^/api/v2/gems/?$')),
+    ('pricing', re.compile(r'^/api/v2/(gem-pricing-page|related-gems-pricing)/')),
+    ('listings', re.compile(r'^/api/v2/listings')),
+    ('holdings', re.compile(r'^/api/v2/(gem-holdings|users/[^/]+/(gem-holdings|portfolio))')),
+    ('preferences', re.compile(r'^/api/v2/users/[^/]+/(gem-)?preferences')),
+    ('jewelry', re.compile(r'^/api/v2/jewelry/')),
+    ('metadata', re.compile(r'^/api/v2/(metadata|gem-test-properties)')),
+    ('health', re.compile(r'^/health')),
+]
+
+
+def endpoint_name(url: str) -> str:
+    """Classify a GEMDB URL into an endpoint family (used for timeouts and diagnostics)."""
+    path = urlsplit(url).path or '/'
+    for name, pattern in _ENDPOINT_PATTERNS:
+        if pattern.search(path):
+            return name
+    return 'default'
+
+
+def _parse_timeouts(raw) -> dict:
+    """Parse a 'name:seconds,name2:seconds' mapping (or a dict) into a timeouts dict."""
+    timeouts = dict(_DEFAULT_TIMEOUTS)
+    if isinstance(raw, dict):
+        items = raw.items()
+    else:
+        items = []
+        for entry in str(raw or '').split(','):
+            if ':' in entry:
+                name, value = entry.split(':', 1)
+                items.append((name.strip(), value.strip()))
+    for name, value in items:
+        try:
+            timeouts[name] = float(value)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring invalid GEMDB timeout for {name}: {value}")
+    return timeouts
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling an endpoint whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Failure budget for one GEMDB endpoint family.
+
+    closed: calls go through; consecutive failures (errors, 5xx or calls slower than
+        slow_call_seconds) are counted and `failure_threshold` of them open the breaker.
+    open: calls fail immediately with CircuitOpenError for `reset_timeout` seconds.
+    half_open: one probe call is let through; success closes the breaker, failure
+        re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30,
+                 slow_call_seconds: float = 4):
+        self.name = name
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self._lock = threading.Lock()
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.rejected = 0
+        self.opened = 0
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == 'open':
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self.state = 'half_open'
+                self._probe_in_flight = False
+            if self.state == 'half_open':
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    return False
+                self._probe_in_flight = True
+            self.calls += 1
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, slow: bool = False):
+        with self._lock:
+            self.failures += 1
+            if slow:
+                self.slow_calls += 1
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == 'half_open' or self.consecutive_failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.opened += 1
+                    logger.warning(f"GEMDB circuit '{self.name}' opened after "
+                                   f"{self.consecutive_failures} consecutive failures")
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        with self._lock:
+            retry_in = None
+            if self.state == 'open':
+                retry_in = max(0.0, round(self.reset_timeout - (time.monotonic() - self._opened_at), 1))
+            return {
+                'name': self.name,
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'calls': self.calls,
+                'failures': self.failures,
+                'slow_calls': self.slow_calls,
+                'rejected': self.rejected,
+                'opened': self.opened,
+                'retry_in_seconds': retry_in,
+            }
+
+
+class GemdbSession(requests.Session):
+    """Pooled keep-alive HTTP session shared by every GEMDB API call in the process.
+
+    Connections to the API host are reused across requests and threads through one
+    urllib3 pool. Cookies are never stored, so the session carries no per-user state
+    and is safe to share between request threads. When a call does not pass an
+    explicit timeout, the per-endpoint default from the timeouts table is used.
+    Every call goes through the circuit breaker of its endpoint family, so a failing
+    or slow upstream is skipped quickly instead of tying up request threads.
+    """
+
+    def __init__(self, pool_size: int = 16, timeouts: dict | None = None, breaker_settings: dict | None = None):
+        super().__init__()
+        self.timeouts = dict(timeouts or _DEFAULT_TIMEOUTS)
+        self.breaker_settings = dict(breaker_settings or {})
+        self.breakers = {}
+        self._breakers_lock = threading.Lock()
+        self.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self.headers['Connection'] = 'keep-alive'
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=False)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        with self._breakers_lock:
+            breaker = self.breakers.get(name)
+            if breaker is None:
+                breaker = self.breakers[name] = CircuitBreaker(name, **self.breaker_settings)
+            return breaker
+
+    def request(self, method, url, *args, **kwargs):
+        name = endpoint_name(url)
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeouts.get(name, self.timeouts.get('default', 10))
+        breaker = self.breaker(name)
+        if not breaker.allow():
+            raise CircuitOpenError(f"GEMDB circuit '{name}' is open; not calling {urlsplit(url).path}")
+        started = time.monotonic()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except BaseException:
+            # Any error (not only RequestException) must release a half-open probe,
+            # or the breaker would reject every call from then on
+            breaker.record_failure()
+            raise
+        slow = time.monotonic() - started > breaker.slow_call_seconds
+        if response.status_code in (401, 403) and 'X-API-Key' in (kwargs.get('headers') or {}):
+            _refresh_api_key_after_rejection()
+        if response.status_code >= 500 or slow:
+            breaker.record_failure(slow=slow)
+        else:
+            breaker.record_success()
+        return response
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> GemdbSession:
+    """Return the process-wide GEMDB session, creating it on first use.
+
+    Pool size, timeouts and circuit breaker settings come from GEMDB_POOL_SIZE,
+    GEMDB_TIMEOUTS and GEMDB_BREAKER_* in the Flask config when an app context is
+    available, otherwise from the environment.
+    """
+    global _session
+    if _session is not None:
+        return _session
+    with _session_lock:
+        if _session is None:
+            pool_size = max(1, int(get_setting('GEMDB_POOL_SIZE', 16)))
+            timeouts = _parse_timeouts(get_setting('GEMDB_TIMEOUTS', ''))
+            breaker_settings = {
+                'failure_threshold': int(get_setting('GEMDB_BREAKER_FAILURES', 5)),
+                'reset_timeout': float(get_setting('GEMDB_BREAKER_RESET', 30)),
+                'slow_call_seconds': float(get_setting('GEMDB_BREAKER_SLOW_SECONDS', 4)),
+            }
+            _session = GemdbSession(pool_size=pool_size, timeouts=timeouts, breaker_settings=breaker_settings)
+        return _session
+
+
+def get_breaker_stats() -> list:
+    """Return the state of every GEMDB circuit breaker used in this worker (for /health)."""
+    if _session is None:
+        return []
+    with _session._breakers_lock:
+        breakers = list(_session.breakers.values())
+    return [b.stats() for b in sorted(breakers, key=lambda b: b.name)]
+
+
+class _Flight:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _SingleFlight:
+    """Collapse concurrent calls that share a key into one execution.
+
+    The first caller runs the function; callers arriving while it is in flight
+    wait for it and receive the same result (or the same exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.shared = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+        return flight.result
+
+
+_single_flight = _SingleFlight()
+
+
+# (url, params) -> (ETag, Last-Modified, parsed body) of the last 200 response for
+# conditional fetches; a 304 hands back the same parsed object.
+_validators = {}
+_validators_lock = threading.Lock()
+
+
+def _fetch_json(url: str, params: dict | None = None, headers: dict | None = None,
+                timeout: float | None = None, what: str = 'Gems API', conditional: bool = False):
+    """GET url and return the parsed JSON body of a 200 response, or None otherwise.
+
+    Concurrent callers asking for the same URL and params share one upstream request
+    and its parsed result, so the result must be treated as read-only.
+
+    With conditional=True the ETag/Last-Modified validators of the previous response
+    are sent as If-None-Match/If-Modified-Since. A 304 returns the previously parsed
+    object itself, so nothing is downloaded or parsed and identity-keyed derived data
+    (catalog index, facet views) stays valid.
+    """
+    key = (url, tuple(sorted((params or {}).items())))
+
+    def call():
+        request_headers = dict(headers or {})
+        previous = None
+        if conditional:
+            with _validators_lock:
+                previous = _validators.get(key)
+            if previous:
+                etag, last_modified, _ = previous
+                if etag:
+                    request_headers['If-None-Match'] = etag
+                if last_modified:
+                    request_headers['If-Modified-Since'] = last_modified
+        r = get_session().get(url, params=params, headers=request_headers, timeout=timeout)
+        if r.status_code == 304 and previous:
+            return previous[2]
+        if r.status_code == 200:
+            body = r.json()
+            if conditional:
+                etag = r.headers.get('ETag')
+                last_modified = r.headers.get('Last-Modified')
+                with _validators_lock:
+                    if etag or last_modified:
+                        _validators[key] = (etag, last_modified, body)
+                    else:
+                        _validators.pop(key, None)
+            return body
+        logger.warning(f"{what} returned {r.status_code}: {r.text}")
+        return None
+
+    return _single_flight.do(key, call)
+
+
+class _ResourceCache:
+    """Process-wide in-memory copy of one upstream resource.
+
+    Fresh values (younger than the TTL) are returned directly. Once the TTL has
+    passed the stale value is still returned while a single background thread
+    refreshes it (stale-while-revalidate). Only a cold cache blocks the caller.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._value = None
+        self._fetched_at = None
+        self._refreshing = False
+        self.source = None
+        self.snapshot_saved_at = None
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.not_modified = 0
+
+    def age(self):
+        """Seconds since the cached value was last fetched, or None when empty."""
+        if self._fetched_at is None:
+            return None
+        return time.monotonic() - self._fetched_at
+
+    def peek(self):
+        """Return the cached value (possibly stale or None) without fetching or counting."""
+        return self._value
+
+    def seed(self, value, saved_at=None):
+        """Preload a value from the on-disk snapshot.
+
+        The value is served immediately but counts as stale, so the first read
+        schedules a background refresh from the API. Live data already in the
+        cache is never replaced.
+        """
+        with self._lock:
+            if self._value is not None or value is None:
+                return
+            self._value = value
+            self._fetched_at = None
+            self.source = 'snapshot'
+            self.snapshot_saved_at = saved_at
+            self.version += 1
+
+    def _store(self, value):
+        """Store a freshly fetched value; keep the old object when nothing changed."""
+        with self._lock:
+            if value is self._value:
+                # Upstream answered 304 Not Modified: the parsed object was reused as-is
+                changed = False
+                self.not_modified += 1
+            else:
+                changed = self._value is None or value != self._value
+            if changed:
+                self._value = value
+            if changed or self.source != 'live':
+                # Leaving snapshot data also bumps the version so pages drop the staleness notice
+                self.version += 1
+            self.source = 'live'
+            self.snapshot_saved_at = None
+            self._fetched_at = time.monotonic()
+            self.refreshes += 1
+        for listener in list(_store_listeners):
+            try:
+                listener(self, changed)
+            except Exception as e:
+                logger.warning(f"Cache store listener failed for {self.name}: {e}")
+
+    def _refresh(self, fetch):
+        try:
+            value = fetch()
+            if value is not None:
+                self._store(value)
+            else:
+                with self._lock:
+                    self.refresh_failures += 1
+        except Exception as e:
+            logger.warning(f"Background refresh of {self.name} failed: {e}")
+            with self._lock:
+                self.refresh_failures += 1
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def get(self, fetch, ttl: float):
+        """Return the cached value, fetching or scheduling a refresh as needed.
+
+        Args:
+            fetch: zero-argument callable returning the parsed value, or None on error
+            ttl: seconds a value is considered fresh
+        """
+        with self._lock:
+            value = self._value
+            age = self.age()
+            if value is not None and age is not None and age < ttl:
+                self.hits += 1
+                return value
+            if value is not None:
+                self.stale_hits += 1
+                start_refresh = not self._refreshing
+                if start_refresh:
+                    self._refreshing = True
+            else:
+                self.misses += 1
+                start_refresh = False
+
+        if value is not None:
+            if start_refresh:
+                threading.Thread(target=self._refresh, args=(fetch,), daemon=True,
+                                 name=f"refresh-{self.name}").start()
+            return value
+
+        # Cold cache: the caller has to wait for the upstream response
+        value = fetch()
+        if value is not None:
+            self._store(value)
+        else:
+            with self._lock:
+                self.refresh_failures += 1
+        return value
+
+    def stats(self) -> dict:
+        age = self.age()
+        return {
+            'name': self.name,
+            'cached': self._value is not None,
+            'version': self.version,
+            'source': self.source,
+            'age_seconds': round(age, 1) if age is not None else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale_hits': self.stale_hits,
+            'refreshes': self.refreshes,
+            'refresh_failures': self.refresh_failures,
+            'not_modified': self.not_modified,
+            'refreshing': self._refreshing,
+        }
+
+
+_resource_caches = {}
+_resource_caches_lock = threading.Lock()
+# Callables invoked as listener(cache, changed) after each successful fetch
+_store_listeners = []
+
+
+def add_store_listener(listener):
+    """Register a callable run after every successful upstream fetch of a cached resource."""
+    if listener not in _store_listeners:
+        _store_listeners.append(listener)
+
+
+def _get_resource_cache(name: str) -> _ResourceCache:
+    with _resource_caches_lock:
+        cache = _resource_caches.get(name)
+        if cache is None:
+            cache = _resource_caches[name] = _ResourceCache(name)
+        return cache
+
+
+def get_cache_stats() -> list:
+    """Return hit/miss/age counters for every upstream resource cache in this worker."""
+    with _resource_caches_lock:
+        caches = list(_resource_caches.values())
+    return [c.stats() for c in sorted(caches, key=lambda c: c.name)]
+
+
+def get_cached_resource(name: str):
+    """Return the resource cache called `name` (created empty on first use)."""
+    return _get_resource_cache(name)
+
+
+def get_catalog_version(limit: int = 1000) -> int:
+    """Return the version of the cached gem catalog (bumped whenever its content changes)."""
+    return _get_resource_cache(f"gems:{limit}").version
+
+
+def clear_caches():
+    """Drop every cached upstream resource (used by tests and admin tooling)."""
+    with _resource_caches_lock:
+        _resource_caches.clear()
+    with _validators_lock:
+        _validators.clear()
+
+
+def _fetch_gems_from_api(app, limit: int):
+    """Call /api/v2/gems directly. Returns the parsed list, or None on error."""
+    try:
+        with app.app_context():
+            base = app.config.get('GEMDB_API_URL', 'https://api.preciousstone.info')
+            token = load_api_key() or ''
+            url = f"{base.rstrip('/')}/api/v2/gems"
+            params = {'limit': limit}
+            headers = {}
+            if token:
+                headers['X-API-Key'] = token
+            return _fetch_json(url, params=params, headers=headers, what='Gems API', conditional=True)
+    except Exception as e:
+        logger.warning(f"Error calling Gems API: {e}")
+        return None
 
 
 def get_gems_from_api(limit: int = 1000):
@@ -133,6 +731,10 @@ def get_gems_from_api(limit: int = 1000):
     The function uses current_app.config for GEMDB_API_URL and GEMDB_API_KEY (optional).
     If the API isn't available, returns None. Caller should fallback to local file parsing.
 
+    Results are served from a per-worker cache (see GEMDB_CATALOG_TTL). Once the TTL has
+    expired the previous copy keeps being served while one background refresh runs.
+    Callers must treat the returned list and its dicts as read-only.
+
     The v2 API returns PascalCase field names from Azure SQL stored procedures:
     GemTypeId, GemTypeName, MineralGroup, HardnessLevel, HardnessRange, PriceRange,
     TypicalSize, RarityLevel, RarityDescription, AvailabilityLevel, AvailabilityDriver,
@@ -142,24 +744,56 @@ def get_gems_from_api(limit: int = 1000):
     try:
         if not current_app:
             return None
-        base = current_app.config.get('GEMDB_API_URL', 'https://api.preciousstone.info')
-        token = load_api_key() or ''
-        url = f"{base.rstrip('/')}/api/v2/gems"
-        params = {'limit': limit}
-        headers = {}
-        if token:
-            headers['X-API-Key'] = token
-        r = requests.get(url, params=params, headers=headers, timeout=10)
-        if r.status_code == 200:
-            return r.json()
-        else:
-            logger.warning(f"Gems API returned {r.status_code}: {r.text}")
-            return None
+        app = current_app._get_current_object()
+        ttl = app.config.get('GEMDB_CATALOG_TTL', 300)
+        cache = _get_resource_cache(f"gems:{limit}")
+        return cache.get(lambda: _fetch_gems_from_api(app, limit), ttl)
     except Exception as e:
         logger.warning(f"Error calling Gems API: {e}")
         return None
 
 
+def _fetch_metadata(app, path: str, params: dict | None, what: str):
+    """Call a GEMDB metadata endpoint directly. Returns the parsed body, or None on error."""
+    try:
+        with app.app_context():
+            base = app.config.get('GEMDB_API_URL', 'https://api.preciousstone.info')
+            token = load_api_key() or ''
+            headers = {}
+            if token:
+                headers['X-API-Key'] = token
+            return _fetch_json(f"{base.rstrip('/')}{path}", params=params, headers=headers, what=what,
+                               conditional=True)
+    except Exception as e:
+        logger.warning(f"Error calling {what}: {e}")
+        return None
+
+
+def _get_cached_metadata(name: str, path: str, params: dict | None = None, what: str = 'Gems API'):
+    """Return a slowly-changing GEMDB resource through the per-worker cache (GEMDB_CATALOG_TTL)."""
+    try:
+        if not current_app:
+            return None
+        app = current_app._get_current_object()
+        ttl = app.config.get('GEMDB_CATALOG_TTL', 300)
+        return _get_resource_cache(name).get(lambda: _fetch_metadata(app, path, params, what), ttl)
+    except Exception as e:
+        logger.warning(f"Error calling {what}: {e}")
+        return None
+
+
+def get_brilliance_levels():
+    """Return the brilliance level metadata list, or None on error (cached like the catalog)."""
+    return _get_cached_metadata('brilliance-levels', '/api/v2/metadata/brilliance-levels',
+                                what='Brilliance levels API')
+
+
+def get_gem_test_properties(limit: int = 1000):
+    """Return gem test properties (RI, optical character, ...), or None on error (cached)."""
+    return _get_cached_metadata(f"gem-test-properties:{limit}", '/api/v2/gem-test-properties',
+                                params={'limit': limit}, what='Gem test properties API')
+
+
 def get_api_health():
     """Return API health endpoint result as a dict: {status, body} or None on error."""
     try:
@@ -169,7 +803,7 @@ def get_api_health():
         headers = {}
         if token:
             headers['X-API-Key'] = token
-        r = requests.get(url, headers=headers, timeout=5)
+        r = get_session().get(url, headers=headers)
         try:
             body = r.json()
         except Exception:
@@ -181,65 +815,16 @@ def get_api_health():
 
 
 def get_api_key_info(preferred_app_name: str = 'gems_hub'):
-    """Return a tuple (key, source) where source is 'config', 'secret_manager', 'env', or None
+    """Return a tuple (key, source) where source is 'config', 'secret_manager', 'env', 'config_json' or None
     The key is the parsed single key value (not mapping). If no key is found, returns (None, None).
     """
     try:
-        # Check config first
-        try:
-            cfg_key = current_app.config.get('GEMDB_API_KEY')
-            if cfg_key:
-                # parse mapping if necessary
-                entries = [e.strip() for e in str(cfg_key).split(',') if e.strip()]
-                for entry in entries:
-                    if ':' in entry:
-                        appname, key = entry.split(':', 1)
-                        if appname.strip() == preferred_app_name:
-                            return key.strip(), 'config'
-                if entries and ':' in entries[0]:
-                    return entries[0].split(':', 1)[1].strip(), 'config'
-                return str(cfg_key).strip(), 'config'
-        except Exception:
-            pass
-
-        # Check Secret Manager
-        sec = _get_secret_from_gcp()
-        if sec:
-            try:
-                entries = [e.strip() for e in str(sec).split(',') if e.strip()]
-                for entry in entries:
-                    if ':' in entry:
-                        appname, key = entry.split(':', 1)
-                        if appname.strip() == preferred_app_name:
-                            return key.strip(), 'secret_manager'
-                if entries and ':' in entries[0]:
-                    return entries[0].split(':', 1)[1].strip(), 'secret_manager'
-                return str(sec).strip(), 'secret_manager'
-            except Exception:
-                return str(sec).strip(), 'secret_manager'
-
-        # Fallback to ENV var
-        env_val = os.environ.get('GEMDB_API_KEY') or os.environ.get('GEMHUNTER_API_KEY')
-        if env_val:
-            try:
-                entries = [e.strip() for e in env_val.split(',') if e.strip()]
-                for entry in entries:
-                    if ':' in entry:
-                        appname, key = entry.split(':', 1)
-                        if appname.strip() == preferred_app_name:
-                            return key.strip(), 'env'
-                if entries and ':' in entries[0]:
-                    return entries[0].split(':', 1)[1].strip(), 'env'
-                return env_val.strip(), 'env'
-            except Exception:
-                return env_val.strip(), 'env'
-
+        return resolve_api_key(preferred_app_name)
     except Exception as e:
         logger.warning(f"Error introspecting API key: {e}")
         return None, None
 
 
-
 def build_types_structure_from_api(gems_list):
     """Build a types dict compatible with existing YAML structure.
 
@@ -274,24 +859,8 @@ def get_jewelry_service_types():
 
     Returns list of dicts with: ServiceTypeId, ServiceTypeName, AssetTypeId, AssetTypeCode, AssetTypeName
     """
-    try:
-        if not current_app:
-            return []
-        base = current_app.config.get('GEMDB_API_URL', 'https://api.preciousstone.info')
-        token = load_api_key() or ''
-        url = f"{base.rstrip('/')}/api/v2/jewelry/service-types"
-        headers = {}
-        if token:
-            headers['X-API-Key'] = token
-        r = requests.get(url, headers=headers, timeout=10)
-        if r.status_code == 200:
-            return r.json()
-        else:
-            logger.warning(f"Jewelry service types API returned {r.status_code}: {r.text}")
-            return []
-    except Exception as e:
-        logger.warning(f"Error calling jewelry service types API: {e}")
-        return []
+    return _get_cached_metadata('jewelry-service-types', '/api/v2/jewelry/service-types',
+                                what='Jewelry service types API') or []
 
 
 def get_jewelry_service_firms(service_type_id: int):
@@ -311,12 +880,7 @@ def get_jewelry_service_firms(service_type_id: int):
         headers = {}
         if token:
             headers['X-API-Key'] = token
-        r = requests.get(url, headers=headers, timeout=10)
-        if r.status_code == 200:
-            return r.json()
-        else:
-            logger.warning(f"Jewelry service firms API returned {r.status_code}: {r.text}")
-            return []
+        return _fetch_json(url, headers=headers, what='Jewelry service firms API') or []
     except Exception as e:
         logger.warning(f"Error calling jewelry service firms API: {e}")
         return []
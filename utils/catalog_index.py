@@ -0,0 +1,221 @@
+"""Precomputed lookup index over the gem catalog.
+
+The catalog returned by `get_gems_from_api()` is a list of PascalCase records. Pages
+used to re-walk it on every request to map gems to mineral groups, resolve URL
+slugs and parse hardness/size/price strings. `CatalogIndex` does that work once per
+catalog refresh; `get_catalog_index()` returns the index for a given catalog list and
+rebuilds it only when a different list (i.e. a refreshed catalog) is passed in.
+"""
+import logging
+import re
+import threading
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+MISC_GROUP = 'Miscellaneous'
+
+_SIZE_RE = re.compile(r"(\d+(?:\.\d*)?)(?:\s*-\s*(\d+(?:\.\d*)?)(\+?)?)?")
+_PRICE_NUMBER_RE = re.compile(r"[\d,]+")
+
+
+def get_hardness_value(hardness_str):
+    """Convert hardness string to numeric value for sorting with error handling"""
+    try:
+        if not hardness_str or not isinstance(hardness_str, str):
+            return 0.0
+        # Normalize common unicode dash characters to ASCII hyphen for parsing
+        hardness_str = hardness_str.strip()
+        hardness_str = hardness_str.replace('\u2013', '-').replace('\u2014', '-')
+
+        if '-' in hardness_str:
+            # Take the average of the range
+            parts = hardness_str.split('-', 1)
+            if len(parts) == 2:
+                try:
+                    val1 = float(parts[0].strip())
+                    val2 = float(parts[1].strip())
+                    return (val1 + val2) / 2
+                except ValueError:
+                    logger.warning(f"Invalid hardness range format: {hardness_str}")
+                    return 0.0
+
+        return float(hardness_str)
+
+    except ValueError as e:
+        logger.warning(f"Cannot convert hardness to float: {hardness_str} - {e}")
+        return 0.0
+    except Exception as e:
+        logger.error(f"Unexpected error in get_hardness_value: {e}")
+        return 0.0
+
+
+def parse_size_value(s):
+    """Return a numeric representative (average) for a size string.
+
+    Examples handled: '1-50+ carats', '0.5-20 carats', '50+ carats', '3 carats'
+    Non-parsable values return 0.0
+    """
+    if not s or not isinstance(s, str):
+        return 0.0
+    s = s.strip().replace('\u2013', '-')
+    # extract the first numeric token or range
+    m = _SIZE_RE.search(s)
+    if not m:
+        return 0.0
+    a = float(m.group(1))
+    b = m.group(2)
+    if b:
+        try:
+            bval = float(b)
+        except ValueError:
+            bval = a
+        # if plus sign present (e.g., 50+), keep bval as-is
+        return (a + bval) / 2.0
+    # single value or value with plus
+    return a
+
+
+def extract_price_numbers(s):
+    """Return the numbers found in a price string like '$1,000 - $10,000 per carat'."""
+    if not s or not isinstance(s, str):
+        return ()
+    vals = []
+    for n in _PRICE_NUMBER_RE.findall(s):
+        try:
+            vals.append(float(n.replace(',', '')))
+        except ValueError:
+            continue
+    return tuple(vals)
+
+
+def slugify_gem_name(name: str):
+    """Return the (underscore, dash) URL slugs for a gem name."""
+    lowered = str(name).strip().lower()
+    return lowered.replace(' ', '_'), lowered.replace(' ', '-')
+
+
+class CatalogIndex:
+    """Read-only lookups derived from one version of the gem catalog.
+
+    Attributes (all read-only mappings or tuples):
+        records: gem name -> API record
+        by_id: GemTypeId -> API record
+        slugs: underscore and dash slugs -> gem name
+        groups: mineral group -> tuple of gem names (groups sorted, members in catalog order)
+        gem_to_group: gem name -> mineral group
+        hardness_str / hardness: gem name -> hardness text / parsed numeric hardness
+        size: gem name -> representative size in carats
+        price_numbers: gem name -> numbers parsed from the price range text
+    """
+
+    def __init__(self, gems_list):
+        records = {}
+        lower = {}
+        by_id = {}
+        slugs = {}
+        groups = {}
+        hardness_str = {}
+        hardness = {}
+        size = {}
+        price_numbers = {}
+
+        for rec in gems_list if isinstance(gems_list, list) else []:
+            if not isinstance(rec, dict):
+                continue
+            raw_name = rec.get('GemTypeName')
+            if not raw_name:
+                continue
+            name = str(raw_name).strip()
+            records[name] = rec
+            lower.setdefault(name.lower(), rec)
+            if rec.get('GemTypeId') is not None:
+                by_id[rec.get('GemTypeId')] = rec
+            groups.setdefault(rec.get('MineralGroup') or MISC_GROUP, []).append(name)
+
+            hr = rec.get('HardnessRange') or (str(rec.get('HardnessLevel')) if rec.get('HardnessLevel') else '')
+            if hr:
+                hardness_str[name] = str(hr)
+                hardness[name] = get_hardness_value(str(hr))
+            size[name] = parse_size_value(rec.get('TypicalSize') or '')
+            price_numbers[name] = extract_price_numbers(str(rec.get('PriceRange') or ''))
+
+        gem_to_group = {}
+        ordered_groups = {}
+        for group_name in sorted(groups):
+            members = tuple(groups[group_name])
+            ordered_groups[group_name] = members
+            for name in members:
+                key_us, key_dash = slugify_gem_name(name)
+                slugs[key_us] = name
+                slugs[key_dash] = name
+                gem_to_group[name] = group_name
+
+        self.records = MappingProxyType(records)
+        self.by_id = MappingProxyType(by_id)
+        self.slugs = MappingProxyType(slugs)
+        self.groups = MappingProxyType(ordered_groups)
+        self.gem_to_group = MappingProxyType(gem_to_group)
+        self.hardness_str = MappingProxyType(hardness_str)
+        self.hardness = MappingProxyType(hardness)
+        self.size = MappingProxyType(size)
+        self.price_numbers = MappingProxyType(price_numbers)
+        self._lower = MappingProxyType(lower)
+
+    def __len__(self):
+        return len(self.records)
+
+    def names(self):
+        """Return all gem names in group order (the order of the old types structure)."""
+        return [name for members in self.groups.values() for name in members]
+
+    def record(self, name):
+        """Return the API record for a gem name (case-insensitive), or None."""
+        if not name:
+            return None
+        rec = self.records.get(name)
+        if rec is None:
+            rec = self._lower.get(str(name).strip().lower())
+        return rec
+
+    def name_for_slug(self, gem_slug):
+        """Resolve a URL slug (underscores or dashes) to the canonical gem name, or None."""
+        if not gem_slug:
+            return None
+        gem_name = self.slugs.get(gem_slug)
+        if not gem_name:
+            # Try alternative key forms (dashes/underscores)
+            gem_name = self.slugs.get(gem_slug.replace('-', '_')) or self.slugs.get(gem_slug.replace('_', '-'))
+        if not gem_name:
+            candidate = gem_slug.replace('_', ' ').replace('-', ' ')
+            for k, v in self.slugs.items():
+                # compare normalized keys replacing separators with spaces for broader match
+                k_comp = k.replace('_', ' ').replace('-', ' ')
+                if k_comp.startswith(candidate) or candidate.startswith(k_comp):
+                    return v
+        return gem_name
+
+
+_EMPTY_INDEX = CatalogIndex([])
+_last = (None, _EMPTY_INDEX)
+_lock = threading.Lock()
+
+
+def get_catalog_index(gems_list):
+    """Return the CatalogIndex for a catalog list, building it only when the list changes.
+
+    The catalog cache hands out the same list object until the catalog is refreshed,
+    so the index is rebuilt once per refresh rather than once per request.
+    """
+    global _last
+    if not gems_list:
+        return _EMPTY_INDEX
+    source, index = _last
+    if source is gems_list:
+        return index
+    with _lock:
+        source, index = _last
+        if source is not gems_list:
+            index = CatalogIndex(gems_list)
+            _last = (gems_list, index)
+        return index
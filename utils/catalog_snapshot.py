@@ -0,0 +1,156 @@
+"""On-disk snapshot of the gem catalog and related metadata.
+
+Instances scale to zero, so a cold worker would otherwise make its first visitors
+wait on the API, and an API outage would leave it with nothing to show. After every
+successful refresh of a snapshotted resource the current values are written to a
+gzip-compressed JSON file (CATALOG_SNAPSHOT_PATH). At boot the file is loaded into
+the resource caches before the first request: pages render immediately from the
+snapshot while a background refresh fetches live data, and the snapshot keeps being
+served (with a staleness notice) for as long as the API stays unavailable.
+"""
+import gzip
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from utils.api_client import add_store_listener, get_cached_resource
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+# Resource cache names persisted in the snapshot (see utils.api_client)
+SNAPSHOT_RESOURCES = (
+    'gems:1000',
+    'brilliance-levels',
+    'gem-test-properties:1000',
+    'jewelry-service-types',
+)
+
+_path = None
+_write_lock = threading.Lock()
+_status = {'loaded_at': None, 'loaded_saved_at': None, 'saved_at': None, 'errors': 0}
+_confirmed = set()
+
+
+def load_snapshot(path: str):
+    """Return the parsed snapshot dict from `path`, or None if missing or unreadable."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or data.get('format') != SNAPSHOT_FORMAT:
+            logger.warning(f"Ignoring catalog snapshot with unknown format: {path}")
+            return None
+        return data
+    except Exception as e:
+        logger.warning(f"Failed to read catalog snapshot {path}: {e}")
+        return None
+
+
+def save_snapshot(path: str, resources: dict):
+    """Atomically write `resources` (name -> JSON-serializable value) to `path`."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    payload = {'format': SNAPSHOT_FORMAT, 'saved_at': time.time(), 'resources': resources}
+    fd, tmp_path = tempfile.mkstemp(prefix='.catalog-snapshot-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb') as gz:
+            gz.write(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return payload['saved_at']
+
+
+def _live_resources():
+    """Collect the current value of every snapshotted resource that has one."""
+    resources = {}
+    for name in SNAPSHOT_RESOURCES:
+        value = get_cached_resource(name).peek()
+        if value is not None:
+            resources[name] = value
+    return resources
+
+
+def _write_current():
+    if not _path:
+        return
+    with _write_lock:
+        try:
+            _status['saved_at'] = save_snapshot(_path, _live_resources())
+        except Exception as e:
+            _status['errors'] += 1
+            logger.warning(f"Failed to write catalog snapshot {_path}: {e}")
+
+
+def _on_store(cache, changed):
+    # Rewrite when content changed, and on the first live fetch of each resource
+    # so the file's timestamp reflects the last confirmation from the API.
+    if cache.name not in SNAPSHOT_RESOURCES:
+        return
+    if changed or cache.name not in _confirmed:
+        _confirmed.add(cache.name)
+        threading.Thread(target=_write_current, daemon=True, name='catalog-snapshot').start()
+
+
+def init_catalog_snapshot(app):
+    """Seed the resource caches from the snapshot file and persist future refreshes.
+
+    Does nothing when CATALOG_SNAPSHOT_PATH is empty.
+    """
+    global _path
+    _path = app.config.get('CATALOG_SNAPSHOT_PATH') or None
+    if not _path:
+        return
+    data = load_snapshot(_path)
+    if data:
+        saved_at = data.get('saved_at')
+        for name, value in (data.get('resources') or {}).items():
+            if name in SNAPSHOT_RESOURCES:
+                get_cached_resource(name).seed(value, saved_at)
+        _status['loaded_at'] = time.time()
+        _status['loaded_saved_at'] = saved_at
+        logger.info(f"Loaded catalog snapshot from {_path}")
+    add_store_listener(_on_store)
+
+
+def _iso(ts):
+    if not ts:
+        return None
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec='seconds')
+
+
+def get_catalog_staleness(limit: int = 1000):
+    """Return {'saved_at', 'age_seconds'} while the catalog is served from the snapshot, else None."""
+    cache = get_cached_resource(f"gems:{limit}")
+    if cache.source != 'snapshot':
+        return None
+    saved_at = cache.snapshot_saved_at
+    return {
+        'saved_at': _iso(saved_at),
+        'age_seconds': int(time.time() - saved_at) if saved_at else None,
+    }
+
+
+def get_snapshot_status():
+    """Return snapshot path, load/save times and which resources are served from it (for /health)."""
+    serving = [name for name in SNAPSHOT_RESOURCES if get_cached_resource(name).source == 'snapshot']
+    return {
+        'path': _path,
+        'enabled': bool(_path),
+        'loaded_at': _iso(_status['loaded_at']),
+        'snapshot_saved_at': _iso(_status['loaded_saved_at']),
+        'last_written_at': _iso(_status['saved_at']),
+        'write_errors': _status['errors'],
+        'serving_from_snapshot': serving,
+    }
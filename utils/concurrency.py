@@ -0,0 +1,78 @@
+"""Bounded thread pool for fanning out independent upstream calls.
+
+Page handlers that need several independent GEMDB calls submit them here so the
+page waits for the slowest call instead of the sum of all calls. Each call runs
+inside the Flask app context of the submitting request, and each result degrades
+on its own: a call that raises or misses the deadline yields its default value.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app
+
+from utils.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the process-wide fan-out pool (size from GEMDB_FANOUT_WORKERS)."""
+    global _executor
+    if _executor is not None:
+        return _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = max(1, int(get_setting('GEMDB_FANOUT_WORKERS', 16)))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gemdb-fanout')
+        return _executor
+
+
+def _run_in_app_context(app, fn):
+    with app.app_context():
+        return fn()
+
+
+def fan_out(calls: Dict[str, Callable[[], Any]], deadline: float,
+            defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Run independent zero-argument callables concurrently.
+
+    Args:
+        calls: mapping of section name -> callable
+        deadline: overall time budget in seconds for all calls together
+        defaults: mapping of section name -> value used when that call fails or times out
+
+    Returns:
+        dict mapping every section name to its result or default
+    """
+    defaults = defaults or {}
+    if not calls:
+        return {}
+    app = current_app._get_current_object()
+    executor = get_executor()
+    started = time.monotonic()
+    futures = {
+        name: executor.submit(_run_in_app_context, app, fn)
+        for name, fn in calls.items()
+    }
+    wait(futures.values(), timeout=max(deadline, 0))
+
+    results = {}
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            logger.warning(f"fan_out: '{name}' missed the {deadline}s deadline; using default")
+            results[name] = defaults.get(name)
+            continue
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            logger.warning(f"fan_out: '{name}' failed: {e}")
+            results[name] = defaults.get(name)
+    logger.debug(f"fan_out: {len(calls)} calls finished in {time.monotonic() - started:.3f}s")
+    return results
@@ -0,0 +1,123 @@
+"""Pooled access to the local SQLite database (gems_portfolio.db).
+
+Every thread keeps one write connection and one read-only connection per database
+file and reuses them across requests, so Flask-Login's per-request user lookup and
+the rankings pages no longer pay for a fresh connect, PRAGMA setup and statement
+compilation each time. Connections run in WAL mode with a busy timeout: readers see
+the last committed state and never block on (or behind) the rankings upsert writer,
+and writers wait for each other instead of failing with "database is locked".
+
+`get_db()` and `get_read_db()` return wrappers whose close() only ends any open
+transaction, so existing `conn = get_db() ... conn.close()` code keeps working.
+"""
+import logging
+import os
+import sqlite3
+import threading
+
+from utils.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.path.join(os.getcwd(), 'gems_portfolio.db')
+
+_local = threading.local()
+_wal_ready = set()
+
+
+class PooledConnection:
+    """A thread's reusable connection; close() returns it to the pool instead of closing it."""
+
+    def __init__(self, conn: sqlite3.Connection, readonly: bool):
+        self._conn = conn
+        self.readonly = readonly
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def close(self):
+        # Never hand the next user a half-finished transaction (and never hold the
+        # write lock between requests)
+        if self._conn.in_transaction:
+            self._conn.rollback()
+
+    def really_close(self):
+        self._conn.close()
+
+
+def connect(path: str = None, readonly: bool = False, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Open a new, unpooled connection configured like the pooled ones."""
+    path = path or DB_PATH
+    busy_ms = int(get_setting('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    cached = int(get_setting('SQLITE_CACHED_STATEMENTS', 128))
+    if readonly:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=busy_ms / 1000.0,
+                               cached_statements=cached, check_same_thread=check_same_thread)
+        conn.execute('PRAGMA query_only=ON')
+    else:
+        conn = sqlite3.connect(path, timeout=busy_ms / 1000.0, cached_statements=cached,
+                               check_same_thread=check_same_thread)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA busy_timeout={busy_ms}')
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _pool() -> dict:
+    # Connections must not cross a fork (e.g. gunicorn --preload): start over in the child
+    pid = os.getpid()
+    if getattr(_local, 'pid', None) != pid:
+        _local.pid = pid
+        _local.conns = {}
+    return _local.conns
+
+
+def _get(path: str, readonly: bool) -> PooledConnection:
+    conns = _pool()
+    key = (path, readonly)
+    conn = conns.get(key)
+    if conn is None:
+        conn = PooledConnection(connect(path, readonly), readonly)
+        conns[key] = conn
+    return conn
+
+
+def get_db(path: str = None) -> PooledConnection:
+    """Return this thread's pooled read-write connection (sqlite3.Row rows, WAL mode)."""
+    path = path or DB_PATH
+    conn = _get(path, readonly=False)
+    _wal_ready.add(path)
+    return conn
+
+
+def get_read_db(path: str = None) -> PooledConnection:
+    """Return this thread's pooled read-only connection.
+
+    Falls back to the read-write connection until the database file exists, since a
+    read-only connection can neither create it nor switch it to WAL.
+    """
+    path = path or DB_PATH
+    if path not in _wal_ready:
+        if not os.path.exists(path):
+            return get_db(path)
+        get_db(path)
+    return _get(path, readonly=True)
+
+
+def close_thread_connections():
+    """Really close the calling thread's pooled connections (tests and shutdown)."""
+    conns = _pool()
+    for conn in conns.values():
+        try:
+            conn.really_close()
+        except Exception:
+            logger.debug('Failed to close pooled SQLite connection', exc_info=True)
+    conns.clear()
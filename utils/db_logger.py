@@ -1,7 +1,7 @@
 """Simple database error logger used across the app.
 
-Writes timestamped entries to logs/db_errors.log with a short context message
-and the exception traceback. This is intentionally minimal to avoid adding
+Writes timestamped entries to logs/db_errors.log (or DB_ERROR_LOG_DIR/db_errors.log)
+with a short context message and the exception traceback. This is intentionally minimal to avoid adding
 external dependencies.
 """
 import os
@@ -10,7 +10,8 @@ from datetime import datetime
 
 
 def _ensure_logs_dir():
-    logs_dir = os.path.join(os.getcwd(), 'logs')
+    # DB_ERROR_LOG_DIR moves the log elsewhere (the tests point it at a temp dir)
+    logs_dir = os.environ.get('DB_ERROR_LOG_DIR') or os.path.join(os.getcwd(), 'logs')
     try:
         os.makedirs(logs_dir, exist_ok=True)
     except Exception:
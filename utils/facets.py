@@ -0,0 +1,475 @@
+"""Materialized facet views for the "Gems by X" pages.
+
+Each by-* page groups the catalog into ordered buckets (hardness tiers, rarity
+levels, size classes, price groups, ...). The groupings depend only on the catalog,
+so they are computed once per catalog version from the `CatalogIndex` and stored
+by facet name; routes look up the prepared view and render it.
+
+Views are shared between requests: treat the returned lists and dicts as
+read-only and copy a gem entry before attaching per-request fields to it.
+"""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+HARDNESS_ORDER = [
+    'Extremely Hard (10)',
+    'Very Hard (8.5-9.99)',
+    'Hard-2 (8.0-8.49)',
+    'Hard-1 (7.5-7.99)',
+    'Medium-2 (7.0-7.49)',
+    'Medium-1 (6-6.99)',
+    'Soft (3-5.99)',
+    'Very Soft (1-2.99)'
+]
+
+# Desired display order: descending rarity (rarest first)
+RARITY_ORDER = [
+    'Singular Occurrence',
+    'Unique Geological',
+    'Localized Formation',
+    'Limited Occurrence',
+    'Abundant Minerals'
+]
+
+# Show availability groups in descending market scarcity (most scarce first)
+AVAILABILITY_ORDER = [
+    'Museum Grade Rarity',
+    'Collectors Market',
+    'Limited Supply',
+    'Readily Available',
+    'Consistently Available'
+]
+
+SIZE_ORDER = [
+    'VERY LARGE STONES (50+ carats)',
+    'LARGE STONES (20-50 carats)',
+    'MEDIUM TO LARGE STONES (10-30 carats)',
+    'SMALL TO MEDIUM STONES (under 10 carats)',
+    'VERY SMALL STONES (typically under 3 carats)'
+]
+
+# Price groups in descending order (exact names from requirements)
+PRICE_ORDER = [
+    'ULTRA-LUXURY',
+    'SUPER-PREMIUM',
+    'PREMIUM',
+    'HIGH-END',
+    'MID-RANGE',
+    'AFFORDABLE',
+    'BUDGET-FRIENDLY'
+]
+
+# Desired order: most-investment-worthy first
+INVESTMENT_ORDER = [
+    'Blue Chip Investment Gems',
+    'Emerging Investment Gems',
+    'Speculative Collector Gems',
+    'Fashion/Trend Gems',
+    'Jewelry Utility',
+    'Non-Investment Gems'
+]
+
+# Map existing availability values to the project's availability groups (rarity page)
+RARITY_PAGE_AVAILABILITY_MAP = {
+    'common': 'Consistently Available',
+    'consistently available': 'Consistently Available',
+    'uncommon': 'Readily Available',
+    'readily available': 'Readily Available',
+    'rare': 'Limited Supply',
+    'limited supply': 'Limited Supply',
+    'very rare': 'Collectors Market',
+    'collectors market': 'Collectors Market',
+    'extremely rare': 'Museum Grade Rarity',
+    'museum grade rarity': 'Museum Grade Rarity'
+}
+
+AVAILABILITY_DESCRIPTION_DEFAULTS = {
+    'Consistently Available': 'Consistent Deposits',
+    'Readily Available': 'Readily Available',
+    'Limited Supply': 'Limited Deposits',
+    'Collectors Market': 'Limited Investment',
+    'Museum Grade Rarity': 'Difficult Mining'
+}
+
+AVAILABILITY_NORMAL_MAP = {
+    'consistent deposits': 'Consistently Available',
+    'consistently available': 'Consistently Available',
+    'readily available': 'Readily Available',
+    'limited supply': 'Limited Supply',
+    'collectors market': 'Collectors Market',
+    'museum grade rarity': 'Museum Grade Rarity'
+}
+
+# Heuristic mapping from rarity -> price group and priority value for sorting
+RARITY_TO_PRICE = {
+    'Singular Occurrence': ('ULTRA-LUXURY', 7),
+    'Unique Geological': ('ULTRA-LUXURY', 7),
+    'Localized Formation': ('PREMIUM', 5),
+    'Limited Occurrence': ('HIGH-END', 4),
+    'Abundant Minerals': ('AFFORDABLE', 2)
+}
+
+# Default when unknown: use availability to guess, else 'MID-RANGE'
+AVAILABILITY_TO_PRICE = {
+    'Museum Grade Rarity': ('ULTRA-LUXURY', 7),
+    'Collectors Market': ('PREMIUM', 5),
+    'Limited Supply': ('HIGH-END', 4),
+    'Readily Available': ('MID-RANGE', 3),
+    'Consistently Available': ('AFFORDABLE', 2)
+}
+
+# Readable typical price string for a group when the catalog has none
+PRICE_GROUP_DEFAULT_STR = {
+    'ULTRA-LUXURY': '>$50,000 per carat',
+    'SUPER-PREMIUM': '$10,000 - $50,000 per carat',
+    'PREMIUM': '$1,000 - $10,000 per carat',
+    'HIGH-END': '$500 - $3,000 per carat',
+    'MID-RANGE': '$100 - $500 per carat',
+    'AFFORDABLE': '$50 - $200 per carat',
+}
+
+_PRICE_THRESHOLDS = (
+    (50000, 'ULTRA-LUXURY', 7),
+    (10000, 'SUPER-PREMIUM', 6),
+    (1000, 'PREMIUM', 5),
+    (500, 'HIGH-END', 4),
+    (100, 'MID-RANGE', 3),
+    (50, 'AFFORDABLE', 2),
+)
+
+
+def categorize_by_hardness(hardness_val):
+    """Categorize gem by hardness level"""
+    try:
+        if not isinstance(hardness_val, (int, float)):
+            hardness_val = 0.0
+
+        # Follow BusinessRequirements buckets precisely
+        # Very Soft (1-2.99), Soft (3-5.99), Medium-1 (6-6.99), Medium-2 (7.0-7.49),
+        # Hard-1 (7.5-7.99), Hard-2 (8.0-8.49), Very Hard (8.5-9.99), Extremely Hard (10)
+        if hardness_val < 3:
+            return 'Very Soft (1-2.99)'
+        elif hardness_val < 6:
+            return 'Soft (3-5.99)'
+        elif hardness_val < 7.0:
+            return 'Medium-1 (6-6.99)'
+        elif hardness_val < 7.5:
+            return 'Medium-2 (7.0-7.49)'
+        elif hardness_val < 8.0:
+            return 'Hard-1 (7.5-7.99)'
+        elif hardness_val < 8.5:
+            return 'Hard-2 (8.0-8.49)'
+        elif hardness_val < 10:
+            return 'Very Hard (8.5-9.99)'
+        else:
+            return 'Extremely Hard (10)'
+    except Exception as e:
+        logger.error(f"Error categorizing hardness: {e}")
+        return 'Unknown'
+
+
+def categorize_size(val):
+    """Map a representative size in carats to its size bucket."""
+    # Priority order: Very Large, Large, Medium to Large, Small to Medium, Very Small
+    try:
+        v = float(val)
+    except (TypeError, ValueError):
+        v = 0.0
+    if v >= 50:
+        return 'VERY LARGE STONES (50+ carats)'
+    elif v >= 20:
+        return 'LARGE STONES (20-50 carats)'
+    elif v >= 10:
+        return 'MEDIUM TO LARGE STONES (10-30 carats)'
+    elif v >= 3:
+        return 'SMALL TO MEDIUM STONES (under 10 carats)'
+    else:
+        return 'VERY SMALL STONES (typically under 3 carats)'
+
+
+def infer_price_group(price_str, nums=()):
+    """Return (price_group, price_value) for a price range string.
+
+    `nums` are the numbers parsed from the string (see CatalogIndex.price_numbers).
+    """
+    if not price_str or not isinstance(price_str, str):
+        return ('MID-RANGE', 3)
+
+    if nums:
+        # If string contains '>' treat the first number as a lower bound,
+        # otherwise use the max value found in the range
+        bound = nums[0] if '>' in price_str else max(nums)
+        for threshold, group, value in _PRICE_THRESHOLDS:
+            if bound >= threshold:
+                return (group, value)
+        return ('BUDGET-FRIENDLY', 1)
+
+    # Fall back to keyword hints
+    s = price_str.lower()
+    if 'ultra' in s or 'exceed' in s:
+        return ('ULTRA-LUXURY', 7)
+    if 'premium' in s or 'luxury' in s:
+        return ('SUPER-PREMIUM', 6)
+    if 'high' in s or 'valuable' in s:
+        return ('HIGH-END', 4)
+
+    return ('MID-RANGE', 3)
+
+
+def _by_name(gem):
+    return gem.get('name', '').lower()
+
+
+def _ordered(categories, order, sort_key=None, include_extra=False):
+    """Turn {category: [gems]} into [{'name', 'gems'}] following `order`."""
+    ordered = []
+    for cat in order:
+        if cat in categories:
+            if sort_key:
+                categories[cat].sort(key=sort_key)
+            ordered.append({'name': cat, 'gems': categories[cat]})
+    if include_extra:
+        for extra_cat, gems in categories.items():
+            if extra_cat not in order:
+                if sort_key:
+                    gems.sort(key=sort_key)
+                ordered.append({'name': extra_cat, 'gems': gems})
+    return ordered
+
+
+def _text(rec, field):
+    return str(rec.get(field) or '').strip()
+
+
+def build_hardness(index):
+    gems_list = []
+    for name, hardness_str in index.hardness_str.items():
+        hardness_val = index.hardness[name]
+        gems_list.append({
+            'name': name,
+            'hardness': hardness_str,
+            'hardness_val': hardness_val,
+            'category': categorize_by_hardness(hardness_val),
+            'mineral_group': index.gem_to_group.get(name, '')
+        })
+    # Sort by hardness descending
+    gems_list.sort(key=lambda x: x.get('hardness_val', 0), reverse=True)
+    categories = {}
+    for gem in gems_list:
+        categories.setdefault(gem.get('category', 'Unknown'), []).append(gem)
+    return _ordered(categories, HARDNESS_ORDER)
+
+
+def build_rarity(index):
+    categories = {}
+    for name, rec in index.records.items():
+        raw_av = _text(rec, 'AvailabilityLevel')
+        availability_group = RARITY_PAGE_AVAILABILITY_MAP.get(raw_av.lower(), raw_av or '')
+        gem = {
+            'name': name,
+            'rarity': _text(rec, 'RarityLevel'),
+            'availability': availability_group,
+            'availability_description': AVAILABILITY_DESCRIPTION_DEFAULTS.get(availability_group, ''),
+            'rarity_description': _text(rec, 'RarityDescription'),
+            'mineral_group': index.gem_to_group.get(name, '')
+        }
+        categories.setdefault(gem['rarity'] or 'Unknown', []).append(gem)
+    return _ordered(categories, RARITY_ORDER, sort_key=_by_name, include_extra=True)
+
+
+def build_availability(index):
+    categories = {}
+    for name, rec in index.records.items():
+        group = _text(rec, 'AvailabilityLevel')
+        gem = {
+            'name': name,
+            'availability': AVAILABILITY_NORMAL_MAP.get(group.lower(), group),
+            'availability_driver': _text(rec, 'AvailabilityDriver'),
+            'availability_description': _text(rec, 'AvailabilityDescription'),
+            'mineral_group': index.gem_to_group.get(name, '')
+        }
+        categories.setdefault(gem['availability'] or 'Unknown', []).append(gem)
+    return _ordered(categories, AVAILABILITY_ORDER, sort_key=_by_name, include_extra=True)
+
+
+def build_size(index):
+    gems_list = []
+    for name, rec in index.records.items():
+        size_str = rec.get('TypicalSize') or ''
+        if not size_str:
+            continue
+        size_val = index.size.get(name, 0.0)
+        gems_list.append({
+            'name': name,
+            'size_str': size_str,
+            'size_val': size_val,
+            'category': categorize_size(size_val),
+            'mineral_group': index.gem_to_group.get(name, ''),
+            'tier': rec.get('InvestmentRankingTier') or ''
+        })
+    # Sort by representative size descending
+    gems_list.sort(key=lambda x: x.get('size_val', 0), reverse=True)
+    categories = {}
+    for gem in gems_list:
+        categories.setdefault(gem['category'], []).append(gem)
+    return _ordered(categories, SIZE_ORDER)
+
+
+def price_group_for(index, name):
+    """Return (price_str, price_group, price_value) for a gem, inferring from rarity when needed."""
+    rec = index.record(name) or {}
+    price_str = str(rec.get('PriceRange') or '')
+    if price_str:
+        try:
+            price_group, price_value = infer_price_group(price_str, index.price_numbers.get(name, ()))
+        except Exception:
+            price_group, price_value = ('MID-RANGE', 3)
+        return price_str, price_group, price_value
+
+    # infer from rarity, then availability
+    mapped = (RARITY_TO_PRICE.get(_text(rec, 'RarityLevel'))
+              or AVAILABILITY_TO_PRICE.get(_text(rec, 'AvailabilityLevel'))
+              or ('MID-RANGE', 3))
+    price_group, price_value = mapped
+    return PRICE_GROUP_DEFAULT_STR.get(price_group, '$5 - $50 per carat'), price_group, price_value
+
+
+def build_price(index):
+    gems_list = []
+    # Walk through the index (mineral group order) and add all gems
+    for name in index.names():
+        price_str, price_group, price_value = price_group_for(index, name)
+        rec = index.records.get(name) or {}
+        gems_list.append({
+            'name': name,
+            'price_str': price_str,
+            'price_group': price_group,
+            'price_value': price_value,
+            'mineral_group': index.gem_to_group.get(name, ''),
+            'tier': rec.get('InvestmentRankingTier') or ''
+        })
+    # Sort by price_value descending then by name
+    gems_list.sort(key=lambda x: (-x.get('price_value', 2), x.get('name', '').lower()))
+    categories = {}
+    for gem in gems_list:
+        categories.setdefault(gem['price_group'], []).append(gem)
+    return _ordered(categories, PRICE_ORDER)
+
+
+def _normalize_colors(c):
+    """Return {'color_primary', 'color_range'} for the API's list or dict color forms."""
+    if isinstance(c, list):
+        entries = []
+        for col in c:
+            if isinstance(col, str):
+                entries.append({'color': col, 'hex': None, 'rarity': '', 'description': ''})
+            elif isinstance(col, dict):
+                entries.append(col)
+        return {'color_range': entries, 'color_primary': entries[0].get('color') if entries else None}
+    if isinstance(c, dict):
+        return c
+    return None
+
+
+def build_colors(index):
+    # Normalize colors: gem_name -> list of {color, hex, rarity, description}
+    # and collect primary colors (color_primary) for the top palette
+    gem_colors = {}
+    primary_colors = {}
+    for name, rec in index.records.items():
+        props = _normalize_colors(rec.get('Colours') or rec.get('colors'))
+        if not props:
+            continue
+        try:
+            color_list = []
+            primary = props.get('color_primary')
+            cr = props.get('color_range') or []
+            if isinstance(cr, list):
+                for entry in cr:
+                    if not isinstance(entry, dict):
+                        continue
+                    cname = entry.get('color')
+                    chex = entry.get('hex')
+                    rrar = entry.get('rarity') or entry.get('color_rarity') or ''
+                    desc = entry.get('description') or ''
+                    if cname:
+                        color_list.append({'color': cname, 'hex': chex or '#CCCCCC', 'rarity': rrar, 'description': desc})
+                        # if this is the primary color, record its hex for palette
+                        if primary and cname == primary and primary not in primary_colors:
+                            primary_colors[primary] = chex or '#CCCCCC'
+
+            # if primary declared but not matched above, try to find its hex in color_list
+            if primary and primary not in primary_colors:
+                found = next((c for c in color_list if c['color'] == primary), None)
+                primary_colors[primary] = found['hex'] if found else '#CCCCCC'
+
+            if color_list:
+                gem_colors[name] = color_list
+        except Exception as e:
+            logger.warning(f"Error parsing colors for {name}: {e}")
+
+    # Master gem list in mineral group order with colors attached
+    gems_master = [{'name': name, 'mineral_group': group_name, 'colors': gem_colors.get(name, [])}
+                   for group_name, members in index.groups.items() for name in members]
+    palette = sorted(({'color': c, 'hex': h} for c, h in primary_colors.items()),
+                     key=lambda x: str(x['color']).lower())
+    return {'palette': palette, 'gems': gems_master}
+
+
+def build_investment(index):
+    categories = {}
+    for name, rec in index.records.items():
+        gem = {
+            'name': name,
+            'investment': _text(rec, 'InvestmentAppropriatenessLevel'),
+            'investment_description': _text(rec, 'InvestmentAppropriatenessDescription'),
+            'mineral_group': index.gem_to_group.get(name, '')
+        }
+        categories.setdefault(gem['investment'] or 'Unknown Investment Appropriateness', []).append(gem)
+    return _ordered(categories, INVESTMENT_ORDER, sort_key=_by_name, include_extra=True)
+
+
+FACET_BUILDERS = {
+    'hardness': build_hardness,
+    'rarity': build_rarity,
+    'availability': build_availability,
+    'size': build_size,
+    'price': build_price,
+    'colors': build_colors,
+    'investment': build_investment,
+}
+
+
+def materialize(index):
+    """Compute every facet view for one catalog index, keyed by facet name."""
+    views = {}
+    for name, builder in FACET_BUILDERS.items():
+        try:
+            views[name] = builder(index)
+        except Exception as e:
+            logger.error(f"Failed to materialize '{name}' facet: {e}")
+            views[name] = None
+    return views
+
+
+_last = (None, None)
+_lock = threading.Lock()
+
+
+def get_facet(index, name):
+    """Return the materialized view `name` for a catalog index.
+
+    All facets are built together the first time any facet of a new index is
+    requested; later calls for the same index are dictionary lookups.
+    """
+    global _last
+    source, views = _last
+    if source is not index:
+        with _lock:
+            source, views = _last
+            if source is not index:
+                views = materialize(index)
+                _last = (index, views)
+    return views.get(name)
@@ -0,0 +1,152 @@
+"""In-process mirror of the gem_attributes table.
+
+The rankings tiers and scores in gem_attributes change only when the rankings are
+recomputed, yet by_hardness, by_brilliance and the investment rankings page used to
+query the table on every render. `get_gem_attributes()` returns an immutable
+snapshot of the whole table, keyed by gem name, loaded once per worker.
+
+The snapshot is reloaded when the table may have changed: writers in this process
+call `invalidate()` after committing, and commits from any other connection or
+process are noticed through `PRAGMA data_version` on a dedicated monitor connection,
+checked at most every GEM_ATTRIBUTES_RECHECK_SECONDS. Between checks readers never
+touch SQLite.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from types import MappingProxyType
+
+from utils import db
+from utils.db_logger import log_db_exception
+from utils.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+_SELECT = (
+    "SELECT gem_type_id, gem_type_name AS name, Mineral_Group AS mineral_group, "
+    "Investment_Ranking_Score AS composite, Investment_Ranking_Tier AS tier, Price_Range AS price_text, "
+    "Hardness_Level AS hardness_val, Hardness_Range AS hardness_str, Rarity_Level AS rarity_label, "
+    "Availability_Level AS availability_label, Investment_Appropriateness_Level AS investment_label "
+    "FROM gem_attributes"
+)
+
+
+def _name_key(name):
+    return (name or '').strip().lower()
+
+
+class GemAttributes:
+    """Immutable snapshot of gem_attributes; rows are ordered by ranking score, best first."""
+
+    def __init__(self, rows, data_version=None):
+        records = [MappingProxyType(dict(r)) for r in rows]
+        records.sort(key=lambda r: r.get('composite') or 0, reverse=True)
+        self.rows = tuple(records)
+        self.by_name = MappingProxyType({_name_key(r['name']): r for r in records if r.get('name')})
+        self.data_version = data_version
+        self.loaded_at = time.time()
+
+    def get(self, name):
+        """Return the row for `name` (case-insensitive), or None."""
+        return self.by_name.get(_name_key(name))
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class GemAttributesMirror:
+    """Keeps a GemAttributes snapshot of one database file up to date."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._snapshot = GemAttributes([])
+        self._monitor = None
+        self._checked_at = None
+        self._dirty = True
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def invalidate(self):
+        self._dirty = True
+
+    def get(self, recheck_seconds: float) -> GemAttributes:
+        checked_at = self._checked_at
+        if not self._dirty and checked_at is not None and time.monotonic() - checked_at < recheck_seconds:
+            return self._snapshot
+        with self._lock:
+            if self._dirty or self._checked_at is None or time.monotonic() - self._checked_at >= recheck_seconds:
+                self._refresh()
+            return self._snapshot
+
+    def _open_monitor(self):
+        if self._monitor is None and os.path.exists(self.path):
+            self._monitor = db.connect(self.path, check_same_thread=False)
+            self._monitor.execute('PRAGMA query_only=ON')
+        return self._monitor
+
+    def _refresh(self):
+        # Caller holds self._lock
+        self._checked_at = time.monotonic()
+        try:
+            monitor = self._open_monitor()
+            if monitor is None:
+                return
+            version = monitor.execute('PRAGMA data_version').fetchone()[0]
+            if not self._dirty and version == self._snapshot.data_version:
+                return
+            self._dirty = False
+            try:
+                rows = monitor.execute(_SELECT).fetchall()
+            except sqlite3.OperationalError as e:
+                # The table is created by the first rankings computation
+                if 'no such table' not in str(e):
+                    raise
+                rows = []
+            self._snapshot = GemAttributes(rows, version)
+            self.loads += 1
+        except Exception as e:
+            log_db_exception(e, f'gem_attributes mirror: loading {self.path}')
+            if self._monitor is not None:
+                try:
+                    self._monitor.close()
+                except Exception:
+                    pass
+                self._monitor = None
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'rows': len(self._snapshot),
+            'loads': self.loads,
+            'data_version': self._snapshot.data_version,
+        }
+
+
+_mirrors = {}
+_mirrors_lock = threading.Lock()
+
+
+def _mirror_for(path: str) -> GemAttributesMirror:
+    mirror = _mirrors.get(path)
+    if mirror is None:
+        with _mirrors_lock:
+            mirror = _mirrors.setdefault(path, GemAttributesMirror(path))
+    return mirror
+
+
+def get_gem_attributes(path: str = None) -> GemAttributes:
+    """Return the current snapshot of gem_attributes (empty until the table exists)."""
+    recheck = float(get_setting('GEM_ATTRIBUTES_RECHECK_SECONDS', 5))
+    return _mirror_for(path or db.DB_PATH).get(recheck)
+
+
+def invalidate(path: str = None):
+    """Reload the mirror on next access; call after committing writes to gem_attributes."""
+    _mirror_for(path or db.DB_PATH).invalidate()
+
+
+def get_gem_attributes_stats():
+    """Return stats of every mirror in this worker (for /health)."""
+    return [m.stats() for m in list(_mirrors.values())]
@@ -0,0 +1,173 @@
+"""Find gem type names in free text such as listing and invoice titles.
+
+`GemMatcher` compiles every gem type name in the catalog, plus known aliases and
+simple plurals, into one Aho-Corasick automaton over words. A title is then scanned
+once, left to right, whatever the size of the catalog: matches always start and end
+on word boundaries ("Opal" does not match "Opalescent"), and when several names
+match, the longest wins ("Star Sapphire" over "Sapphire"), then the earliest.
+
+Titles and names are compared case-insensitively with accents removed, so
+"VAYRYNENITE" matches "Väyrynenite". `get_gem_matcher()` returns the matcher for a
+catalog list and rebuilds it only when a different list (i.e. a refreshed catalog)
+is passed in, like utils.catalog_index.get_catalog_index().
+"""
+import logging
+import re
+import threading
+import unicodedata
+from collections import deque, namedtuple
+
+logger = logging.getLogger(__name__)
+
+# Other names sellers use for a catalog gem type: alias -> catalog GemTypeName.
+# An alias is only used when its gem type is in the catalog, and never shadows a
+# catalog name spelled the same way.
+GEM_ALIASES = {
+    # pdfplumber drops the "ff" ligature from some invoices
+    'Taaeite': 'Taaffeite',
+    'Kunzite': 'Spodumene',
+    'Hiddenite': 'Spodumene',
+    'Paraiba': 'Paraiba Tourmaline',
+}
+
+_WORD = re.compile(r'[^\W_]+')
+
+# start/end are offsets into normalize(text)
+GemMatch = namedtuple('GemMatch', 'gem_type_id name start end')
+
+
+def normalize(text):
+    """Lower-case `text`, expand ligatures and strip accents."""
+    decomposed = unicodedata.normalize('NFKD', str(text or ''))
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def words(text):
+    """Return the normalized words of `text` as (word, start, end) triples."""
+    return [(m.group(), m.start(), m.end()) for m in _WORD.finditer(normalize(text))]
+
+
+def _plurals(word):
+    if word.endswith(('s', 'x', 'z', 'ch', 'sh')):
+        return (word + 'es',)
+    return (word + 's',)
+
+
+class GemMatcher:
+    """Word-level Aho-Corasick automaton over gem type names and aliases."""
+
+    def __init__(self, gem_types, aliases=GEM_ALIASES):
+        # Trie node i: children[i] word -> node, fail[i] its failure link, out[i] the
+        # (target, word count) ending there or None, dict_link[i] the next node with an out
+        self._children = [{}]
+        self._fail = [0]
+        self._out = [None]
+        self._dict_link = [0]
+        self.size = 0
+
+        by_name = {}
+        for gt in gem_types or []:
+            if not isinstance(gt, dict) or not gt.get('GemTypeName'):
+                continue
+            name = str(gt['GemTypeName']).strip()
+            by_name.setdefault(normalize(name), (gt.get('GemTypeId'), name))
+
+        patterns = {}
+        # Catalog names first, so an alias never replaces one
+        for key, target in by_name.items():
+            self._add_forms(patterns, key, target)
+        for alias, name in (aliases or {}).items():
+            target = by_name.get(normalize(name))
+            if target is not None:
+                self._add_forms(patterns, normalize(alias), target)
+        for tokens, target in patterns.items():
+            self._insert(tokens, target)
+        self._link()
+
+    @staticmethod
+    def _add_forms(patterns, key, target):
+        tokens = tuple(word for word, _, _ in words(key))
+        if not tokens:
+            return
+        patterns.setdefault(tokens, target)
+        for plural in _plurals(tokens[-1]):
+            patterns.setdefault(tokens[:-1] + (plural,), target)
+
+    def _insert(self, tokens, target):
+        node = 0
+        for token in tokens:
+            nxt = self._children[node].get(token)
+            if nxt is None:
+                nxt = len(self._children)
+                self._children[node][token] = nxt
+                self._children.append({})
+                self._fail.append(0)
+                self._out.append(None)
+                self._dict_link.append(0)
+            node = nxt
+        self._out[node] = (target, len(tokens))
+        self.size += 1
+
+    def _link(self):
+        """Compute failure links and output links breadth first."""
+        queue = deque(self._children[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._children[node].items():
+                link = 0
+                if node:
+                    fail = self._fail[node]
+                    while fail and token not in self._children[fail]:
+                        fail = self._fail[fail]
+                    link = self._children[fail].get(token, 0)
+                self._fail[child] = link
+                self._dict_link[child] = link if self._out[link] is not None else self._dict_link[link]
+                queue.append(child)
+
+    def find_all(self, text):
+        """Return every GemMatch in `text`, in the order their last word appears."""
+        found = []
+        tokens = words(text)
+        node = 0
+        for i, (token, _, end) in enumerate(tokens):
+            while node and token not in self._children[node]:
+                node = self._fail[node]
+            node = self._children[node].get(token, 0)
+            hit = node if self._out[node] is not None else self._dict_link[node]
+            while hit:
+                (gem_type_id, name), count = self._out[hit]
+                found.append(GemMatch(gem_type_id, name, tokens[i - count + 1][1], end))
+                hit = self._dict_link[hit]
+        return found
+
+    def match(self, text):
+        """Return the best GemMatch in `text` (longest, then earliest), or None."""
+        best = None
+        best_key = None
+        for m in self.find_all(text):
+            key = (-(m.end - m.start), m.start)
+            if best_key is None or key < best_key:
+                best, best_key = m, key
+        return best
+
+
+_EMPTY_MATCHER = GemMatcher([])
+_last = (None, _EMPTY_MATCHER)
+_lock = threading.Lock()
+
+
+def get_gem_matcher(gems_list):
+    """Return the GemMatcher for a catalog list, building it only when the list changes."""
+    global _last
+    if not gems_list:
+        return _EMPTY_MATCHER
+    source, matcher = _last
+    if source is gems_list:
+        return matcher
+    with _lock:
+        source, matcher = _last
+        if source is not gems_list:
+            matcher = GemMatcher(gems_list)
+            _last = (gems_list, matcher)
+            logger.debug(f"Built gem matcher with {matcher.size} patterns")
+        return matcher
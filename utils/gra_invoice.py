@@ -0,0 +1,247 @@
+"""Grammar for Gem Rock Auctions (GRA) invoice text.
+
+The text pdfplumber extracts from a GRA invoice is a header (invoice number, order
+date, seller), one block of lines per item, each ending with a "Product ID: <n>"
+line, and a trailer with the totals and shipping details:
+
+    Qty Products Price
+    Grandidierite 5.27Ct Natural World Rare Gemstone
+    D0624/B11 $50.00 USD
+    1
+    SKU:
+    (Discount : $25.00 USD)
+    Product ID: 1698413
+    ...
+    Subtotal $160.00 USD
+    Shipping $18.00 USD
+    Total $98.00 USD
+    Shipping Provider Standard Shipping - Tracked (21 days)
+    Tracking Number SF6047067039197
+
+`tokenize()` classifies every line once against a single precompiled pattern, and
+`InvoiceParser` consumes those tokens in one pass: header, totals and shipping
+fields keep their first occurrence, and an item is emitted as soon as its
+"Product ID:" line arrives, so pages can be fed as they are extracted. Items carry
+only what the invoice says; enrichment from the listings API happens in the caller.
+"""
+import logging
+import re
+from collections import namedtuple
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# One alternative per line kind, tried at the start of each line
+_LINE = re.compile(r'''
+    (?P<product_id>Product\ ID:\s*(?P<product_id_v>\d+))
+  | (?P<sku>(?:1\s+)?SKU:)
+  | (?P<qty>1\s*$)
+  | (?P<invoice>Invoice\ \#(?P<invoice_v>\d+))
+  | (?P<order_date>Order\ date\s+(?P<day>\d{1,2})(?:st|nd|rd|th)?\s+(?P<month>\w+)\s+(?P<year>\d{4}))
+  | (?P<sold_by>SOLD\ BY\s+SOLD\ TO\s*$)
+  | (?P<shipping_provider>(?i:Shipping\ Provider)\s+(?P<shipping_provider_v>.+?)\s*$)
+  | (?P<tracking_number>(?i:Tracking\ Number)\s+(?P<tracking_number_v>.+?)\s*$)
+  | (?P<total>(?P<total_k>(?i:Subtotal|Shipping|Insurance|Taxes|Total))\s+\$(?P<total_v>\d+\.?\d*)\s+(?i:USD))
+''', re.VERBOSE)
+
+# Item fields found anywhere in a line
+PRICE = re.compile(r'(?<!\()\$(\d+\.?\d*)\s+USD')
+DISCOUNT = re.compile(r'\(Discount\s*:\s*\$(\d+\.?\d*)\s+USD\)', re.IGNORECASE)
+SKU_VALUE = re.compile(r'SKU:\s*([A-Z0-9-]+)', re.IGNORECASE)
+WEIGHT = re.compile(r'(\d+\.?\d*)\s*(?:CRT|Crt|Cts?|CT)\.?', re.IGNORECASE)
+
+# Title cleanup, applied to the short title text only
+_TITLE_HEADER_END = re.compile(r'Qty\s+Products\s+Price\s*\n', re.IGNORECASE)
+_TITLE_TRAILING_PRICE = re.compile(r'\n?\d*\s*\$[\d.]+\s+USD\s*$')
+_TITLE_TRAILING_QTY = re.compile(r'\n1\s*$')
+_TITLE_TRAILING_SKU_CODE = re.compile(r'\n[A-Z0-9/-]+\s*$')
+_WHITESPACE = re.compile(r'\s+')
+
+SELLER_END = 'Stanislav'
+
+Token = namedtuple('Token', 'kind line match')
+
+
+def tokenize(text):
+    """Yield a Token for every line of `text`, classified by its leading keyword."""
+    for line in text.split('\n'):
+        m = _LINE.match(line)
+        yield Token(m.lastgroup if m else 'text', line, m)
+
+
+def parse_order_date(day, month, year):
+    """Return 'YYYY-MM-DD' for an invoice date like ('19', 'Nov', '2025'), or None."""
+    for fmt in ('%d %B %Y', '%d %b %Y'):
+        try:
+            return datetime.strptime(f"{day} {month} {year}", fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def clean_title(raw_title):
+    """Strip the column header, price, quantity and SKU-code lines from an item's title text."""
+    raw_title = raw_title.strip()
+    header_end = _TITLE_HEADER_END.search(raw_title)
+    if header_end:
+        raw_title = raw_title[header_end.end():].strip()
+    raw_title = _TITLE_TRAILING_PRICE.sub('', raw_title).strip()
+    raw_title = _TITLE_TRAILING_QTY.sub('', raw_title).strip()
+    raw_title = _TITLE_TRAILING_SKU_CODE.sub('', raw_title).strip()
+    return _WHITESPACE.sub(' ', raw_title)
+
+
+def _title_end(lines, kinds):
+    """Index of the first line after an item's title: its SKU line, or the quantity line before it."""
+    for i in range(1, len(lines)):
+        if kinds[i] != 'sku':
+            continue
+        if lines[i].startswith('SKU:'):
+            return i - 1 if i > 1 and kinds[i - 1] == 'qty' else i
+        return i  # "1 SKU: ..."
+    return None
+
+
+def parse_item(product_id, lines, kinds, trace=None):
+    """Build an item dict from the lines of its block, or None if the block has no price."""
+    price = discount = sku = None
+    for i, line in enumerate(lines):
+        if price is None and '$' in line:
+            m = PRICE.search(line)
+            if m:
+                price = float(m.group(1))
+        if discount is None and '(' in line:
+            m = DISCOUNT.search(line)
+            if m:
+                discount = float(m.group(1))
+        if sku is None and 'sku:' in line.lower():
+            following = lines[i + 1] if i + 1 < len(lines) else ''
+            m = SKU_VALUE.search(f"{line}\n{following}")
+            if m and m.start() < len(line):
+                sku = m.group(1).strip()
+
+    if price is None:
+        if trace:
+            trace('no_price', product_id=product_id)
+        return None
+    discount = discount or 0.0
+
+    title = ''
+    carat = None
+    end = _title_end(lines, kinds)
+    if end is not None:
+        title = clean_title('\n'.join(lines[:end]))
+    if trace:
+        trace('title', product_id=product_id, title=title if end is not None else None)
+    if title:
+        m = WEIGHT.search(title)
+        if m:
+            carat = float(m.group(1))
+
+    final_price = price - discount
+    return {
+        'product_id': product_id,
+        'sku': sku,
+        'price': round(final_price, 2),
+        'discount': discount if discount > 0 else None,
+        'original_price': price if discount > 0 else None,
+        'title': title,
+        'carat': carat,
+    }
+
+
+class InvoiceParser:
+    """Single-pass parser over the text of a GRA invoice, fed a page at a time.
+
+    `feed(text)` returns the items completed by that text; `header` holds the
+    invoice number, order date, seller, totals and shipping details found so far.
+    Pass `trace` (a callable taking an event name and fields, see utils.parse_trace)
+    to record how each item was parsed.
+    """
+
+    def __init__(self, trace=None):
+        self.header = {
+            'invoice_number': None,
+            'order_date': None,
+            'seller_invoice_name': None,
+            'totals': {},
+            'shipping_info': {},
+        }
+        self.trace = trace
+        self.lines_seen = 0
+        self._lines = []
+        self._kinds = []
+        self._partial = ''
+        self._seller_lines = None
+
+    def feed(self, text):
+        # A trailing partial line waits for the next chunk
+        text = self._partial + text
+        end = text.rfind('\n')
+        if end < 0:
+            self._partial = text
+            return []
+        text, self._partial = text[:end], text[end + 1:]
+        return self._consume(tokenize(text))
+
+    def close(self):
+        """Parse any text left after the last newline; returns the items it completes."""
+        text, self._partial = self._partial, ''
+        return self._consume(tokenize(text)) if text else []
+
+    def _consume(self, tokens):
+        items = []
+        header = self.header
+        for kind, line, m in tokens:
+            self.lines_seen += 1
+            if self._seller_lines is not None:
+                self._collect_seller(line)
+
+            if kind == 'product_id':
+                product_id = m.group('product_id_v')
+                if self.trace:
+                    self.trace('block', product_id=product_id, text='\n'.join(self._lines))
+                item = parse_item(product_id, self._lines, self._kinds, self.trace)
+                if item:
+                    items.append(item)
+                # The rest of the line (normally empty) starts the next block
+                self._lines = ['', line[m.end():]] if line[m.end():] else ['']
+                self._kinds = ['text'] * len(self._lines)
+                continue
+
+            self._lines.append(line)
+            self._kinds.append(kind)
+            if kind == 'invoice':
+                if not header['invoice_number']:
+                    header['invoice_number'] = m.group('invoice_v')
+            elif kind == 'order_date':
+                if not header['order_date']:
+                    header['order_date'] = parse_order_date(m.group('day'), m.group('month'), m.group('year'))
+            elif kind == 'sold_by':
+                if not header['seller_invoice_name'] and self._seller_lines is None:
+                    self._seller_lines = []
+            elif kind == 'total':
+                key = m.group('total_k').lower()
+                header['totals'].setdefault(key, float(m.group('total_v')))
+            elif kind in ('shipping_provider', 'tracking_number'):
+                header['shipping_info'].setdefault(kind, m.group(f'{kind}_v').strip())
+        return items
+
+    def _collect_seller(self, line):
+        # The seller's name runs from the line after "SOLD BY SOLD TO" to the buyer's name
+        end = line.find(SELLER_END)
+        if end < 0:
+            self._seller_lines.append(line)
+            return
+        name = '\n'.join(self._seller_lines + [line[:end]]).strip()
+        if name:
+            self.header['seller_invoice_name'] = name
+        self._seller_lines = None
+
+
+def parse_invoice_text(text, trace=None):
+    """Parse a whole invoice's text; returns the header dict with an 'items' list."""
+    parser = InvoiceParser(trace)
+    items = parser.feed(text)
+    items += parser.close()
+    return dict(parser.header, items=items)
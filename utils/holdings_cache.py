@@ -0,0 +1,196 @@
+"""Per-user cache of portfolio holdings and portfolio reports.
+
+The portfolio pages and every gem profile viewed by a signed-in user used to
+download the user's whole holdings list from the API. Each user's holdings are now
+kept for HOLDINGS_CACHE_TTL seconds together with a gem_type_id -> holdings index,
+so a gem profile only looks up its gem type. Other per-user portfolio responses
+(search, by-form and by-gem-type reports) are cached in the same entry.
+
+Writes go through the portfolio blueprint, which calls `invalidate_user()` after
+creating, updating or deleting a holding, so users always see their own changes.
+Concurrent misses for the same (user, key) share one fetch, while misses for
+different keys of a user fetch in parallel. A fetch that was already in flight when
+the user was invalidated is not cached, and later callers do not wait on it.
+Failed fetches are never cached.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+
+from flask import current_app
+
+from utils.api_client import get_session, load_api_key
+from utils.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+MAX_USERS = 1024
+
+HOLDINGS = 'holdings'
+
+
+class HoldingsSnapshot:
+    """A user's holdings list plus a read-only gem_type_id -> holdings index."""
+
+    def __init__(self, holdings):
+        self.holdings = list(holdings)
+        by_gem_type = {}
+        for h in self.holdings:
+            if isinstance(h, dict):
+                by_gem_type.setdefault(h.get('GemTypeId'), []).append(h)
+        self.by_gem_type = MappingProxyType({k: tuple(v) for k, v in by_gem_type.items()})
+
+    def for_gem_type(self, gem_type_id):
+        return list(self.by_gem_type.get(gem_type_id, ()))
+
+
+class _Flight:
+    """One in-progress fetch that callers for the same key wait on."""
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class _UserEntry:
+    def __init__(self):
+        self.values = {}  # key -> (value, stored_at)
+        self.flights = {}  # key -> _Flight
+        self.generation = 0
+        # Guards values and flights only; never held while fetching
+        self.lock = threading.Lock()
+
+
+class HoldingsCache:
+    """LRU of per-user entries; each entry maps a resource key to a value with its age."""
+
+    def __init__(self, max_users=MAX_USERS):
+        self.max_users = max_users
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _entry(self, google_user_id):
+        with self._lock:
+            entry = self._users.get(google_user_id)
+            if entry is None:
+                entry = self._users[google_user_id] = _UserEntry()
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+            else:
+                self._users.move_to_end(google_user_id)
+            return entry
+
+    def get(self, google_user_id, key, fetch, ttl):
+        """Return the cached value for (user, key), calling `fetch()` when missing or expired.
+
+        `fetch` returns None on failure; None is returned and nothing is cached.
+        """
+        entry = self._entry(google_user_id)
+        with entry.lock:
+            cached = entry.values.get(key)
+            if cached is not None and time.monotonic() - cached[1] < ttl:
+                self.hits += 1
+                return cached[0]
+            flight = entry.flights.get(key)
+            leader = flight is None
+            if leader:
+                self.misses += 1
+                flight = entry.flights[key] = _Flight(entry.generation)
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = fetch()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with entry.lock:
+                if entry.flights.get(key) is flight:
+                    del entry.flights[key]
+                if flight.value is not None and entry.generation == flight.generation:
+                    entry.values[key] = (flight.value, time.monotonic())
+            flight.event.set()
+        return flight.value
+
+    def invalidate(self, google_user_id=None):
+        """Drop one user's cached data (every user's when google_user_id is None)."""
+        with self._lock:
+            entries = list(self._users.values()) if google_user_id is None else [self._users.get(google_user_id)]
+        for entry in entries:
+            if entry is None:
+                continue
+            with entry.lock:
+                entry.generation += 1
+                entry.values = {}
+                entry.flights = {}
+        self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            users = len(self._users)
+        return {'users': users, 'hits': self.hits, 'misses': self.misses, 'invalidations': self.invalidations}
+
+
+_cache = HoldingsCache()
+
+
+def _ttl():
+    return float(get_setting('HOLDINGS_CACHE_TTL', 60))
+
+
+def _fetch_holdings(google_user_id):
+    base = current_app.config.get('GEMDB_API_URL', 'https://api.preciousstone.info')
+    token = load_api_key() or ''
+    headers = {'X-API-Key': token} if token else {}
+    url = f"{base.rstrip('/')}/api/v2/users/{google_user_id}/gem-holdings"
+    try:
+        r = get_session().get(url, headers=headers)
+    except Exception as e:
+        logger.error(f"Error calling holdings API: {e}")
+        return None
+    if r.status_code != 200:
+        logger.warning(f"Holdings API returned {r.status_code}: {r.text[:500]}")
+        return None
+    try:
+        holdings = r.json()
+    except ValueError:
+        logger.warning('Holdings API returned a non-JSON body')
+        return None
+    if not isinstance(holdings, list):
+        logger.warning(f"Holdings API returned non-list: {type(holdings)}")
+        return None
+    return HoldingsSnapshot(holdings)
+
+
+def get_holdings_snapshot(google_user_id):
+    """Return the user's HoldingsSnapshot, or None if the holdings API call failed."""
+    if not google_user_id:
+        return None
+    return _cache.get(google_user_id, HOLDINGS, lambda: _fetch_holdings(google_user_id), _ttl())
+
+
+def get_user_resource(google_user_id, key, fetch):
+    """Cache another per-user portfolio response under `key` (invalidated with the holdings)."""
+    return _cache.get(google_user_id, key, fetch, _ttl())
+
+
+def invalidate_user(google_user_id=None):
+    """Forget a user's cached portfolio after a write (everyone's if the user is unknown)."""
+    _cache.invalidate(google_user_id)
+
+
+def get_holdings_cache_stats():
+    """Return hit/miss counters (for /health)."""
+    return _cache.stats()
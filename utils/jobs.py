@@ -0,0 +1,315 @@
+"""Background jobs kept in the local SQLite database (gems_portfolio.db).
+
+Slow request work, such as parsing an uploaded GRA invoice PDF, is submitted here
+instead of running inside the request. `submit()` stores the job and its input in
+the `jobs` table and hands it to a small worker pool (JOB_WORKERS threads); the page
+then polls `get_job()` for progress and, once done, the result.
+
+Job rows outlive the process, so a result can still be fetched after a worker
+restart or from another gunicorn worker. A job that was queued, or whose worker
+stopped mid-run, is picked up again when the next process starts. Every run claims
+its job with a conditional UPDATE, so a job never runs twice at the same time.
+Finished jobs are deleted after JOB_RETENTION_SECONDS.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from utils import db
+from utils.db_logger import log_db_exception
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# A running job whose progress has not moved for this long is considered abandoned
+STALE_SECONDS = 300
+MAX_ATTEMPTS = 3
+
+_CREATE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS jobs (
+        job_id TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        owner TEXT,
+        status TEXT NOT NULL,
+        progress REAL NOT NULL DEFAULT 0,
+        message TEXT,
+        params TEXT,
+        input BLOB,
+        result TEXT,
+        error TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        finished_at REAL
+    )
+'''
+_CREATE_INDEX = 'CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, updated_at)'
+
+
+class JobError(Exception):
+    """A job failure whose message is shown to the user as is."""
+
+
+class JobContext:
+    """What a job handler gets: its input, parameters and a progress reporter."""
+
+    def __init__(self, queue, job_id, data, params):
+        self._queue = queue
+        self.job_id = job_id
+        self.input = data
+        self.params = params
+
+    def progress(self, fraction, message=None):
+        """Record progress (0..1) and an optional status message."""
+        self._queue._update_progress(self.job_id, fraction, message)
+
+
+class JobQueue:
+    """Worker pool running jobs stored in one SQLite database."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._handlers = {}
+        self._executor = None
+        self._app = None
+        self._lock = threading.Lock()
+        self._table_ready = False
+        self.workers = 0
+        self.retention = 86400
+        self.completed = 0
+        self.failed = 0
+
+    def register(self, kind, handler):
+        """Register `handler(JobContext) -> JSON-serializable result` for a job kind."""
+        self._handlers[kind] = handler
+
+    def start(self, app, workers=2, retention=86400):
+        """Start the worker pool and resume jobs left unfinished by earlier processes."""
+        self._app = app
+        self.retention = retention
+        with self._lock:
+            if self._executor is None:
+                self.workers = max(1, int(workers))
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='jobs')
+        # No database yet means no unfinished jobs; the table is created on first submit
+        if not os.path.exists(self.path or db.DB_PATH):
+            return
+        try:
+            for job_id in self._recoverable():
+                self._executor.submit(self._run, job_id)
+        except Exception as e:
+            log_db_exception(e, 'jobs: resuming unfinished jobs')
+            logger.exception('Could not resume unfinished jobs')
+
+    def _conn(self):
+        conn = db.get_db(self.path)
+        if not self._table_ready:
+            with conn:
+                conn.execute(_CREATE_TABLE)
+                conn.execute(_CREATE_INDEX)
+            self._table_ready = True
+        return conn
+
+    def submit(self, kind, owner, data, params=None):
+        """Store a new job and queue it; returns the job id."""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._conn()
+        try:
+            with conn:
+                conn.execute('DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?',
+                             (now - self.retention,))
+                conn.execute(
+                    'INSERT INTO jobs (job_id, kind, owner, status, params, input, created_at, updated_at)'
+                    ' VALUES (?,?,?,?,?,?,?,?)',
+                    (job_id, kind, owner, QUEUED, json.dumps(params or {}), data, now, now))
+        finally:
+            conn.close()
+        if self._executor is None:
+            raise RuntimeError('Job queue is not started')
+        # Run the job in the app that submitted it (resumed jobs use the starting app)
+        try:
+            app = current_app._get_current_object()
+        except RuntimeError:
+            app = self._app
+        self._executor.submit(self._run, job_id, app)
+        return job_id
+
+    def get(self, job_id, owner=None):
+        """Return a job's public state, or None if unknown (or owned by someone else)."""
+        conn = self._conn()
+        try:
+            row = conn.execute(
+                'SELECT job_id, kind, owner, status, progress, message, result, error, created_at, finished_at'
+                ' FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None or (owner is not None and row['owner'] != owner):
+            return None
+        return {
+            'job_id': row['job_id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'progress': row['progress'],
+            'message': row['message'],
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'finished_at': row['finished_at'],
+        }
+
+    def _recoverable(self):
+        cutoff = time.time() - STALE_SECONDS
+        conn = self._conn()
+        try:
+            with conn:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = 'The job was interrupted too many times',"
+                    " input = NULL, finished_at = ? WHERE status IN (?, ?) AND attempts >= ? AND updated_at < ?",
+                    (FAILED, time.time(), QUEUED, RUNNING, MAX_ATTEMPTS, cutoff))
+            rows = conn.execute(
+                'SELECT job_id FROM jobs WHERE status = ? OR (status = ? AND updated_at < ?) ORDER BY created_at',
+                (QUEUED, RUNNING, cutoff)).fetchall()
+        finally:
+            conn.close()
+        return [r['job_id'] for r in rows]
+
+    def _claim(self, job_id):
+        """Mark a job running; returns its row, or None if another worker has it."""
+        now = time.time()
+        conn = self._conn()
+        try:
+            with conn:
+                cur = conn.execute(
+                    'UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ?'
+                    ' WHERE job_id = ? AND (status = ? OR (status = ? AND updated_at < ?))',
+                    (RUNNING, now, job_id, QUEUED, RUNNING, now - STALE_SECONDS))
+            if cur.rowcount != 1:
+                return None
+            return conn.execute('SELECT kind, params, input FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        finally:
+            conn.close()
+
+    def _update_progress(self, job_id, fraction, message=None):
+        conn = self._conn()
+        try:
+            with conn:
+                conn.execute('UPDATE jobs SET progress = ?, message = COALESCE(?, message), updated_at = ?'
+                             ' WHERE job_id = ?',
+                             (max(0.0, min(1.0, float(fraction))), message, time.time(), job_id))
+        finally:
+            conn.close()
+
+    def _finish(self, job_id, result=None, error=None):
+        now = time.time()
+        conn = self._conn()
+        try:
+            with conn:
+                if error is None:
+                    conn.execute(
+                        'UPDATE jobs SET status = ?, progress = 1, result = ?, input = NULL,'
+                        ' updated_at = ?, finished_at = ? WHERE job_id = ?',
+                        (DONE, json.dumps(result), now, now, job_id))
+                else:
+                    conn.execute(
+                        'UPDATE jobs SET status = ?, error = ?, input = NULL,'
+                        ' updated_at = ?, finished_at = ? WHERE job_id = ?',
+                        (FAILED, error, now, now, job_id))
+        finally:
+            conn.close()
+
+    def _run(self, job_id, app=None):
+        app = app or self._app
+        try:
+            row = self._claim(job_id)
+            if row is None:
+                return
+            handler = self._handlers.get(row['kind'])
+            if handler is None:
+                self._finish(job_id, error=f"Unknown job kind '{row['kind']}'")
+                self.failed += 1
+                return
+            ctx = JobContext(self, job_id, row['input'], json.loads(row['params'] or '{}'))
+            try:
+                if app is not None:
+                    with app.app_context():
+                        result = handler(ctx)
+                else:
+                    result = handler(ctx)
+            except JobError as e:
+                self._finish(job_id, error=str(e))
+                self.failed += 1
+                return
+            except Exception as e:
+                logger.exception(f"Job {job_id} ({row['kind']}) failed")
+                self._finish(job_id, error=f"{type(e).__name__}: {e}")
+                self.failed += 1
+                return
+            self._finish(job_id, result=result)
+            self.completed += 1
+        except Exception as e:
+            log_db_exception(e, f'jobs: running job {job_id}')
+            logger.exception(f"Could not run job {job_id}")
+
+    def stats(self):
+        counts = {}
+        try:
+            conn = self._conn()
+            try:
+                for row in conn.execute('SELECT status, COUNT(*) AS n FROM jobs GROUP BY status'):
+                    counts[row['status']] = row['n']
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"Could not count jobs: {e}")
+        return {
+            'workers': self.workers,
+            'queued': counts.get(QUEUED, 0),
+            'running': counts.get(RUNNING, 0),
+            'done': counts.get(DONE, 0),
+            'failed': counts.get(FAILED, 0),
+            'completed_here': self.completed,
+            'failed_here': self.failed,
+        }
+
+
+_queue = JobQueue()
+
+
+def register_job_handler(kind, handler):
+    """Register the function that runs jobs of `kind` (call at import time)."""
+    _queue.register(kind, handler)
+
+
+def init_jobs(app):
+    """Start the job workers (call once handlers are registered)."""
+    _queue.start(app,
+                 workers=int(app.config.get('JOB_WORKERS', 2) or 2),
+                 retention=float(app.config.get('JOB_RETENTION_SECONDS', 86400) or 86400))
+
+
+def submit_job(kind, owner, data, params=None):
+    """Queue a job and return its id."""
+    return _queue.submit(kind, owner, data, params)
+
+
+def get_job(job_id, owner=None):
+    """Return a job's status, progress and result; None if unknown or not `owner`'s."""
+    return _queue.get(job_id, owner)
+
+
+def get_job_stats():
+    """Return job counts by status (for /health)."""
+    return _queue.stats()
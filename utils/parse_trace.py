@@ -0,0 +1,76 @@
+"""Opt-in tracing of how an uploaded document was parsed.
+
+A `ParseTrace` collects structured events (an event name plus fields) in memory
+while a parse runs. `flush()` then writes them once, as JSON lines, to a file named
+after the job or request, in PDF_TRACE_DIR. Concurrent parses never share a file,
+and nothing touches the disk inside the parse loop.
+
+Tracing is controlled by the PDF_TRACE setting:
+    off      never trace (the default)
+    request  trace uploads that ask for it with a `trace=1` form or query field
+    all      trace every parse
+"""
+import json
+import logging
+import os
+import re
+import time
+
+from utils.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+MODES = ('off', 'request', 'all')
+
+_UNSAFE_NAME = re.compile(r'[^A-Za-z0-9_.-]')
+
+
+def trace_mode():
+    mode = str(get_setting('PDF_TRACE', 'off')).strip().lower()
+    return mode if mode in MODES else 'off'
+
+
+def trace_dir():
+    """Directory for trace files (PDF_TRACE_DIR, default logs/pdf_traces)."""
+    default = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs', 'pdf_traces')
+    return get_setting('PDF_TRACE_DIR', default)
+
+
+def tracing_enabled(requested=False):
+    """Whether a parse should be traced, given whether its request asked for it."""
+    mode = trace_mode()
+    return mode == 'all' or (mode == 'request' and bool(requested))
+
+
+class ParseTrace:
+    """Buffered events of one parse, written to `<directory>/<name>.jsonl` on flush()."""
+
+    def __init__(self, name, directory=None):
+        self.name = _UNSAFE_NAME.sub('_', str(name))
+        self.directory = directory or trace_dir()
+        self.events = []
+        self._started = time.monotonic()
+
+    def __call__(self, event, **fields):
+        self.events.append((round((time.monotonic() - self._started) * 1000, 1), event, fields))
+
+    def flush(self):
+        """Write the buffered events in one go; returns the file path (None on failure)."""
+        path = os.path.join(self.directory, f"{self.name}.jsonl")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            lines = [json.dumps({'ms': ms, 'event': event, **fields}, default=str)
+                     for ms, event, fields in self.events]
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        except OSError as e:
+            logger.warning(f"Could not write parse trace {path}: {e}")
+            return None
+        self.events = []
+        logger.info(f"Wrote parse trace {path}")
+        return path
+
+
+def start_trace(name, requested=False):
+    """Return a ParseTrace if tracing is enabled for this parse, else None."""
+    return ParseTrace(name) if tracing_enabled(requested) else None
@@ -0,0 +1,158 @@
+"""Streaming text extraction from uploaded PDF files.
+
+Uploads are spooled to a temp file (`spool_upload`) instead of being read into
+memory, and `iter_page_texts` yields each page's text in order as soon as it has
+been extracted. Documents of PDF_PARALLEL_MIN_PAGES pages or more are split into
+page ranges that are extracted by a pool of PDF_EXTRACT_WORKERS processes
+(pdfplumber layout analysis is CPU bound, so threads would not help), started from
+a fork server; short documents are read in-process, where starting a worker would
+cost more than it saves.
+"""
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+PAGES_PER_TASK = 2
+PDF_PARALLEL_MIN_PAGES = 4
+
+_CONTROL_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def clean_text(text):
+    """Remove null bytes and other control characters pdfplumber can emit."""
+    return _CONTROL_CHARS.sub('', (text or '').replace('\x00', ''))
+
+
+def spool_dir():
+    """Directory for spooled uploads (UPLOAD_SPOOL_DIR, default <tmp>/gems-uploads)."""
+    path = get_setting('UPLOAD_SPOOL_DIR', '') or os.path.join(tempfile.gettempdir(), 'gems-uploads')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def spool_upload(file_storage, suffix='.pdf'):
+    """Stream an uploaded file to a new temp file and return its path (caller deletes it)."""
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=spool_dir())
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            file_storage.save(f)
+    except Exception:
+        discard(path)
+        raise
+    return path
+
+
+def discard(path):
+    """Delete a spooled file, ignoring files that are already gone."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not delete spooled file {path}: {e}")
+
+
+def _extract_pages(path, start, stop):
+    """Return the cleaned text of pages [start, stop) (runs in a worker process)."""
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return [clean_text(pdf.pages[i].extract_text()) for i in range(start, stop)]
+
+
+def _workers():
+    workers = int(get_setting('PDF_EXTRACT_WORKERS', 0) or 0)
+    if workers <= 0:
+        workers = min(4, os.cpu_count() or 1)
+    return workers
+
+
+def _get_pool(workers):
+    """Process pool for page extraction, created on first use (and again after a fork)."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # The web worker already runs many threads when the first long invoice
+            # arrives, and forking it could copy a lock another thread holds (logging,
+            # the SQLite pool). Workers come from a single-threaded fork server instead.
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['utils.pdf_text', 'pdfplumber'])
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _drop_pool(pool):
+    """Forget a broken pool so the next document starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _iter_pages(pdf, first_page=0):
+    """Extract an open document's pages in-process, starting at index `first_page`."""
+    page_count = len(pdf.pages)
+    for i in range(first_page, page_count):
+        page = pdf.pages[i]
+        yield i + 1, page_count, clean_text(page.extract_text())
+        # Release the page's parsed layout objects as we go
+        page.close()
+
+
+def iter_page_texts(path, workers=None):
+    """Yield (page_number, page_count, text) for every page of a PDF file, in order.
+
+    If a pool worker dies (e.g. killed for memory), the pool is replaced for later
+    documents and this one finishes in-process. Raises ImportError when pdfplumber
+    is not installed.
+    """
+    import pdfplumber
+
+    workers = _workers() if workers is None else workers
+    with pdfplumber.open(path) as pdf:
+        page_count = len(pdf.pages)
+        if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+            yield from _iter_pages(pdf)
+            return
+
+    pool = _get_pool(workers)
+    ranges = deque((start, min(start + PAGES_PER_TASK, page_count))
+                   for start in range(0, page_count, PAGES_PER_TASK))
+    in_flight = deque()
+    next_page = 0
+    try:
+        # Keep only a few ranges ahead of the consumer so memory stays bounded
+        while ranges or in_flight:
+            while ranges and len(in_flight) < workers * 2:
+                start, stop = ranges.popleft()
+                in_flight.append((start, pool.submit(_extract_pages, path, start, stop)))
+            start, future = in_flight.popleft()
+            for offset, text in enumerate(future.result()):
+                next_page = start + offset + 1
+                yield next_page, page_count, text
+    except BrokenProcessPool:
+        logger.warning(f"PDF extraction pool broke at page {next_page + 1} of {path}; finishing in-process")
+        _drop_pool(pool)
+        in_flight.clear()
+        with pdfplumber.open(path) as pdf:
+            yield from _iter_pages(pdf, next_page)
+    finally:
+        # The consumer may stop early (an error, or a closed generator)
+        for _, future in in_flight:
+            future.cancel()
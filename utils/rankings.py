@@ -0,0 +1,269 @@
+"""Background computation of the investment rankings stored in gem_attributes.
+
+The composite investment score of every gem depends only on the catalog, so it is
+computed by a single background worker per process instead of inside page requests.
+The worker runs when the cached catalog changes (see utils.api_client store
+listeners), every RANKINGS_REFRESH_SECONDS as a safety net, and on demand when a
+page finds no rankings yet. Results are written to gem_attributes with one
+`executemany` upsert in a single transaction, after which the in-process
+gem_attributes mirror and the rendered-page cache are invalidated; pages only ever
+read that mirror.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+from utils import db, gem_attributes
+from utils.api_client import add_store_listener, get_catalog_version, get_gems_from_api
+from utils.catalog_index import get_catalog_index
+from utils.db_logger import log_db_exception
+from utils.response_cache import clear_response_cache
+from utils.scoring import get_score_matrix
+
+logger = logging.getLogger(__name__)
+
+CATALOG_RESOURCE = 'gems:1000'
+
+
+def _text(rec, field):
+    return str(rec.get(field) or '').strip()
+
+
+def compute_rankings(index, weights=None):
+    """Return one ranking dict per gem in the catalog index, best composite score first."""
+    matrix = get_score_matrix(index)
+    gems = []
+    for score in matrix.rank(weights):
+        name = score.name
+        rec = index.records[name]
+        labels = matrix.labels[name]
+        gems.append({
+            'name': name,
+            'mineral_group': index.gem_to_group.get(name, ''),
+            'rarity_label': labels['rarity_label'],
+            'rarity_description': _text(rec, 'RarityDescription'),
+            'availability_label': labels['availability_label'],
+            'availability_driver': _text(rec, 'AvailabilityDriver'),
+            'availability_description': _text(rec, 'AvailabilityDescription'),
+            'investment_label': labels['investment_label'],
+            'investment_description': _text(rec, 'InvestmentAppropriatenessDescription'),
+            'hardness_val': labels['hardness_val'],
+            'hardness_str': index.hardness_str.get(name, ''),
+            'hardness_cat': labels['hardness_cat'],
+            'price_text': labels['price_text'],
+            'price_group': labels['price_group'],
+            'composite': score.composite,
+            'tier': score.tier,
+        })
+    return gems
+
+
+_CREATE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS gem_attributes (
+        gem_type_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        gem_type_name TEXT NOT NULL UNIQUE,
+        Mineral_Group TEXT,
+        Hardness_Level REAL,
+        Hardness_Range TEXT,
+        Price_Range TEXT,
+        Typical_Size TEXT,
+        Rarity_Level TEXT,
+        Rarity_Description TEXT,
+        Availability_Level TEXT,
+        Availability_Driver TEXT,
+        Availability_Description TEXT,
+        Investment_Appropriateness_Level TEXT,
+        Investment_Appropriateness_Description TEXT,
+        Investment_Ranking_Score REAL,
+        Investment_Ranking_Tier TEXT
+    )
+'''
+
+_UPSERT = '''
+    INSERT INTO gem_attributes (
+        gem_type_name, Mineral_Group, Hardness_Level, Hardness_Range,
+        Price_Range, Typical_Size, Rarity_Level, Rarity_Description,
+        Availability_Level, Availability_Driver, Availability_Description,
+        Investment_Appropriateness_Level, Investment_Appropriateness_Description,
+        Investment_Ranking_Score, Investment_Ranking_Tier
+    ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+    ON CONFLICT(gem_type_name) DO UPDATE SET
+        Mineral_Group=excluded.Mineral_Group,
+        Hardness_Level=excluded.Hardness_Level,
+        Hardness_Range=excluded.Hardness_Range,
+        Price_Range=excluded.Price_Range,
+        Typical_Size=excluded.Typical_Size,
+        Rarity_Level=excluded.Rarity_Level,
+        Rarity_Description=excluded.Rarity_Description,
+        Availability_Level=excluded.Availability_Level,
+        Availability_Driver=excluded.Availability_Driver,
+        Availability_Description=excluded.Availability_Description,
+        Investment_Appropriateness_Level=excluded.Investment_Appropriateness_Level,
+        Investment_Appropriateness_Description=excluded.Investment_Appropriateness_Description,
+        Investment_Ranking_Score=excluded.Investment_Ranking_Score,
+        Investment_Ranking_Tier=excluded.Investment_Ranking_Tier
+'''
+
+
+def persist_rankings(gems, path=None):
+    """Upsert computed rankings into gem_attributes in one transaction."""
+    params = [(
+        g['name'], g['mineral_group'], g['hardness_val'], g['hardness_str'],
+        g['price_text'], None, g['rarity_label'], g['rarity_description'],
+        g['availability_label'], g['availability_driver'], g['availability_description'],
+        g['investment_label'], g['investment_description'], g['composite'], g['tier'],
+    ) for g in gems]
+    conn = db.get_db(path)
+    try:
+        with conn:
+            conn.execute(_CREATE_TABLE)
+            conn.executemany(_UPSERT, params)
+    finally:
+        conn.close()
+    gem_attributes.invalidate(path)
+    # Pages cached under the current catalog version may show the old tiers
+    clear_response_cache()
+
+
+class RankingsJob:
+    """Single background worker that recomputes rankings when woken or on a schedule."""
+
+    def __init__(self):
+        self._wake = threading.Event()
+        self._done = threading.Condition()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pending_catalog = None
+        self._app = None
+        self.interval = 0
+        self.runs = 0
+        self.errors = 0
+        self.skipped = 0
+        # Requests made so far, and how many of them finished runs have covered
+        self._requested = 0
+        self._served = 0
+        self.last_run_empty = False
+        self.last_run_at = None
+        self.last_duration = None
+        self.last_catalog_version = None
+        self.last_rows = 0
+
+    def start(self, app, interval):
+        self._app = app
+        self.interval = interval
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, daemon=True, name='rankings-job')
+                self._thread.start()
+
+    def request(self, catalog=None):
+        """Wake the worker and return a ticket for wait().
+
+        `catalog` (a catalog list) saves the worker a trip to the API.
+        """
+        if catalog is not None:
+            self._pending_catalog = catalog
+        with self._done:
+            self._requested += 1
+            ticket = self._requested
+        self._wake.set()
+        return ticket
+
+    def wait(self, ticket, timeout):
+        """Block until a run started after request `ticket` has finished, however it ended.
+
+        Returns False if `timeout` seconds passed first.
+        """
+        with self._done:
+            return self._done.wait_for(lambda: self._served >= ticket, timeout)
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.interval or None)
+            self._wake.clear()
+            with self._done:
+                covers = self._requested
+            catalog, self._pending_catalog = self._pending_catalog, None
+            try:
+                empty = not self.run(catalog)
+            except Exception as e:
+                empty = True
+                self.errors += 1
+                log_db_exception(e, 'rankings job: recomputing gem_attributes')
+                logger.exception('Investment rankings job failed')
+            with self._done:
+                self._served = covers
+                self.last_run_empty = empty
+                self._done.notify_all()
+
+    def run(self, catalog=None, path=None):
+        """Recompute and persist rankings now (in the calling thread).
+
+        Returns False when it was skipped because no catalog was available.
+        """
+        started = time.monotonic()
+        version = get_catalog_version()
+        if catalog is None:
+            if self._app is not None:
+                with self._app.app_context():
+                    catalog = get_gems_from_api()
+            else:
+                catalog = get_gems_from_api()
+        index = get_catalog_index(catalog or [])
+        if not index:
+            logger.info('Skipping rankings job: no catalog available')
+            self.skipped += 1
+            return False
+        gems = compute_rankings(index)
+        persist_rankings(gems, path)
+        self.runs += 1
+        self.last_run_at = time.time()
+        self.last_duration = round(time.monotonic() - started, 3)
+        self.last_catalog_version = version
+        self.last_rows = len(gems)
+        return True
+
+    def stats(self):
+        return {
+            'interval': self.interval,
+            'runs': self.runs,
+            'errors': self.errors,
+            'skipped': self.skipped,
+            'last_run_at': (datetime.fromtimestamp(self.last_run_at, timezone.utc).isoformat(timespec='seconds')
+                            if self.last_run_at else None),
+            'last_duration': self.last_duration,
+            'last_catalog_version': self.last_catalog_version,
+            'last_rows': self.last_rows,
+        }
+
+
+_job = RankingsJob()
+
+
+def _on_store(cache, changed):
+    if cache.name == CATALOG_RESOURCE and changed:
+        _job.request(cache.peek())
+
+
+def init_rankings_job(app):
+    """Start the rankings worker and recompute whenever the cached catalog changes."""
+    _job.start(app, float(app.config.get('RANKINGS_REFRESH_SECONDS', 3600) or 0))
+    add_store_listener(_on_store)
+
+
+def request_rankings_refresh(wait_seconds=0):
+    """Ask the worker to recompute rankings, optionally waiting for it to finish.
+
+    Does not wait when the previous run came back empty (no catalog, or an error):
+    while the API is down every page view would otherwise hold its thread for the
+    whole wait. The refresh is still requested.
+    """
+    ticket = _job.request()
+    if wait_seconds and not _job.last_run_empty:
+        _job.wait(ticket, wait_seconds)
+
+
+def get_rankings_job_stats():
+    """Return run counters of the rankings worker (for /health)."""
+    return _job.stats()
@@ -0,0 +1,193 @@
+"""Rendered-page cache for anonymous traffic.
+
+Pages under /gems, /investments, /testing and /jewelry render the same HTML for
+every anonymous visitor until the upstream catalog changes. `init_response_cache`
+installs before/after request hooks on a blueprint that serve those pages from an
+in-process LRU keyed on (path, query string, catalog version), bounded by total
+body size. Responses carry an ETag and Last-Modified so browsers and CDNs can
+revalidate with a 304 instead of downloading the page again.
+
+Signed-in users, requests with pending flash messages, non-GET requests and
+non-200 responses always bypass the cache.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+
+from flask import current_app, g, request, session
+
+from utils.api_client import get_catalog_version
+
+logger = logging.getLogger(__name__)
+
+CachedPage = namedtuple('CachedPage', 'body headers etag last_modified stored_at')
+
+# Headers that are specific to one response and must not be replayed from the cache
+_SKIP_HEADERS = {'content-length', 'set-cookie', 'date', 'x-cache'}
+
+
+class ResponseCache:
+    """Thread-safe LRU of rendered pages bounded by the total size of the bodies."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def get(self, key, ttl):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if ttl and time.monotonic() - entry.stored_at > ttl:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        size = len(entry.body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+                'evictions': self.evictions,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide page cache, or None when RESPONSE_CACHE_MAX_BYTES is 0."""
+    global _cache
+    max_bytes = int(current_app.config.get('RESPONSE_CACHE_MAX_BYTES', 0) or 0)
+    if max_bytes <= 0:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(max_bytes)
+    return _cache
+
+
+def get_response_cache_stats():
+    """Return stats for /health (None when the cache has not been created)."""
+    return _cache.stats() if _cache is not None else None
+
+
+def clear_response_cache():
+    if _cache is not None:
+        _cache.clear()
+
+
+def skip_response_cache():
+    """Keep the page being rendered out of the cache (e.g. a temporary placeholder)."""
+    g.pop('_response_cache_key', None)
+
+
+def _is_anonymous():
+    try:
+        from flask_login import current_user
+        if getattr(current_user, 'is_authenticated', False):
+            return False
+    except Exception:
+        pass
+    if session.get('user_id') or session.get('google_id') or session.get('_flashes'):
+        return False
+    return True
+
+
+def _cache_key():
+    return (request.path, request.query_string, get_catalog_version())
+
+
+def _finish(response, entry, status):
+    response.set_etag(entry.etag)
+    response.last_modified = entry.last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = int(current_app.config.get('RESPONSE_CACHE_MAX_AGE', 60))
+    response.headers['X-Cache'] = status
+    return response.make_conditional(request)
+
+
+def _serve_cached():
+    if request.method not in ('GET', 'HEAD') or not _is_anonymous():
+        return None
+    cache = get_response_cache()
+    if cache is None:
+        return None
+    key = _cache_key()
+    entry = cache.get(key, current_app.config.get('RESPONSE_CACHE_TTL', 300))
+    if entry is None:
+        g._response_cache_key = key
+        return None
+    response = current_app.response_class(entry.body, headers=entry.headers)
+    response = _finish(response, entry, 'HIT')
+    if response.status_code == 304:
+        cache.not_modified += 1
+    return response
+
+
+def _store_response(response):
+    key = g.pop('_response_cache_key', None)
+    if key is None or response.status_code != 200 or response.direct_passthrough:
+        return response
+    if session.modified or 'Set-Cookie' in response.headers or not response.mimetype == 'text/html':
+        return response
+    cache = get_response_cache()
+    if cache is None:
+        return response
+    body = response.get_data()
+    entry = CachedPage(
+        body=body,
+        headers=[(k, v) for k, v in response.headers.items() if k.lower() not in _SKIP_HEADERS],
+        etag=hashlib.sha1(body).hexdigest(),
+        last_modified=datetime.now(timezone.utc).replace(microsecond=0),
+        stored_at=time.monotonic(),
+    )
+    cache.put(key, entry)
+    return _finish(response, entry, 'MISS')
+
+
+def init_response_cache(blueprint):
+    """Serve the blueprint's anonymous GET pages from the rendered-page cache."""
+    blueprint.before_request(_serve_cached)
+    blueprint.after_request(_store_response)
@@ -0,0 +1,267 @@
+"""Composite investment scoring for the whole catalog in one batch.
+
+The composite score weighs five component scores (0-100 each): geological rarity,
+market availability and investment appropriateness (25% each), hardness and price
+range (12.5% each), and maps the result to a ranking tier. The background rankings
+job and the gem profile page both read from the same `ScoreMatrix`, built once per
+catalog index: every gem's component vector is computed in a single pass and stored
+column by column, so composites for any weight vector are one weighted sum per row.
+"""
+import logging
+import math
+import threading
+from collections import OrderedDict, namedtuple
+
+from utils.catalog_index import get_hardness_value
+from utils.facets import categorize_by_hardness, infer_price_group
+
+logger = logging.getLogger(__name__)
+
+COMPONENTS = (
+    'geological_rarity',
+    'market_availability',
+    'investment_appropriateness',
+    'hardness',
+    'price',
+)
+
+DEFAULT_WEIGHTS = (0.25, 0.25, 0.25, 0.125, 0.125)
+
+# Scoring maps from requirements
+RARITY_POINTS = {
+    'Singular Occurrence': 100,
+    'Unique Geological': 85,
+    'Limited Occurrence': 65,
+    'Abundant Minerals': 35,
+}
+
+AVAILABILITY_POINTS = {
+    'Museum Grade Rarity': 100,
+    'Collectors Market': 85,
+    'Limited Supply': 65,
+    'Readily Available': 35,
+    'Consistently Available': 10,
+}
+
+INVEST_APPR_POINTS = {
+    'Blue Chip Investment Gems': 100,
+    'Emerging Investment Gems': 75,
+    'Speculative Collector Gems': 50,
+    'Fashion/Trend Gems': 25,
+    'Non-Investment Gems': 5,
+}
+
+HARDNESS_POINTS = {
+    'Extremely Hard (10)': 100,
+    'Very Hard (8.5-9.99)': 85,
+    'Hard-2 (8.0-8.49)': 65,
+    'Hard-1 (7.5-7.99)': 45,
+    'Medium-2 (7.0-7.49)': 25,
+    'Medium-1 (6-6.99)': 10,
+    'Soft (3-5.99)': 5,
+}
+
+PRICE_GROUP_POINTS = {
+    'ULTRA-LUXURY': 100,
+    'SUPER-PREMIUM': 85,
+    'PREMIUM': 65,
+    'HIGH-END': 45,
+    'MID-RANGE': 25,
+    'AFFORDABLE': 10,
+    'BUDGET-FRIENDLY': 5,
+}
+
+METHODOLOGY = ('Composite score from Geological Rarity (25%), Market Availability (25%), '
+               'Investment Appropriateness (25%), Hardness (12.5%), Price Range (12.5%)')
+
+GemScore = namedtuple('GemScore', 'name components composite tier')
+
+# Ranked results kept per catalog for repeated what-if weight vectors
+RANK_MEMO_SIZE = 128
+
+
+def score_to_tier(s):
+    """Map a composite score to its investment ranking tier."""
+    try:
+        s = float(s)
+    except Exception:
+        return 'UNKNOWN'
+    if s >= 80:
+        return 'VERY BULLISH'
+    if s >= 70:
+        return 'BULLISH'
+    if s >= 50:
+        return 'MODERATELY BULLISH'
+    if s >= 45:
+        return 'NEUTRAL'
+    if s >= 30:
+        return 'BEARISH'
+    return 'VERY BEARISH'
+
+
+def normalize_weights(weights=None):
+    """Return a 5-tuple of weights summing to 1.
+
+    `weights` may be a sequence in COMPONENTS order or a mapping of component name
+    to weight (missing components weigh 0). Raises ValueError for negative weights,
+    unknown components or an all-zero vector.
+    """
+    if weights is None:
+        return DEFAULT_WEIGHTS
+    if isinstance(weights, dict):
+        unknown = set(weights) - set(COMPONENTS)
+        if unknown:
+            raise ValueError(f"Unknown weight components: {', '.join(sorted(unknown))}")
+        weights = [weights.get(c, 0) for c in COMPONENTS]
+    try:
+        values = [float(w) for w in weights]
+    except (TypeError, ValueError):
+        raise ValueError('Weights must be numbers')
+    if len(values) != len(COMPONENTS):
+        raise ValueError(f"Expected {len(COMPONENTS)} weights, got {len(values)}")
+    if any(w < 0 or not math.isfinite(w) for w in values):
+        raise ValueError('Weights must be finite and non-negative')
+    total = sum(values)
+    if total <= 0:
+        raise ValueError('At least one weight must be positive')
+    return tuple(w / total for w in values)
+
+
+def _text(rec, field):
+    return str(rec.get(field) or '').strip()
+
+
+def gem_hardness(rec):
+    """Numeric hardness of an API record: HardnessLevel, else parsed from HardnessRange."""
+    level = rec.get('HardnessLevel')
+    if isinstance(level, (int, float)):
+        return float(level)
+    return get_hardness_value(str(rec.get('HardnessRange') or level or ''))
+
+
+class ScoreMatrix:
+    """Component scores of every gem in a catalog index, stored column by column.
+
+    Attributes:
+        names: gem names in catalog (group) order
+        columns: component name -> tuple of points, aligned with `names`
+        labels: gem name -> dict of the labels the points were derived from
+    """
+
+    def __init__(self, index):
+        names = []
+        cols = [[] for _ in COMPONENTS]
+        labels = {}
+        for name in index.names():
+            rec = index.records[name]
+            rarity = _text(rec, 'RarityLevel')
+            availability = _text(rec, 'AvailabilityLevel')
+            invest = _text(rec, 'InvestmentAppropriatenessLevel')
+            hardness_val = gem_hardness(rec)
+            hardness_cat = categorize_by_hardness(hardness_val)
+            price_text = str(rec.get('PriceRange') or '')
+            price_group = infer_price_group(price_text, index.price_numbers.get(name, ()))[0]
+
+            names.append(name)
+            cols[0].append(RARITY_POINTS.get(rarity, 0))
+            cols[1].append(AVAILABILITY_POINTS.get(availability, 0))
+            cols[2].append(INVEST_APPR_POINTS.get(invest, 0))
+            cols[3].append(HARDNESS_POINTS.get(hardness_cat, 0))
+            cols[4].append(PRICE_GROUP_POINTS.get(price_group, 25))
+            labels[name] = {
+                'rarity_label': rarity,
+                'availability_label': availability,
+                'investment_label': invest,
+                'hardness_val': hardness_val,
+                'hardness_cat': hardness_cat,
+                'price_text': price_text,
+                'price_group': price_group,
+            }
+
+        self.names = tuple(names)
+        self.columns = {c: tuple(col) for c, col in zip(COMPONENTS, cols)}
+        self.labels = labels
+        self._position = {name: i for i, name in enumerate(names)}
+        self._rows = tuple(zip(*cols))
+        self._default = None
+        self._ranked = OrderedDict()
+        self._ranked_lock = threading.Lock()
+        self.memo_hits = 0
+        self.memo_misses = 0
+
+    def __len__(self):
+        return len(self.names)
+
+    def composites(self, weights=None):
+        """Return composite scores (aligned with `names`) for a weight vector.
+
+        The default weighting is computed once per catalog and kept.
+        """
+        w = normalize_weights(weights)
+        if w == DEFAULT_WEIGHTS and self._default is not None:
+            return self._default
+        w0, w1, w2, w3, w4 = w
+        result = tuple(round(a * w0 + b * w1 + c * w2 + d * w3 + e * w4, 2)
+                       for a, b, c, d, e in self._rows)
+        if w == DEFAULT_WEIGHTS:
+            self._default = result
+        return result
+
+    def rank(self, weights=None):
+        """Return GemScore entries for every gem, best composite first."""
+        composites = self.composites(weights)
+        order = sorted(range(len(self.names)), key=lambda i: composites[i], reverse=True)
+        return [self._score_at(i, composites) for i in order]
+
+    def ranked(self, weights=None):
+        """Memoized rank(): return (normalized weights, tuple of GemScore) for a weight vector.
+
+        Equal vectors (after normalization, to 6 decimals) share one LRU entry.
+        """
+        w = normalize_weights(weights)
+        key = tuple(round(x, 6) for x in w)
+        with self._ranked_lock:
+            hit = self._ranked.get(key)
+            if hit is not None:
+                self._ranked.move_to_end(key)
+                self.memo_hits += 1
+                return hit
+            self.memo_misses += 1
+        result = (w, tuple(self.rank(w)))
+        with self._ranked_lock:
+            self._ranked[key] = result
+            while len(self._ranked) > RANK_MEMO_SIZE:
+                self._ranked.popitem(last=False)
+        return result
+
+    def score(self, name, weights=None):
+        """Return the GemScore of one gem, or None if it is not in the catalog."""
+        i = self._position.get(name)
+        if i is None:
+            return None
+        return self._score_at(i, self.composites(weights))
+
+    def _score_at(self, i, composites):
+        return GemScore(
+            name=self.names[i],
+            components=dict(zip(COMPONENTS, self._rows[i])),
+            composite=composites[i],
+            tier=score_to_tier(composites[i]),
+        )
+
+
+_last = (None, None)
+_lock = threading.Lock()
+
+
+def get_score_matrix(index):
+    """Return the ScoreMatrix of a catalog index, building it once per index."""
+    global _last
+    source, matrix = _last
+    if source is not index:
+        with _lock:
+            source, matrix = _last
+            if source is not index:
+                matrix = ScoreMatrix(index)
+                _last = (index, matrix)
+    return matrix
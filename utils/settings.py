@@ -0,0 +1,22 @@
+"""Runtime lookup of settings that may be read outside a request.
+
+Helpers that run in worker threads or during startup cannot rely on an app
+context, so `get_setting()` falls back from the Flask config to the environment.
+"""
+import os
+
+from flask import current_app
+
+
+def get_setting(name, default=None):
+    """Return `name` from the app config, else the environment, else `default`.
+
+    Unset and empty values fall through to the next source.
+    """
+    try:
+        value = current_app.config.get(name)
+    except Exception:
+        value = None
+    if value is None or value == '':
+        value = os.environ.get(name)
+    return default if value is None or value == '' else value